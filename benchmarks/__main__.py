@@ -0,0 +1,20 @@
+"""
+Runs every benchmark with its defaults and prints the results as one JSON list, for tracking regressions.
+
+    python -m benchmarks [--output results.json]
+"""
+
+import argparse
+import json
+
+from benchmarks import construction, overhead
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", help="also write the results to this file")
+    args = parser.parse_args()
+    output = json.dumps([construction.run(), overhead.run()], indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
@@ -0,0 +1,96 @@
+"""
+Micro-benchmark for wrapping sdk completions in TypedChatCompletion.
+
+Compares the previous dump / re-validate construction with `TypedChatCompletion.from_completion`.
+
+    python -m benchmarks.construction [--choices 8] [--tool-calls 4] [--number 2000]
+"""
+
+import argparse
+import json
+import timeit
+from typing import Optional
+
+from openai.types.chat import ChatCompletion
+
+from typedai.models import TypedChatCompletion
+
+
+def build_completion(
+    choices: int, tool_calls: int, content_size: int
+) -> ChatCompletion:
+    return ChatCompletion.model_validate(
+        dict(
+            id="chatcmpl-bench",
+            object="chat.completion",
+            created=0,
+            model="gpt-4-turbo",
+            usage=dict(prompt_tokens=100, completion_tokens=100, total_tokens=200),
+            choices=[
+                dict(
+                    index=i,
+                    finish_reason="tool_calls" if tool_calls else "stop",
+                    message=dict(
+                        role="assistant",
+                        content="x" * content_size,
+                        tool_calls=[
+                            dict(
+                                id=f"call_{j}",
+                                type="function",
+                                function=dict(
+                                    name="lookup", arguments='{"key": "value"}'
+                                ),
+                            )
+                            for j in range(tool_calls)
+                        ]
+                        or None,
+                    ),
+                )
+                for i in range(choices)
+            ],
+        )
+    )
+
+
+def revalidate(completion: ChatCompletion):
+    typed = TypedChatCompletion[Optional[int]].model_validate(completion.model_dump())
+    typed._parser = int
+    typed._functions = {}
+    return typed
+
+
+def from_completion(completion: ChatCompletion):
+    return TypedChatCompletion[Optional[int]].from_completion(completion, int, {})
+
+
+def run(
+    choices: int = 8, tool_calls: int = 4, content_size: int = 2000, number: int = 2000
+) -> dict:
+    completion = build_completion(choices, tool_calls, content_size)
+    results = {}
+    for name, fn in (("revalidate", revalidate), ("from_completion", from_completion)):
+        seconds = min(timeit.repeat(lambda: fn(completion), number=number, repeat=3))
+        results[name] = dict(us_per_response=seconds / number * 1e6)
+    results["speedup"] = (
+        results["revalidate"]["us_per_response"]
+        / results["from_completion"]["us_per_response"]
+    )
+    return dict(
+        benchmark="construction",
+        params=dict(choices=choices, tool_calls=tool_calls, content_size=content_size),
+        results=results,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--choices", type=int, default=8)
+    parser.add_argument("--tool-calls", type=int, default=4)
+    parser.add_argument("--content-size", type=int, default=2000)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+    print(
+        json.dumps(
+            run(args.choices, args.tool_calls, args.content_size, args.number), indent=2
+        )
+    )
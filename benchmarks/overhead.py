@@ -0,0 +1,187 @@
+"""
+Per call client side overhead of typedai, measured against an in-process fake openai transport.
+
+Each scenario is timed for the raw openai client and for typedai on the same transport, so `overhead_us` is the time
+typedai adds on top of the sdk (prompt / schema transform, tool compilation, stream accumulation, parsing).
+
+    python -m benchmarks.overhead [--items 50] [--chunks 200] [--tools 8] [--number 100] [--output results.json]
+"""
+
+import argparse
+import json
+import timeit
+from typing import Callable, Dict, List
+
+from openai import BaseModel
+
+from benchmarks.transport import FakeOpenAITransport
+from typedai import TypedAI
+from typedai.messages import System, User
+
+MODEL = "gpt-4o-mini"
+MESSAGES = [System("You are a reporting assistant"), User("Write the report")]
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+    score: float
+    tags: List[str]
+    attributes: Dict[str, str]
+
+
+class Report(BaseModel):
+    title: str
+    summary: str
+    items: List[Item]
+    metadata: Dict[str, str]
+
+
+def report_json(items: int) -> str:
+    return Report(
+        title="Quarterly report",
+        summary="lorem ipsum " * 20,
+        items=[
+            Item(
+                id=i,
+                name=f"item {i}",
+                score=i / 7,
+                tags=[f"tag{j}" for j in range(5)],
+                attributes={f"attr{j}": f"value{j}" for j in range(5)},
+            )
+            for i in range(items)
+        ],
+        metadata={"source": "benchmark"},
+    ).model_dump_json()
+
+
+def make_tools(n: int) -> List[Callable]:
+    def make(i: int):
+        def tool(key: str, limit: int) -> str:
+            return f"{key}:{limit}"
+
+        tool.__name__ = tool.__qualname__ = f"tool_{i}"
+        return tool
+
+    return [make(i) for i in range(n)]
+
+
+def _time(fn: Callable, number: int) -> float:
+    fn()  # warm up compiled schemas, tools and connections
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number * 1e6
+
+
+def _compare(raw: Callable, typed: Callable, number: int) -> dict:
+    raw_us = _time(raw, number)
+    typed_us = _time(typed, number)
+    return dict(raw_us=raw_us, typed_us=typed_us, overhead_us=typed_us - raw_us)
+
+
+def bench_create(items: int, number: int) -> dict:
+    transport = FakeOpenAITransport(report_json(items))
+    client = transport.client()
+    typed_ai = TypedAI(client, default_model=MODEL)
+    return _compare(
+        lambda: client.chat.completions.create(model=MODEL, messages=MESSAGES),
+        lambda: typed_ai.completions.create(MESSAGES, response_type=Report),
+        number,
+    )
+
+
+def bench_raw_responses(items: int, number: int) -> dict:
+    """typedai create with the sdk's parsing against validating the raw body (`raw_responses=True`)."""
+    client = FakeOpenAITransport(report_json(items)).client()
+    sdk = TypedAI(client, default_model=MODEL)
+    raw = TypedAI(client, default_model=MODEL, raw_responses=True)
+    sdk_us = _time(
+        lambda: sdk.completions.create(MESSAGES, response_type=Report), number
+    )
+    raw_us = _time(
+        lambda: raw.completions.create(MESSAGES, response_type=Report), number
+    )
+    return dict(sdk_us=sdk_us, raw_us=raw_us, saved_us=sdk_us - raw_us)
+
+
+def bench_stream(items: int, chunks: int, number: int) -> dict:
+    transport = FakeOpenAITransport(report_json(items), chunks=chunks)
+    client = transport.client()
+    typed_ai = TypedAI(client, default_model=MODEL)
+
+    def raw():
+        for _ in client.chat.completions.create(
+            model=MODEL, messages=MESSAGES, stream=True
+        ):
+            pass
+
+    def typed():
+        typed_ai.completions.stream(MESSAGES, response_type=Report).completion()
+
+    return _compare(raw, typed, number)
+
+
+def bench_create_to_completion(items: int, tools: int, number: int) -> dict:
+    transport = FakeOpenAITransport(report_json(items), tool_calls=tools)
+    client = transport.client()
+    typed_ai = TypedAI(client, default_model=MODEL)
+    fn_tools = make_tools(tools)
+
+    def raw():
+        # the same two requests, without tool execution or parsing
+        first = client.chat.completions.create(model=MODEL, messages=MESSAGES)
+        results = [
+            dict(role="tool", tool_call_id=tc.id, content="")
+            for tc in first.choices[0].message.tool_calls
+        ]
+        client.chat.completions.create(
+            model=MODEL,
+            messages=MESSAGES + [first.choices[0].message.model_dump()] + results,
+        )
+
+    return _compare(
+        raw,
+        lambda: typed_ai.completions.create_to_completion(
+            MESSAGES, fn_tools=fn_tools, response_type=Report
+        ),
+        number,
+    )
+
+
+def bench_parse_content(items: int, number: int) -> dict:
+    transport = FakeOpenAITransport(report_json(items))
+    typed_ai = TypedAI(transport.client(), default_model=MODEL)
+    completion = typed_ai.completions.create(MESSAGES, response_type=Report)
+    content = completion.choices[0].message.content
+    return dict(
+        content_bytes=len(content),
+        json_loads_us=_time(lambda: json.loads(content), number),
+        parse_content_us=_time(completion.parse_content, number),
+    )
+
+
+def run(items: int = 50, chunks: int = 200, tools: int = 8, number: int = 100) -> dict:
+    return dict(
+        benchmark="overhead",
+        params=dict(items=items, chunks=chunks, tools=tools, number=number),
+        results=dict(
+            create=bench_create(items, number),
+            raw_responses=bench_raw_responses(items, number),
+            stream=bench_stream(items, chunks, number),
+            create_to_completion=bench_create_to_completion(items, tools, number),
+            parse_content=bench_parse_content(items, number),
+        ),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=50, help="items in the report")
+    parser.add_argument("--chunks", type=int, default=200, help="sse content chunks")
+    parser.add_argument("--tools", type=int, default=8, help="tools called per cycle")
+    parser.add_argument("--number", type=int, default=100)
+    parser.add_argument("--output", help="also write the results to this file")
+    args = parser.parse_args()
+    output = json.dumps(run(args.items, args.chunks, args.tools, args.number), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
@@ -0,0 +1,107 @@
+"""
+In-process fake of the openai chat completions endpoint for offline benchmarks.
+
+Responses are rendered once up front so the transport itself adds as little as possible to the measured time.
+"""
+
+import json
+from typing import List, Optional
+
+import httpx
+from openai import OpenAI
+
+BASE_URL = "http://fake-openai.test/v1"
+
+
+def completion_body(
+    content: Optional[str], tool_calls: int = 0, model: str = "gpt-4o-mini"
+) -> dict:
+    message = dict(role="assistant", content=content)
+    if tool_calls:
+        message["tool_calls"] = [
+            dict(
+                id=f"call_{i}",
+                type="function",
+                function=dict(
+                    name=f"tool_{i}", arguments=json.dumps(dict(key=f"k{i}", limit=i))
+                ),
+            )
+            for i in range(tool_calls)
+        ]
+    return dict(
+        id="chatcmpl-bench",
+        object="chat.completion",
+        created=0,
+        model=model,
+        choices=[
+            dict(
+                index=0,
+                finish_reason="tool_calls" if tool_calls else "stop",
+                message=message,
+            )
+        ],
+        usage=dict(prompt_tokens=100, completion_tokens=100, total_tokens=200),
+    )
+
+
+def sse_body(content: str, chunks: int, model: str = "gpt-4o-mini") -> bytes:
+    """Splits `content` over `chunks` content deltas followed by a finish chunk, as a server sent event stream."""
+    size = max(1, -(-len(content) // chunks))
+    base = dict(
+        id="chatcmpl-bench", object="chat.completion.chunk", created=0, model=model
+    )
+    events: List[dict] = [
+        dict(base, choices=[dict(index=0, delta=dict(role="assistant", content=""))])
+    ]
+    for i in range(0, len(content), size):
+        events.append(
+            dict(
+                base, choices=[dict(index=0, delta=dict(content=content[i : i + size]))]
+            )
+        )
+    events.append(dict(base, choices=[dict(index=0, delta={}, finish_reason="stop")]))
+    lines = [f"data: {json.dumps(e)}\n\n" for e in events] + ["data: [DONE]\n\n"]
+    return "".join(lines).encode()
+
+
+class FakeOpenAITransport:
+    """
+    Serves canned chat completions.
+
+    Non streamed requests get `content`, or `tool_calls` calls to `tool_0..tool_n` when the last message is not a
+    tool result, so create_to_completion runs exactly two cycles. Streamed requests get `content` split over
+    `chunks` deltas.
+    """
+
+    def __init__(self, content: str, chunks: int = 100, tool_calls: int = 0):
+        self.requests = 0
+        self._completion = json.dumps(completion_body(content)).encode()
+        self._tool_calls = (
+            json.dumps(completion_body(None, tool_calls)).encode()
+            if tool_calls
+            else None
+        )
+        self._stream = sse_body(content, chunks)
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        body = json.loads(request.content)
+        if body.get("stream"):
+            return httpx.Response(
+                200, content=self._stream, headers={"content-type": "text/event-stream"}
+            )
+        if self._tool_calls and body["messages"][-1].get("role") != "tool":
+            content = self._tool_calls
+        else:
+            content = self._completion
+        return httpx.Response(
+            200, content=content, headers={"content-type": "application/json"}
+        )
+
+    def client(self) -> OpenAI:
+        return OpenAI(
+            api_key="bench",
+            base_url=BASE_URL,
+            max_retries=0,
+            http_client=httpx.Client(transport=httpx.MockTransport(self)),
+        )
@@ -2,7 +2,7 @@ import os
 
 import pytest
 from pytest_asyncio import fixture
-from typedai import TypedAI
+from typedai import TypedAI, AsyncTypedAI
 
 # devs will want to use their key when recording new tests, but we want to allow running tests without a key set
 if "OPENAI_API_KEY" not in os.environ:
@@ -20,3 +20,8 @@ def vcr_config():
 @fixture()
 def typed_ai():
     return TypedAI(default_model="gpt-3.5-turbo")
+
+
+@fixture()
+def async_typed_ai():
+    return AsyncTypedAI(default_model="gpt-3.5-turbo")
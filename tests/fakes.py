@@ -0,0 +1,237 @@
+import json
+from typing import List, Optional, Tuple
+
+import httpx
+from openai import OpenAI
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+
+def chat_completion(
+    *contents: Optional[str],
+    tool_calls: List[Tuple[str, str]] = (),
+    model: str = "gpt-4-turbo",
+) -> ChatCompletion:
+    """Builds a ChatCompletion with one choice per content (tool calls are added to the first choice)."""
+    choices = []
+    for i, content in enumerate(contents or [None]):
+        message = dict(role="assistant", content=content)
+        if i == 0 and tool_calls:
+            message["tool_calls"] = [
+                dict(
+                    id=f"call_{j}",
+                    type="function",
+                    function=dict(name=name, arguments=arguments),
+                )
+                for j, (name, arguments) in enumerate(tool_calls)
+            ]
+        choices.append(
+            dict(
+                index=i,
+                finish_reason="tool_calls" if message.get("tool_calls") else "stop",
+                message=message,
+            )
+        )
+    return ChatCompletion.model_validate(
+        dict(
+            id="chatcmpl-test",
+            object="chat.completion",
+            created=0,
+            model=model,
+            choices=choices,
+            usage=dict(prompt_tokens=10, completion_tokens=5, total_tokens=15),
+        )
+    )
+
+
+class FakeCompletions:
+    """Stands in for `client.chat.completions`, replaying canned responses and recording requests."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        return self.responses.pop(0)
+
+
+class AsyncFakeCompletions(FakeCompletions):
+    async def create(self, **kwargs):
+        return super().create(**kwargs)
+
+
+def chat_chunks(
+    *deltas: dict, finish_reason: str = "stop", model: str = "gpt-4-turbo"
+) -> List[ChatCompletionChunk]:
+    """
+    Builds a chunk stream, one chunk per delta followed by a finish chunk.
+
+    Deltas may set `index` to target a choice other than 0.
+    """
+
+    def chunk(choices):
+        return ChatCompletionChunk.model_validate(
+            dict(
+                id="chatcmpl-test",
+                object="chat.completion.chunk",
+                created=0,
+                model=model,
+                choices=choices,
+            )
+        )
+
+    chunks = []
+    indexes = []
+    for delta in deltas:
+        delta = dict(delta)
+        index = delta.pop("index", 0)
+        if index not in indexes:
+            indexes.append(index)
+        chunks.append(chunk([dict(index=index, delta=delta)]))
+    chunks.append(
+        chunk(
+            [
+                dict(index=i, delta={}, finish_reason=finish_reason)
+                for i in indexes or [0]
+            ]
+        )
+    )
+    return chunks
+
+
+class FakeStream:
+    """Stands in for openai's Stream, optionally running a callback as each chunk is read."""
+
+    def __init__(self, chunks, on_next=None):
+        self._chunks = iter(chunks)
+        self.on_next = on_next
+        self.read = 0
+        self.closed = False
+
+    def __next__(self):
+        chunk = next(self._chunks)
+        self.read += 1
+        if self.on_next:
+            self.on_next(chunk)
+        return chunk
+
+    def __iter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
+
+    def close(self):
+        self.closed = True
+
+
+class FakeBatchServer:
+    """
+    Local stand-in for the openai files and batches endpoints, use `client()` for an OpenAI client talking to it.
+
+    Batches complete on the second retrieve. `respond(body)` returns the content for a request, or an exception to
+    fail that request.
+    """
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.files = {}
+        self.batches = {}
+        self.uploads = []
+
+    def client(self):
+        return OpenAI(
+            api_key="test",
+            base_url="http://batches.test/v1",
+            http_client=httpx.Client(transport=httpx.MockTransport(self.handle)),
+        )
+
+    def handle(self, request):
+        path = request.url.path.removeprefix("/v1")
+        if request.method == "POST" and path == "/files":
+            lines = [
+                line
+                for line in request.read().splitlines()
+                if line.startswith(b'{"custom_id"')
+            ]
+            self.uploads.append([json.loads(line) for line in lines])
+            return httpx.Response(200, json=self._file(b"\n".join(lines)))
+        if request.method == "POST" and path == "/batches":
+            body = json.loads(request.content)
+            batch = dict(
+                id=f"batch_{len(self.batches)}",
+                object="batch",
+                endpoint=body["endpoint"],
+                input_file_id=body["input_file_id"],
+                completion_window=body["completion_window"],
+                created_at=0,
+                status="validating",
+                retrieves=0,
+            )
+            self.batches[batch["id"]] = batch
+            return httpx.Response(200, json=self._public(batch))
+        if path.startswith("/batches/"):
+            batch = self.batches[path.split("/")[2]]
+            batch["retrieves"] += 1
+            if batch["retrieves"] == 1:
+                batch["status"] = "in_progress"
+            elif batch["status"] != "completed":
+                self._complete(batch)
+            return httpx.Response(200, json=self._public(batch))
+        if path.startswith("/files/") and path.endswith("/content"):
+            return httpx.Response(200, content=self.files[path.split("/")[2]])
+        return httpx.Response(404, json=dict(error=dict(message=f"no route {path}")))
+
+    def _file(self, content: bytes) -> dict:
+        file_id = f"file_{len(self.files)}"
+        self.files[file_id] = content
+        return dict(
+            id=file_id,
+            object="file",
+            bytes=len(content),
+            created_at=0,
+            filename="batch.jsonl",
+            purpose="batch",
+            status="processed",
+        )
+
+    def _complete(self, batch: dict):
+        output, errors = [], []
+        for line in self.files[batch["input_file_id"]].splitlines():
+            request = json.loads(line)
+            content = self.respond(request["body"])
+            if isinstance(content, Exception):
+                errors.append(
+                    dict(
+                        id="resp",
+                        custom_id=request["custom_id"],
+                        response=dict(
+                            status_code=400,
+                            body=dict(error=dict(code="bad", message=str(content))),
+                        ),
+                        error=None,
+                    )
+                )
+            else:
+                output.append(
+                    dict(
+                        id="resp",
+                        custom_id=request["custom_id"],
+                        response=dict(
+                            status_code=200,
+                            body=chat_completion(content).model_dump(),
+                        ),
+                        error=None,
+                    )
+                )
+        batch["status"] = "completed"
+        batch["output_file_id"] = self._file(
+            "\n".join(json.dumps(o) for o in output).encode()
+        )["id"]
+        batch["error_file_id"] = self._file(
+            "\n".join(json.dumps(e) for e in errors).encode()
+        )["id"]
+
+    @staticmethod
+    def _public(batch: dict) -> dict:
+        return {k: v for k, v in batch.items() if k != "retrieves"}
@@ -0,0 +1,111 @@
+from pathlib import Path
+
+import pytest
+from openai import BaseModel
+from typedai.messages import System, User
+
+
+@pytest.fixture(scope="module")
+def vcr_cassette_dir():
+    # async requests are identical on the wire, so reuse the sync cassettes
+    return str(Path(__file__).parent / "cassettes")
+
+
+class MyResponseObject(BaseModel):
+    philosopher: str
+    meaning: str
+    bullshit_level: float = 0.5
+
+
+async def add(a: int, b: int) -> int:
+    return a + b
+
+
+def subtract(a: int, b: int) -> int:
+    return a - b
+
+
+@pytest.mark.asyncio
+@pytest.mark.vcr("test_create/test_typed_completions.yaml")
+async def test_typed_completions(async_typed_ai):
+    completion = await async_typed_ai.completions.create(
+        model="gpt-3.5-turbo",
+        messages=[
+            System(content="You are a helpful assistant"),
+            User(content="What is the meaning of life according to Douglas Adams?"),
+        ],
+        response_type=MyResponseObject,
+    )
+    my_response_object = completion.parse_content()
+    assert my_response_object.philosopher == "Douglas Adams"
+    assert "42" in my_response_object.meaning
+
+
+@pytest.mark.asyncio
+@pytest.mark.vcr("test_create/test_typed_tools.yaml")
+async def test_async_tools(async_typed_ai):
+    completion = await async_typed_ai.completions.create(
+        model="gpt-3.5-turbo",
+        messages=[
+            System(
+                content="You are a helpful assistant. You are very bad at math so you use tools to perform math for you."
+            ),
+            User(content="What is 2 + 2?"),
+        ],
+        fn_tools=add,
+    )
+    message = (await completion.abuild_messages())[-1]
+    message["tool_call_id"] = "stable_id"
+    assert message == {"content": "4", "role": "tool", "tool_call_id": "stable_id"}
+
+
+@pytest.mark.asyncio
+@pytest.mark.vcr("test_create/test_create_to_completion.yaml")
+async def test_create_to_completion(async_typed_ai):
+    completion = await async_typed_ai.completions.create_to_completion(
+        model="gpt-4-turbo",
+        messages=[
+            System(
+                content="You are a helpful assistant. You are very bad at math so you use tools to perform math for you."
+            ),
+            User(content="What is 2 + 2?"),
+        ],
+        fn_tools=[add, subtract],
+        response_type=int,
+    )
+    assert completion.parse_content() == 4
+
+
+@pytest.mark.asyncio
+@pytest.mark.vcr("test_stream/test_typed_completions.yaml")
+async def test_stream_typed_completions(async_typed_ai):
+    stream = await async_typed_ai.completions.stream(
+        model="gpt-3.5-turbo",
+        messages=[
+            System(content="You are a helpful assistant"),
+            User(content="What is the meaning of life according to Douglas Adams?"),
+        ],
+        response_type=MyResponseObject,
+    )
+    chunks = [chunk async for chunk in stream]
+    assert chunks
+    my_response_object = (await stream.completion()).parse_content()
+    assert my_response_object.philosopher == "Douglas Adams"
+
+
+@pytest.mark.asyncio
+@pytest.mark.vcr("test_stream/test_typed_tools.yaml")
+async def test_stream_tool_messages(async_typed_ai):
+    stream = await async_typed_ai.completions.stream(
+        model="gpt-3.5-turbo",
+        messages=[
+            System(
+                content="You are a helpful assistant. You are very bad at math so you use tools to perform math for you."
+            ),
+            User(content="What is 2 + 2?"),
+        ],
+        fn_tools=add,
+    )
+    message = (await stream.messages())[-1]
+    message["tool_call_id"] = "stable_id"
+    assert message == {"content": "4", "role": "tool", "tool_call_id": "stable_id"}
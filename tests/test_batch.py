@@ -0,0 +1,104 @@
+import json
+
+import pytest
+from openai import BaseModel
+from typedai import TypedAI
+from typedai.errors import BatchRequestError
+from typedai.messages import System, User
+
+from tests.fakes import FakeBatchServer
+
+
+class Answer(BaseModel):
+    value: int
+
+
+def add(a: int, b: int) -> int:
+    return a + b
+
+
+def respond(body):
+    question = body["messages"][-1]["content"]
+    if question == "fail":
+        return ValueError("rejected")
+    a, b = question.split("+")
+    return json.dumps(dict(value=int(a) + int(b)))
+
+
+def requests(typed_ai, n):
+    completions = typed_ai.completions
+    for i in range(n):
+        yield completions.batch_request(
+            f"req-{i}",
+            [System("You are a calculator"), User(f"{i}+{i}")],
+            response_type=Answer,
+            fn_tools=add,
+            temperature=0,
+        )
+
+
+def test_batch_round_trip():
+    server = FakeBatchServer(respond)
+    typed_ai = TypedAI(server.client(), default_model="gpt-4o-mini")
+    batch = typed_ai.batches.create(requests(typed_ai, 3))
+    assert batch.batch.status == "validating"
+    batch.wait(poll_interval=0)
+    assert batch.done and batch.batch.status == "completed"
+
+    results = {r.custom_id: r for r in batch.results()}
+    assert {k: r.completion.parse_content() for k, r in results.items()} == {
+        f"req-{i}": Answer(value=2 * i) for i in range(3)
+    }
+    assert results["req-0"].completion._functions["add"][0] is add
+
+
+def test_batch_lines_use_create_transform():
+    server = FakeBatchServer(respond)
+    typed_ai = TypedAI(server.client(), default_model="gpt-4o-mini")
+    typed_ai.batches.create(requests(typed_ai, 1))
+    (line,) = server.uploads[0]
+    assert line["method"] == "POST" and line["url"] == "/v1/chat/completions"
+    body = line["body"]
+    assert "stream" not in body
+    assert body["response_format"] == {"type": "json_object"}
+    assert "JSON SCHEMA" in body["messages"][0]["content"]
+    assert body["tools"][0]["function"]["name"] == "add"
+    assert body["temperature"] == 0
+
+
+def test_failed_requests_are_reported():
+    server = FakeBatchServer(respond)
+    typed_ai = TypedAI(server.client(), default_model="gpt-4o-mini")
+    completions = typed_ai.completions
+    batch = typed_ai.batches.create(
+        [
+            completions.batch_request(
+                "ok", [System("calc"), User("1+1")], response_type=Answer
+            ),
+            completions.batch_request(
+                "bad", [System("calc"), User("fail")], response_type=Answer
+            ),
+        ]
+    )
+    batch.wait(poll_interval=0)
+    results = {r.custom_id: r for r in batch.results()}
+    assert results["ok"].completion.parse_content() == Answer(value=2)
+    assert results["bad"].completion is None
+    assert isinstance(results["bad"].error, BatchRequestError)
+    assert results["bad"].error.status_code == 400
+
+
+def test_retrieve_reattaches_to_batch():
+    server = FakeBatchServer(respond)
+    typed_ai = TypedAI(server.client(), default_model="gpt-4o-mini")
+    batch_id = typed_ai.batches.create(requests(typed_ai, 2)).id
+    batch = typed_ai.batches.retrieve(batch_id, requests(typed_ai, 2))
+    batch.wait(poll_interval=0)
+    assert sorted(r.completion.parse_content().value for r in batch.results()) == [0, 2]
+
+
+def test_duplicate_custom_ids_are_rejected():
+    server = FakeBatchServer(respond)
+    typed_ai = TypedAI(server.client(), default_model="gpt-4o-mini")
+    with pytest.raises(ValueError):
+        typed_ai.batches.create(list(requests(typed_ai, 1)) * 2)
@@ -0,0 +1,117 @@
+import pytest
+from openai import BaseModel
+from typedai.completions import AsyncTypedCompletions, TypedCompletions
+from typedai.messages import System, User
+
+from tests.fakes import (
+    AsyncFakeCompletions,
+    FakeCompletions,
+    FakeStream,
+    chat_chunks,
+    chat_completion,
+)
+
+
+class Answer(BaseModel):
+    value: int
+
+
+MESSAGES = [System("You are a helpful assistant"), User("What is 2 + 2?")]
+
+
+def test_first_valid_choice_avoids_another_cycle():
+    completions = FakeCompletions(
+        chat_completion('{"value": "four"}', "I think 4", '{"value": 4}')
+    )
+    completion = TypedCompletions(completions, "gpt-4o").create_to_completion(
+        MESSAGES, response_type=Answer, best_of=3, repair=False
+    )
+    assert completions.requests[0]["n"] == 3
+    assert len(completions.requests) == 1
+    assert completion.parse_content() == Answer(value=4)
+    assert completion.choices[0].index == 2
+
+
+def test_no_valid_choice_reports_first_error():
+    completions = FakeCompletions(
+        chat_completion('{"value": "four"}', "4"),
+        chat_completion('{"value": 4}', "4"),
+    )
+    completion = TypedCompletions(completions, "gpt-4o").create_to_completion(
+        MESSAGES, response_type=Answer, best_of=2, repair=False
+    )
+    assert completion.parse_content() == Answer(value=4)
+    retry = completions.requests[1]["messages"]
+    assert "four" in retry[-1]["content"]
+
+
+def interleaved_chunks():
+    return chat_chunks(
+        dict(content='{"val', index=0),
+        dict(content='{"value": 4', index=1),
+        dict(content='ue": ', index=0),
+        dict(content="}", index=1),
+        dict(content="5}", index=0),
+    )
+
+
+def test_stream_stops_at_first_valid_choice():
+    stream = FakeStream(interleaved_chunks())
+    completion = (
+        TypedCompletions(FakeCompletions(stream), "gpt-4o")
+        .stream(MESSAGES, response_type=Answer, n=2)
+        .first_valid()
+    )
+    assert stream.closed and stream.read == 4
+    assert completion.parse_content() == Answer(value=4)
+    assert completion.choices[1].message.content == '{"value": '
+
+
+def test_stream_without_valid_choice_reads_to_the_end():
+    stream = FakeStream(
+        chat_chunks(dict(content="nope", index=0), dict(content="[]", index=1))
+    )
+    completion = (
+        TypedCompletions(FakeCompletions(stream), "gpt-4o")
+        .stream(MESSAGES, response_type=Answer, n=2)
+        .first_valid()
+    )
+    assert not stream.closed
+    assert [c.index for c in completion.choices] == [0, 1]
+
+
+def test_text_choice_is_valid_when_finished():
+    chunks = chat_chunks(dict(content="a", index=0), dict(content="b", index=1))
+    chunks.insert(2, chunks[-1].model_copy(update=dict(choices=chunks[-1].choices[1:])))
+    completion = (
+        TypedCompletions(FakeCompletions(FakeStream(chunks)), "gpt-4o")
+        .stream(MESSAGES, n=2)
+        .first_valid()
+    )
+    assert completion.parse_content() == "b"
+
+
+class AsyncFakeStream:
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self.closed = False
+
+    async def __anext__(self):
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_async_stream_stops_at_first_valid_choice():
+    stream = AsyncFakeStream(interleaved_chunks())
+    typed = await AsyncTypedCompletions(AsyncFakeCompletions(stream), "gpt-4o").stream(
+        MESSAGES, response_type=Answer, n=2
+    )
+    completion = await typed.first_valid()
+    assert stream.closed
+    assert completion.parse_content() == Answer(value=4)
@@ -0,0 +1,97 @@
+import time
+
+from openai import BaseModel
+from typedai.cache import MemoryResponseCache, SQLiteResponseCache, request_key
+from typedai.completions import TypedCompletions
+from typedai.messages import System, User
+
+from tests.fakes import FakeCompletions, FakeStream, chat_chunks, chat_completion
+
+
+class Answer(BaseModel):
+    value: int
+
+
+def add(a: int, b: int) -> int:
+    return a + b
+
+
+MESSAGES = [System("You are a helpful assistant"), User("What is 2 + 2?")]
+
+
+def test_repeated_requests_are_served_from_cache():
+    completions = FakeCompletions(chat_completion('{"value": 4}'))
+    typed = TypedCompletions(completions, "gpt-4-turbo", MemoryResponseCache())
+    first = typed.create(MESSAGES, response_type=Answer, fn_tools=add)
+    second = typed.create(MESSAGES, response_type=Answer, fn_tools=add)
+    assert len(completions.requests) == 1
+    assert second.parse_content() == first.parse_content() == Answer(value=4)
+    assert second._functions["add"][0] is add
+    assert typed.cache.stats() == dict(hits=1, misses=1)
+
+
+def test_key_depends_on_request():
+    base = dict(model="gpt-4-turbo", messages=MESSAGES)
+    assert request_key(base) == request_key(dict(reversed(base.items()), stream=True))
+    assert request_key(base) != request_key(dict(base, model="gpt-4o"))
+
+
+def test_sqlite_cache_persists_and_expires(tmp_path):
+    path = str(tmp_path / "responses.db")
+    TypedCompletions(
+        FakeCompletions(chat_completion('{"value": 4}')),
+        "gpt-4-turbo",
+        SQLiteResponseCache(path),
+    ).create(MESSAGES, response_type=Answer)
+
+    cache = SQLiteResponseCache(path, ttl=60)
+    completion = TypedCompletions(FakeCompletions(), "gpt-4-turbo", cache).create(
+        MESSAGES, response_type=Answer
+    )
+    assert completion.parse_content() == Answer(value=4)
+
+    cache.ttl = 0
+    time.sleep(0.01)
+    completions = FakeCompletions(chat_completion('{"value": 5}'))
+    completion = TypedCompletions(completions, "gpt-4-turbo", cache).create(
+        MESSAGES, response_type=Answer
+    )
+    assert completion.parse_content() == Answer(value=5)
+
+
+def test_sqlite_cache_evicts_least_recently_used(tmp_path):
+    cache = SQLiteResponseCache(str(tmp_path / "responses.db"), max_entries=2)
+    for key in "abc":
+        cache.set(key, chat_completion(key))
+    assert cache.get("a") is None
+    assert cache.get("c").choices[0].message.content == "c"
+
+
+def test_sqlite_cache_counts_rows_across_reopens(tmp_path):
+    path = str(tmp_path / "responses.db")
+    cache = SQLiteResponseCache(path, max_entries=3)
+    for key in "abc":
+        cache.set(key, chat_completion(key))
+    cache.set("c", chat_completion("c2"))  # replacing an entry does not evict
+    assert cache.get("a") is not None
+    cache.close()
+
+    reopened = SQLiteResponseCache(path, max_entries=2)
+    reopened.set("d", chat_completion("d"))
+    count = reopened._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+    assert count == reopened._count == 2
+    assert reopened.get("d") is not None
+
+
+def test_streams_replay_from_cache():
+    chunks = chat_chunks(dict(content='{"value": '), dict(content="4}"))
+    completions = FakeCompletions(FakeStream(chunks))
+    typed = TypedCompletions(completions, "gpt-4-turbo", MemoryResponseCache())
+    assert typed.stream(
+        MESSAGES, response_type=Answer
+    ).completion().parse_content() == Answer(value=4)
+
+    replayed = typed.stream(MESSAGES, response_type=Answer)
+    assert all(chunk.object == "chat.completion.chunk" for chunk in replayed)
+    assert replayed.completion().parse_content() == Answer(value=4)
+    assert len(completions.requests) == 1
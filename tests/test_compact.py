@@ -0,0 +1,95 @@
+import json
+from typing import List, Optional
+
+from openai import BaseModel
+from pydantic import Field, TypeAdapter
+from typedai.compact import SchemaCompactor
+from typedai.completions import TypedCompletions
+from typedai.config import Config, schema_compaction_report
+from typedai.messages import System, User
+
+from tests.fakes import FakeCompletions, chat_completion
+
+
+class Address(BaseModel):
+    """A postal address."""
+
+    street: str
+    city: str
+
+
+class Node(BaseModel):
+    name: str
+    children: List["Node"] = []
+
+
+class Person(BaseModel):
+    name: str = Field(
+        description="The full legal name of the person, as written on their passport"
+    )
+    home: Address
+    work: Optional[Address] = None
+    tree: Node
+    title: str  # a property named title must survive
+
+
+def lookup(person_name: str, limit: int) -> str:
+    """Looks a person up in the directory by name and returns their record as text."""
+    return person_name
+
+
+MESSAGES = [System("You are a helpful assistant"), User("Who am I?")]
+
+
+def test_compaction_strips_titles_and_inlines_single_use_refs():
+    compacted = SchemaCompactor().compact(TypeAdapter(Person).json_schema())
+    dumped = json.dumps(compacted)
+    assert '"title": "' not in dumped
+    assert "title" in compacted["properties"]
+    assert "additionalProperties" not in compacted
+    # Address is used twice and Node is recursive, so both stay shared
+    assert set(compacted["$defs"]) == {"Address", "Node"}
+    assert compacted["properties"]["tree"] == {"$ref": "#/$defs/Node"}
+
+
+def test_single_use_ref_is_inlined_with_its_description():
+    class Wrapper(BaseModel):
+        address: Address = Field(description="where to send it")
+
+    compacted = SchemaCompactor().compact(TypeAdapter(Wrapper).json_schema())
+    assert "$defs" not in compacted
+    address = compacted["properties"]["address"]
+    assert address["description"] == "where to send it"
+    assert set(address["properties"]) == {"street", "city"}
+
+
+def test_description_trimming():
+    compactor = SchemaCompactor(max_description_length=20)
+    compacted = compactor.compact(TypeAdapter(Person).json_schema())
+    assert compacted["properties"]["name"]["description"] == "The full legal name..."
+
+
+def test_required_fields_are_kept():
+    compacted = SchemaCompactor().compact(TypeAdapter(Person).json_schema())
+    assert compacted["required"] == ["name", "home", "tree", "title"]
+
+
+def test_report_shows_savings():
+    report = schema_compaction_report([Person], [lookup])
+    assert report["Person"].saved_tokens > 0
+    assert report["lookup"].saved_tokens > 0
+    assert report["Person"].compacted_tokens < report["Person"].original_tokens
+
+
+def test_compactor_plugs_into_prompt_and_tools(monkeypatch):
+    monkeypatch.setattr(Config, "schema_compactor", SchemaCompactor())
+    completions = FakeCompletions(chat_completion("hi"))
+    TypedCompletions(completions, "gpt-4o").create(
+        MESSAGES, response_type=Person, fn_tools=lookup
+    )
+    request = completions.requests[0]
+    prompt = request["messages"][0]["content"]
+    assert '"title":"' not in prompt and '", "' not in prompt
+    parameters = request["tools"][0]["function"]["parameters"]
+    assert "title" not in parameters
+    assert "title" not in parameters["properties"]["person_name"]
@@ -0,0 +1,51 @@
+from typing import List
+
+from openai import BaseModel
+from typedai.config import Config, compile_response_type, default_message_transform_fn
+from typedai.messages import System, User
+
+
+class Answer(BaseModel):
+    value: int
+
+
+def test_response_type_is_compiled_once():
+    Config.response_type_cache.clear()
+    messages = [System("You are a helpful assistant"), User("What is 2 + 2?")]
+    _, first = default_message_transform_fn(messages, Answer)
+    _, second = default_message_transform_fn(messages, Answer)
+    assert first is second
+    assert first('{"value": 4}') == Answer(value=4)
+    assert Config.response_type_cache.stats()["hits"] == 1
+    assert Config.response_type_cache.stats()["misses"] == 1
+
+
+def test_rendered_system_prompt_is_cached():
+    Config.system_prompt_cache.clear()
+    system = System("You are a helpful assistant")
+    for i in range(3):
+        transformed, _ = default_message_transform_fn(
+            [system, User(f"question {i}")], List[int]
+        )
+        assert "JSON SCHEMA" in transformed[0]["content"]
+        assert system["content"] == "You are a helpful assistant"
+    assert Config.system_prompt_cache.hits == 2
+    assert Config.system_prompt_cache.misses == 1
+
+
+def test_wrapped_schema_matches_deserializer():
+    compiled = compile_response_type(List[int])
+    assert list(compiled.json_schema["properties"]) == compiled.json_schema["required"]
+    assert compiled.deserializer('{"response": [1, 2]}') == [1, 2]
+
+
+def test_cache_is_bounded():
+    Config.response_type_cache.clear()
+    maxsize = Config.response_type_cache.maxsize
+    try:
+        Config.response_type_cache.maxsize = 2
+        for t in (int, float, bool):
+            default_message_transform_fn([System("hi")], t)
+        assert len(Config.response_type_cache) == 2
+    finally:
+        Config.response_type_cache.maxsize = maxsize
@@ -1,9 +1,13 @@
 from pathlib import Path
+from typing import Optional
 
 import pytest
 import yaml
 from openai import BaseModel
 from typedai.messages import System, User
+from typedai.models import TypedChatCompletion
+
+from tests.fakes import chat_completion
 
 
 def test_instantiation(typed_ai):
@@ -142,3 +146,11 @@ def test_int_response_can_be_continued(typed_ai):
         response_type=int,
     )
     assert completion.parse_content() == 12
+
+
+def test_typed_completion_wraps_without_revalidation():
+    completion = chat_completion("4", "5")
+    typed = TypedChatCompletion[Optional[int]].from_completion(completion, int, {})
+    assert typed.choices[0] is completion.choices[0]
+    assert typed.model_dump() == completion.model_dump()
+    assert typed.parse_content(1) == 5
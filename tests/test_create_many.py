@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+from openai import BaseModel
+from typedai.completions import AsyncTypedCompletions, TypedCompletions
+from typedai.messages import System, User
+
+from tests.fakes import chat_completion
+
+
+class Label(BaseModel):
+    label: str
+
+
+class EchoCompletions:
+    """Labels each request with its user message, sleeping a little longer for lower numbers."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def create(self, **kwargs):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        text = kwargs["messages"][-1]["content"]
+        time.sleep(0.01 * (5 - int(text) % 5))
+        with self._lock:
+            self.in_flight -= 1
+        if text == "13":
+            raise ValueError("boom")
+        return chat_completion(f'{{"label": "{text}"}}')
+
+
+class AsyncEchoCompletions(EchoCompletions):
+    async def create(self, **kwargs):
+        return super().create(**kwargs)
+
+
+def prompts(n, consumed):
+    for i in range(n):
+        consumed.append(i)
+        yield [System("Label the number"), User(str(i))]
+
+
+def test_create_many_bounds_concurrency_and_consumes_lazily():
+    completions = EchoCompletions()
+    consumed, yielded = [], []
+    for result in TypedCompletions(completions, "gpt-4-turbo").create_many(
+        prompts(20, consumed), response_type=Label, concurrency=4
+    ):
+        yielded.append(result.index)
+        assert len(consumed) - len(yielded) <= 4
+        if result.index == 13:
+            assert isinstance(result.error, ValueError)
+        else:
+            assert result.completion.parse_content() == Label(label=str(result.index))
+    assert sorted(yielded) == list(range(20))
+    assert yielded != list(range(20))  # finished out of order
+    assert completions.max_in_flight <= 4
+
+
+def test_create_many_preserves_order():
+    results = TypedCompletions(EchoCompletions(), "gpt-4-turbo").create_many(
+        prompts(10, []), response_type=Label, concurrency=4, preserve_order=True
+    )
+    assert [r.index for r in results] == list(range(10))
+
+
+def test_create_many_can_raise():
+    with pytest.raises(ValueError):
+        list(
+            TypedCompletions(EchoCompletions(), "gpt-4-turbo").create_many(
+                prompts(20, []), response_type=Label, return_exceptions=False
+            )
+        )
+
+
+@pytest.mark.asyncio
+async def test_async_create_many():
+    completions = AsyncEchoCompletions()
+    results = [
+        r
+        async for r in AsyncTypedCompletions(completions, "gpt-4-turbo").create_many(
+            prompts(10, []), response_type=Label, concurrency=3, preserve_order=True
+        )
+    ]
+    assert [r.index for r in results] == list(range(10))
+    assert results[4].completion.parse_content() == Label(label="4")
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+
+import pytest
+from typedai.completions import AsyncTypedCompletions, TypedCompletions
+from typedai.messages import System, User
+from typedai.models import CONCURRENT, HANDLE_ANY_ERROR
+
+from tests.fakes import AsyncFakeCompletions, FakeCompletions, FakeStream, chat_chunks
+
+started = threading.Event()
+
+
+def lookup(key: str) -> str:
+    started.set()
+    return key.upper()
+
+
+def tool_call_chunks(*calls):
+    deltas = []
+    for i, (name, arguments) in enumerate(calls):
+        deltas.append(
+            dict(
+                tool_calls=[
+                    dict(
+                        index=i, id=f"call_{i}", function=dict(name=name, arguments="")
+                    )
+                ]
+            )
+        )
+        for j in range(0, len(arguments), 4):
+            deltas.append(
+                dict(
+                    tool_calls=[
+                        dict(index=i, function=dict(arguments=arguments[j : j + 4]))
+                    ]
+                )
+            )
+    return chat_chunks(*deltas, finish_reason="tool_calls")
+
+
+def test_tool_starts_before_stream_ends():
+    started.clear()
+    chunks = tool_call_chunks(
+        ("lookup", '{"key": "first"}'), ("lookup", '{"key": "second"}')
+    )
+    seen_before_end = []
+
+    def on_next(chunk):
+        if chunk is chunks[-2]:  # last argument chunk of the second call
+            seen_before_end.append(started.wait(timeout=2))
+
+    completions = FakeCompletions(FakeStream(chunks, on_next))
+    stream = TypedCompletions(completions, "gpt-4-turbo").stream(
+        [System("You are a helpful assistant"), User("look up first and second")],
+        fn_tools=lookup,
+        eager_tools=True,
+    )
+    messages = stream.messages()
+    assert seen_before_end == [True]
+    assert [m["content"] for m in messages[1:]] == ["FIRST", "SECOND"]
+
+
+def test_eager_argument_errors_follow_tool_error_handling():
+    completions = FakeCompletions(
+        FakeStream(tool_call_chunks(("lookup", '{"wrong": 1}')))
+    )
+    stream = TypedCompletions(completions, "gpt-4-turbo").stream(
+        [System("You are a helpful assistant"), User("look up")],
+        fn_tools=lookup,
+        eager_tools=True,
+    )
+    messages = stream.messages(tool_error_handling=HANDLE_ANY_ERROR)
+    assert "Error parsing arguments" in messages[-1]["content"]
+
+
+class AsyncFakeStream:
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+
+    async def __anext__(self):
+        await asyncio.sleep(0)
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+@pytest.mark.asyncio
+async def test_async_eager_tools():
+    calls = []
+
+    async def record(key: str) -> str:
+        calls.append(key)
+        return key
+
+    completions = AsyncFakeCompletions(
+        AsyncFakeStream(tool_call_chunks(("record", '{"key": "a"}')))
+    )
+    stream = await AsyncTypedCompletions(completions, "gpt-4-turbo").stream(
+        [System("You are a helpful assistant"), User("record a")],
+        fn_tools=record,
+        eager_tools=True,
+    )
+    messages = await stream.messages()
+    assert calls == ["a"]  # executed once, eagerly
+    assert messages[-1]["content"] == "a"
+
+
+@pytest.mark.asyncio
+async def test_async_stream_messages_execute_tools_concurrently():
+    barrier = asyncio.Barrier(2)
+
+    async def wait_for_all(key: str) -> str:
+        await asyncio.wait_for(
+            barrier.wait(), 2
+        )  # only passes with both calls in flight
+        return key
+
+    completions = AsyncFakeCompletions(
+        AsyncFakeStream(
+            tool_call_chunks(
+                ("wait_for_all", '{"key": "a"}'), ("wait_for_all", '{"key": "b"}')
+            )
+        )
+    )
+    stream = await AsyncTypedCompletions(completions, "gpt-4-turbo").stream(
+        [System("You are a helpful assistant"), User("look up a and b")],
+        fn_tools=wait_for_all,
+    )
+    messages = await stream.messages(tool_execution=CONCURRENT)
+    assert [m["content"] for m in messages[1:]] == ["a", "b"]
@@ -0,0 +1,148 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from typedai.completions import AsyncTypedCompletions, TypedCompletions
+from typedai.errors import ToolTimeoutError
+from typedai.execution import execution_policy, tool_policy
+from typedai.messages import System, User
+from typedai.models import HANDLE_ANY_ERROR
+
+from tests.fakes import AsyncFakeCompletions, FakeCompletions, chat_completion
+
+MESSAGES = [System("You are a helpful assistant"), User("Crunch the numbers")]
+release = threading.Event()
+
+
+@execution_policy(process=True)
+def pid(offset: int) -> int:
+    return os.getpid() + offset
+
+
+@execution_policy(timeout=0.05)
+def stuck(key: str) -> str:
+    release.wait(5)
+    return key
+
+
+@pytest.fixture(autouse=True)
+def unblock():
+    release.clear()
+    yield
+    release.set()
+
+
+def completion_calling(*tool_calls):
+    completion = chat_completion(None, tool_calls=list(tool_calls))
+    return TypedCompletions(FakeCompletions(completion), "gpt-4o")
+
+
+def test_timeout_becomes_tool_error():
+    completion = completion_calling(("stuck", '{"key": "a"}')).create(
+        MESSAGES, fn_tools=[stuck]
+    )
+    message = completion.build_messages(tool_error_handling=HANDLE_ANY_ERROR)[-1]
+    assert message["content"].startswith(
+        "Error during tool execution\nToolTimeoutError"
+    )
+    with pytest.raises(ToolTimeoutError):
+        completion.execute_tool_call(completion.choices[0].message.tool_calls[0])
+    stats = tool_policy(stuck).stats()
+    assert stats["calls"] == 2 and stats["timeouts"] == 2
+    assert 0.05 <= stats["max_seconds"] < 1
+
+
+def test_hung_tools_do_not_starve_other_timed_tools():
+    def hung(key: str) -> str:
+        release.wait(5)
+        return key
+
+    def quick(key: str) -> str:
+        return key
+
+    execution_policy(hung, timeout=0.05)
+    hung_policy = tool_policy(hung)
+    with ThreadPoolExecutor(64) as pool:
+        errors = list(pool.map(lambda _: _raises(hung_policy.run, hung), range(64)))
+    assert all(isinstance(e, ToolTimeoutError) for e in errors)
+    # every hung call still holds its thread, the next timed tool starts right away regardless
+    execution_policy(quick, timeout=0.05)
+    assert tool_policy(quick).run(quick, dict(key="a")) == "a"
+
+
+def test_timed_threads_are_capped(monkeypatch):
+    threads = threading.BoundedSemaphore(1)
+    monkeypatch.setattr("typedai.execution._timed_threads", threads)
+
+    def hung(key: str) -> str:
+        release.wait(5)
+        return key
+
+    execution_policy(hung, timeout=0.05)
+    assert isinstance(_raises(tool_policy(hung).run, hung), ToolTimeoutError)
+    started = time.monotonic()
+    assert isinstance(_raises(tool_policy(hung).run, hung), ToolTimeoutError)
+    assert time.monotonic() - started < 0.05  # failed fast, without a thread
+    release.set()
+    assert threads.acquire(timeout=1)  # the hung call finished and gave its thread back
+    threads.release()
+    assert tool_policy(hung).run(hung, dict(key="a")) == "a"
+
+
+def _raises(run, fn):
+    try:
+        run(fn, dict(key="a"))
+    except ToolTimeoutError as e:
+        return e
+
+
+def test_process_pool_execution():
+    completion = completion_calling(("pid", '{"offset": 0}')).create(
+        MESSAGES, fn_tools=[pid]
+    )
+    assert completion.build_messages()[-1]["content"] != str(os.getpid())
+    assert tool_policy(pid).stats()["calls"] == 1
+
+
+def test_process_pool_rejects_coroutines():
+    async def lookup(key: str) -> str:
+        return key
+
+    with pytest.raises(ValueError):
+        execution_policy(lookup, process=True)
+
+
+@pytest.mark.asyncio
+async def test_async_timeouts():
+    async def slow(key: str) -> str:
+        await asyncio.sleep(5)
+        return key
+
+    execution_policy(slow, timeout=0.05)
+    completions = AsyncFakeCompletions(
+        chat_completion(
+            None, tool_calls=[("slow", '{"key": "a"}'), ("stuck", '{"key": "b"}')]
+        )
+    )
+    completion = await AsyncTypedCompletions(completions, "gpt-4o").create(
+        MESSAGES, fn_tools=[slow, stuck]
+    )
+    messages = await completion.abuild_messages(tool_error_handling=HANDLE_ANY_ERROR)
+    assert all("ToolTimeoutError" in m["content"] for m in messages[1:])
+    assert tool_policy(slow).timeouts == 1
+    release.set()  # before the loop waits for its executor threads
+
+
+@pytest.mark.asyncio
+async def test_async_process_pool_execution():
+    completions = AsyncFakeCompletions(
+        chat_completion(None, tool_calls=[("pid", '{"offset": 1}')])
+    )
+    completion = await AsyncTypedCompletions(completions, "gpt-4o").create(
+        MESSAGES, fn_tools=[pid]
+    )
+    messages = await completion.abuild_messages()
+    assert messages[-1]["content"] != str(os.getpid() + 1)
@@ -0,0 +1,154 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import openai
+import pytest
+from typedai.completions import AsyncTypedCompletions, TypedCompletions
+from typedai.hedging import HedgingPolicy
+from typedai.messages import System, User
+
+from tests.fakes import FakeCompletions, FakeStream, chat_chunks, chat_completion
+
+MESSAGES = [System("You are a helpful assistant"), User("What is 2 + 2?")]
+
+
+class DelayedCompletions(FakeCompletions):
+    """Each response is (delay, response), exceptions are raised after the delay."""
+
+    def create(self, **kwargs):
+        delay, response = super().create(**kwargs)
+        time.sleep(delay)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class AsyncDelayedCompletions(FakeCompletions):
+    def __init__(self, *responses):
+        super().__init__(*responses)
+        self.cancelled = 0
+
+    async def create(self, **kwargs):
+        delay, response = super().create(**kwargs)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def rate_limited():
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, request=request, headers={"retry-after": "0"})
+    return openai.RateLimitError("slow down", response=response, body=None)
+
+
+def policy(**kwargs):
+    defaults = dict(initial_delay=0.05, initial_response_delay=0.05, backoff_base=0.001)
+    return HedgingPolicy(**{**defaults, **kwargs})
+
+
+def test_slow_request_is_hedged():
+    completions = DelayedCompletions(
+        (0.5, chat_completion("slow")), (0, chat_completion("fast"))
+    )
+    typed = TypedCompletions(completions, "gpt-4-turbo", hedging=policy())
+    started = time.monotonic()
+    completion = typed.create(MESSAGES)
+    assert completion.parse_content() == "fast"
+    assert time.monotonic() - started < 0.4
+    assert len(completions.requests) == 2
+    assert typed.hedging.stats() == dict(
+        requests=1, hedges_fired=1, hedges_won=1, retries=0
+    )
+
+
+def test_fast_request_is_not_hedged():
+    completions = DelayedCompletions((0, chat_completion("fast")))
+    typed = TypedCompletions(completions, "gpt-4-turbo", hedging=policy())
+    assert typed.create(MESSAGES).parse_content() == "fast"
+    assert typed.hedging.stats()["hedges_fired"] == 0
+
+
+def test_retries_rate_limits_with_backoff():
+    completions = DelayedCompletions(
+        (0, rate_limited()), (0, rate_limited()), (0, chat_completion("ok"))
+    )
+    typed = TypedCompletions(completions, "gpt-4-turbo", hedging=policy())
+    assert typed.create(MESSAGES).parse_content() == "ok"
+    assert typed.hedging.retries == 2
+
+
+def test_does_not_retry_client_errors():
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    error = openai.BadRequestError(
+        "bad", response=httpx.Response(400, request=request), body=None
+    )
+    completions = DelayedCompletions((0, error))
+    typed = TypedCompletions(completions, "gpt-4-turbo", hedging=policy())
+    with pytest.raises(openai.BadRequestError):
+        typed.create(MESSAGES)
+    assert typed.hedging.retries == 0
+
+
+def test_stream_hedges_on_first_chunk_and_closes_loser():
+    slow = FakeStream(
+        chat_chunks(dict(content="slow")), on_next=lambda _: time.sleep(0.3)
+    )
+    fast = FakeStream(chat_chunks(dict(content="fast")))
+    typed = TypedCompletions(
+        DelayedCompletions((0, slow), (0, fast)), "gpt-4-turbo", hedging=policy()
+    )
+    assert typed.stream(MESSAGES).completion().parse_content() == "fast"
+    assert typed.hedging.hedges_won == 1
+    time.sleep(0.4)
+    assert slow.closed
+
+
+def test_delay_tracks_latency_percentile():
+    hedging = HedgingPolicy(percentile=0.9, min_samples=10, min_delay=0)
+    for i in range(100):
+        hedging.observe(i / 100)
+    assert hedging.delay() == pytest.approx(0.9)
+    assert hedging.delay(stream=True) == hedging.initial_delay
+
+
+def test_responses_are_not_hedged_before_min_samples():
+    completions = DelayedCompletions((0.1, chat_completion("slow")))
+    hedging = HedgingPolicy(initial_delay=0.01, min_samples=2)
+    typed = TypedCompletions(completions, "gpt-4-turbo", hedging=hedging)
+    assert typed.create(MESSAGES).parse_content() == "slow"
+    assert hedging.stats()["hedges_fired"] == 0
+    assert hedging.delay() is None
+
+
+def test_concurrent_requests_do_not_queue_into_hedges():
+    # more concurrent requests than any worker pool would run at once, each well inside the deadline
+    completions = DelayedCompletions(
+        *[(0.2, chat_completion("ok")) for _ in range(100)]
+    )
+    typed = TypedCompletions(
+        completions, "gpt-4-turbo", hedging=policy(initial_response_delay=0.35)
+    )
+    with ThreadPoolExecutor(100) as pool:
+        results = list(pool.map(lambda _: typed.create(MESSAGES), range(100)))
+    assert all(r.parse_content() == "ok" for r in results)
+    assert typed.hedging.stats()["hedges_fired"] == 0
+
+
+@pytest.mark.asyncio
+async def test_async_hedge_cancels_loser():
+    completions = AsyncDelayedCompletions(
+        (5, chat_completion("slow")), (0, chat_completion("fast"))
+    )
+    typed = AsyncTypedCompletions(completions, "gpt-4-turbo", hedging=policy())
+    completion = await typed.create(MESSAGES)
+    assert completion.parse_content() == "fast"
+    await asyncio.sleep(0)
+    assert completions.cancelled == 1
+    assert typed.hedging.stats()["hedges_won"] == 1
@@ -0,0 +1,145 @@
+import pytest
+from openai import BaseModel
+from typedai.completions import TypedCompletions
+from typedai.config import Config
+from typedai.errors import ContentParsingError
+from typedai.instrumentation import Hook, add_hook, remove_hook
+from typedai.messages import System, User
+from typedai.util import tool_registry
+
+from tests.fakes import FakeCompletions, FakeStream, chat_chunks, chat_completion
+
+
+class Answer(BaseModel):
+    value: int
+
+
+def add(a: int, b: int) -> int:
+    return a + b
+
+
+MESSAGES = [System("You are a helpful assistant"), User("What is 2 + 2?")]
+
+
+class RecordingHook(Hook):
+    def __init__(self):
+        self.events = []
+
+    def __getattribute__(self, name):
+        if name in Hook.__dict__ and not name.startswith("_"):
+            return lambda *args: self.events.append((name, *args))
+        return super().__getattribute__(name)
+
+    def names(self):
+        return [name for name, *_ in self.events]
+
+
+@pytest.fixture
+def hook():
+    Config.response_type_cache.clear()
+    tool_registry.clear()
+    hook = add_hook(RecordingHook())
+    yield hook
+    remove_hook(hook)
+
+
+def test_create_to_completion_events(hook):
+    completions = FakeCompletions(
+        chat_completion(tool_calls=[("add", '{"a": 2, "b": 2}')]),
+        chat_completion("not json"),
+        chat_completion('{"value": 4}'),
+    )
+    typed = TypedCompletions(completions, "gpt-4-turbo")
+    typed.create_to_completion(MESSAGES, fn_tools=add, response_type=Answer)
+    assert hook.names() == [
+        "tool_compiled",
+        "schema_compiled",
+        "request",
+        "tool_call",
+        "request",
+        "parsed",
+        "request",
+        "parsed",
+        "cycles",
+    ]
+    events = {e[0]: e[1:] for e in hook.events}
+    assert events["tool_compiled"][0] == "add"
+    assert events["schema_compiled"][0] is Answer
+    assert events["request"][:2] == ("gpt-4-turbo", False)
+    assert events["tool_call"][0] == "add" and events["tool_call"][2] is None
+    assert events["cycles"] == (3, True)
+    parse_errors = [e[2] for e in hook.events if e[0] == "parsed"]
+    assert parse_errors[0] is not None and parse_errors[1] is None
+    assert all(e[-1] >= 0 for e in hook.events if isinstance(e[-1], float))
+
+
+def test_stream_chunk_timings(hook):
+    completions = FakeCompletions(
+        FakeStream(chat_chunks(dict(content='{"value"'), dict(content=": 4}")))
+    )
+    typed = TypedCompletions(completions, "gpt-4-turbo")
+    typed.stream(MESSAGES, response_type=Answer).completion()
+    names = hook.names()
+    assert names.count("first_chunk") == 1
+    assert names.count("chunk_gap") == 2
+    assert names.index("request") < names.index("first_chunk")
+
+
+def test_failed_tool_and_parse_report_errors(hook):
+    def fail() -> int:
+        raise RuntimeError("boom")
+
+    typed = TypedCompletions(
+        FakeCompletions(
+            chat_completion("nope", tool_calls=[("fail", "{}")]),
+        ),
+        "gpt-4-turbo",
+    )
+    completion = typed.create(MESSAGES, fn_tools=fail, response_type=Answer)
+    with pytest.raises(ContentParsingError):
+        completion.parse_content()
+    completion.build_messages(tool_error_handling="any")
+    errors = {e[0]: e[-1] for e in hook.events if e[0] in ("parsed", "tool_call")}
+    assert isinstance(errors["parsed"], Exception)
+    assert isinstance(errors["tool_call"], RuntimeError)
+
+
+def test_clock_is_not_read_without_hooks(monkeypatch):
+    def clock():
+        raise AssertionError("clock read without hooks")
+
+    for module in ("typedai.completions", "typedai.models", "typedai.config"):
+        monkeypatch.setattr(f"{module}.perf_counter", clock)
+    Config.response_type_cache.clear()
+    typed = TypedCompletions(
+        FakeCompletions(
+            chat_completion('{"value": 4}', tool_calls=[("add", '{"a": 1, "b": 1}')]),
+            FakeStream(chat_chunks(dict(content='{"value": 4}'))),
+        ),
+        "gpt-4-turbo",
+    )
+    completion = typed.create(MESSAGES, fn_tools=add, response_type=Answer)
+    assert completion.parse_content() == Answer(value=4)
+    completion.build_messages()
+    typed.stream(MESSAGES, response_type=Answer).completion()
+
+
+def test_opentelemetry_hook_records_histograms():
+    pytest.importorskip("opentelemetry.sdk")
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+    from typedai.instrumentation import OpenTelemetryHook
+
+    reader = InMemoryMetricReader()
+    hook = add_hook(OpenTelemetryHook(MeterProvider(metric_readers=[reader])))
+    try:
+        typed = TypedCompletions(
+            FakeCompletions(chat_completion('{"value": 4}')), "gpt-4-turbo"
+        )
+        typed.create_to_completion(MESSAGES, response_type=Answer)
+    finally:
+        remove_hook(hook)
+    metrics = reader.get_metrics_data().resource_metrics[0].scope_metrics[0].metrics
+    assert {"typedai.request.duration", "typedai.completion.cycles"} <= {
+        m.name for m in metrics
+    }
@@ -0,0 +1,141 @@
+import pytest
+from openai import BaseModel
+from typedai.completions import AsyncTypedCompletions, TypedCompletions
+from typedai.memo import CONVERSATION, MISSING, ToolMemo, cacheable, tool_memo
+from typedai.messages import System, User
+
+from tests.fakes import AsyncFakeCompletions, FakeCompletions, chat_completion
+
+MESSAGES = [System("You are a helpful assistant"), User("What is the price of a?")]
+
+
+class Price(BaseModel):
+    price: int
+
+
+def lookup_cycles(*arguments):
+    """One tool call cycle per arguments, followed by the final answer."""
+    return [chat_completion(None, tool_calls=[("lookup", a)]) for a in arguments] + [
+        chat_completion('{"price": 3}')
+    ]
+
+
+def test_shared_results_are_reused_across_cycles_and_conversations():
+    calls = []
+
+    @cacheable
+    def lookup(key: str) -> int:
+        calls.append(key)
+        return 3
+
+    completions = FakeCompletions(
+        *lookup_cycles('{"key": "a"}', '{"key":"a"}', '{"key": "b"}'),
+        *lookup_cycles('{"key": "a"}'),
+    )
+    typed = TypedCompletions(completions, "gpt-4o")
+    for _ in range(2):
+        typed.create_to_completion(MESSAGES, fn_tools=[lookup], response_type=Price)
+    assert calls == ["a", "b"]
+    assert tool_memo(lookup).stats() == dict(
+        hits=2, misses=2, hit_rate=0.5, size=2, maxsize=256
+    )
+    assert completions.requests[2]["messages"][-1]["content"] == "3"
+
+
+def test_conversation_scope():
+    calls = []
+
+    @cacheable(scope=CONVERSATION)
+    def lookup(key: str) -> int:
+        calls.append(key)
+        return 3
+
+    completions = FakeCompletions(
+        *lookup_cycles('{"key": "a"}', '{"key": "a"}'), *lookup_cycles('{"key": "a"}')
+    )
+    typed = TypedCompletions(completions, "gpt-4o")
+    for _ in range(2):
+        typed.create_to_completion(MESSAGES, fn_tools=[lookup], response_type=Price)
+    assert calls == ["a", "a"]
+    # outside create_to_completion there is no conversation to memoize in
+    completion = TypedCompletions(
+        FakeCompletions(chat_completion(None, tool_calls=[("lookup", '{"key": "a"}')])),
+        "gpt-4o",
+    ).create(MESSAGES, fn_tools=[lookup])
+    completion.build_messages()
+    assert calls == ["a", "a", "a"]
+
+
+def test_methods_are_memoized_per_instance():
+    class Repo:
+        def __init__(self, name: str):
+            self.name = name
+            self.calls = 0
+
+        @cacheable
+        def lookup(self, key: str) -> str:
+            self.calls += 1
+            return f"{self.name}:{key}"
+
+    results = []
+    for repo in (Repo("A"), Repo("B")):
+        for _ in range(2):
+            completion = TypedCompletions(
+                FakeCompletions(
+                    chat_completion(None, tool_calls=[("lookup", '{"key": "x"}')])
+                ),
+                "gpt-4o",
+            ).create(MESSAGES, fn_tools=[repo.lookup])
+            results.append(completion.build_messages()[-1]["content"])
+        assert repo.calls == 1
+    assert results == ["A:x", "A:x", "B:x", "B:x"]
+    assert tool_memo(Repo.lookup).stats()["size"] == 1  # the first repo was collected
+
+
+def test_ttl_and_lru_eviction(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("typedai.memo.time.monotonic", lambda: now[0])
+    memo = ToolMemo(maxsize=2, ttl=10)
+    store = memo.store(None)
+    memo.set(store, "a", 1)
+    memo.set(store, "b", 2)
+    assert memo.get(store, "a") == 1
+    memo.set(store, "c", 3)
+    assert list(store) == ["a", "c"]
+    now[0] = 11
+    assert memo.get(store, "a") is MISSING
+    assert list(store) == ["c"]
+
+
+def test_failures_are_not_cached():
+    calls = []
+
+    @cacheable
+    def flaky(key: str) -> int:
+        calls.append(key)
+        raise ValueError("down")
+
+    completions = FakeCompletions(
+        chat_completion(None, tool_calls=[("flaky", '{"key": "a"}')] * 2),
+    )
+    completion = TypedCompletions(completions, "gpt-4o").create(
+        MESSAGES, fn_tools=[flaky]
+    )
+    completion.build_messages(tool_error_handling="any")
+    assert calls == ["a", "a"]
+
+
+@pytest.mark.asyncio
+async def test_async_results_are_reused():
+    calls = []
+
+    @cacheable
+    async def lookup(key: str) -> int:
+        calls.append(key)
+        return 3
+
+    completions = AsyncFakeCompletions(*lookup_cycles('{"key": "a"}', '{"key": "a"}'))
+    await AsyncTypedCompletions(completions, "gpt-4o").create_to_completion(
+        MESSAGES, fn_tools=[lookup], response_type=Price
+    )
+    assert calls == ["a"]
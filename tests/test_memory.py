@@ -0,0 +1,76 @@
+from typedai.completions import TypedCompletions
+from typedai.memory import TokenBudgetMemory, estimate_tokens
+from typedai.messages import System, User
+
+from tests.fakes import FakeCompletions, chat_completion
+
+
+def assistant_tool_call(*ids):
+    return dict(
+        role="assistant",
+        content=None,
+        tool_calls=[
+            dict(id=i, type="function", function=dict(name="lookup", arguments="{}"))
+            for i in ids
+        ],
+    )
+
+
+def tool_result(tool_call_id, content="ok"):
+    return dict(role="tool", tool_call_id=tool_call_id, content=content)
+
+
+def test_keeps_system_and_newest_turns_within_budget():
+    messages = [System("system"), *[User("x" * 40) for _ in range(10)]]
+    selected = TokenBudgetMemory(max_tokens=50).select(messages)
+    assert selected[0] == messages[0]
+    assert selected[1:] == messages[-3:]
+    assert sum(estimate_tokens(m) for m in selected) <= 50
+
+
+def test_never_orphans_tool_call_ids():
+    messages = [
+        System("system"),
+        User("question"),
+        assistant_tool_call("a", "b"),
+        tool_result("a", "x" * 200),
+        tool_result("b"),
+        User("y" * 40),
+    ]
+    selected = TokenBudgetMemory(max_tokens=40).select(messages)
+    assert selected == [messages[0], messages[-1]]
+
+    selected = TokenBudgetMemory(max_tokens=90).select(messages)
+    assert selected == [messages[0], *messages[2:]]
+
+
+def test_truncates_oversized_tool_results():
+    messages = [
+        System("system"),
+        assistant_tool_call("a"),
+        tool_result("a", "x" * 1000),
+    ]
+    selected = TokenBudgetMemory(max_tokens=1000, max_tool_result_tokens=10).select(
+        messages
+    )
+    assert selected[-1]["content"].startswith("x" * 40 + "\n...[truncated ~240 tokens]")
+    assert messages[-1]["content"] == "x" * 1000
+
+
+def lookup() -> str:
+    return "z" * 2000
+
+
+def test_create_to_completion_reports_cycle_prompt_sizes():
+    completions = FakeCompletions(
+        chat_completion(tool_calls=[("lookup", "{}")]), chat_completion("done")
+    )
+    completion = TypedCompletions(completions, "gpt-4-turbo").create_to_completion(
+        [System("system"), User("look it up")],
+        fn_tools=lookup,
+        memory=TokenBudgetMemory(max_tokens=1000, max_tool_result_tokens=100),
+    )
+    assert [c.messages for c in completion.cycles] == [2, 4]
+    assert completion.cycles[1].estimated_prompt_tokens < 200
+    assert completion.cycles[1].prompt_tokens == 10
+    assert len(completions.requests[1]["messages"][-1]["content"]) < 500
@@ -0,0 +1,156 @@
+from functools import partial
+from typing import Dict, List
+
+import pytest
+from openai import BaseModel
+from typedai.completions import TypedCompletions
+from typedai.config import compile_response_type
+from typedai.messages import System, User
+from typedai.models import TypedStream
+from typedai.partial import PartialJSONParser, PartialSnapshots, partial_value
+from typedai.util import optional_parser
+
+from tests.fakes import FakeCompletions, FakeStream, chat_chunks
+
+
+class Philosopher(BaseModel):
+    name: str
+    ideas: List[str]
+    influence: float = 0.5
+
+
+def test_parser_only_adds_scalars_once_they_close():
+    parser = PartialJSONParser()
+    parser.feed('{"name": "Douglas Ad')
+    assert parser.value == {}
+    parser.feed('ams", "ideas": ["4')
+    assert parser.value == {"name": "Douglas Adams", "ideas": []}
+    parser.feed('2", "towels"], "age": 4')
+    assert parser.value["ideas"] == ["42", "towels"]
+    assert "age" not in parser.value
+    parser.feed("9}")
+    assert parser.value["age"] == 49
+    assert parser.complete
+
+
+def test_parser_handles_escapes_split_across_feeds():
+    parser = PartialJSONParser()
+    for c in '```json\n{"quote": "say \\"hi\\" \\u00e9", "ok": true, "x": null}```':
+        parser.feed(c)
+    assert parser.value == {"quote": 'say "hi" é', "ok": True, "x": None}
+
+
+def test_parser_combines_surrogate_pairs():
+    text = '{"a": "\\ud83d\\ude00 \\u00e9"}'
+    assert PartialJSONParser().feed(text).value == {"a": "\U0001f600 é"}
+    parser = PartialJSONParser()
+    for c in text:
+        parser.feed(c)
+    assert parser.value == {"a": "\U0001f600 é"}
+
+
+def test_parser_tolerates_malformed_unicode_escapes():
+    parser = PartialJSONParser().feed('{"a": "x\\uZZZZy", "b": 1}')
+    assert parser.value == {"a": "xy", "b": 1}
+    assert parser.complete
+
+
+def test_partial_value_unwraps_response():
+    assert partial_value(List[int], {"response": [1, 2]}) == [1, 2]
+    assert partial_value(int, {}) is None
+
+
+def test_stream_yields_progressively_more_complete_models():
+    content = '{"name": "Douglas Adams", "ideas": ["42", "towels"], "influence": 0.9}'
+    stream = TypedStream(
+        FakeStream(
+            chat_chunks(
+                *[dict(content=content[i : i + 5]) for i in range(0, len(content), 5)]
+            )
+        ),
+        partial(
+            optional_parser, parser=compile_response_type(Philosopher).deserializer
+        ),
+        {},
+        response_type=Philosopher,
+    )
+    snapshots = list(stream.iter_partial())
+    assert snapshots[0].name == "Douglas Adams"
+    assert [s.ideas for s in snapshots[1:3]] == [["42"], ["42", "towels"]]
+    assert snapshots[-1].influence == 0.9
+    assert stream.completion().parse_content() == Philosopher(
+        name="Douglas Adams", ideas=["42", "towels"], influence=0.9
+    )
+
+
+def test_stream_snapshots_are_not_mutated_by_later_chunks():
+    content = '{"a": 1, "b": 2, "c": 3}'
+    stream = TypedStream(
+        FakeStream(chat_chunks(*[dict(content=c) for c in content])),
+        partial(
+            optional_parser, parser=compile_response_type(Dict[str, int]).deserializer
+        ),
+        {},
+        response_type=Dict[str, int],
+    )
+    assert list(stream.iter_partial()) == [
+        {"a": 1},
+        {"a": 1, "b": 2},
+        {"a": 1, "b": 2, "c": 3},
+    ]
+
+
+def test_completions_stream_partials_are_typed():
+    content = '{"name": "Douglas Adams", "ideas": ["42"]}'
+    completions = FakeCompletions(
+        FakeStream(chat_chunks(dict(content=content[:30]), dict(content=content[30:])))
+    )
+    stream = TypedCompletions(completions, "gpt-4-turbo").stream(
+        [System("You are a helpful assistant"), User("Who wrote it?")],
+        response_type=Philosopher,
+    )
+    next(stream)
+    assert stream.partial() == Philosopher.model_construct(name="Douglas Adams")
+
+
+class Item(BaseModel):
+    name: str
+    size: int
+
+
+class Inventory(BaseModel):
+    items: List[Item]
+
+
+def snapshot_conversions(n: int) -> int:
+    """Values converted while iterating partial snapshots of an n item inventory."""
+    calls = []
+    convert = PartialSnapshots._convert
+
+    def counting(self, annotation, value):
+        calls.append(1)
+        return convert(self, annotation, value)
+
+    items = ", ".join(f'{{"name": "item {i}", "size": {i}}}' for i in range(n))
+    content = f'{{"items": [{items}]}}'
+    stream = TypedStream(
+        FakeStream(
+            chat_chunks(
+                *[dict(content=content[i : i + 8]) for i in range(0, len(content), 8)]
+            )
+        ),
+        partial(optional_parser, parser=compile_response_type(Inventory).deserializer),
+        {},
+        response_type=Inventory,
+    )
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(PartialSnapshots, "_convert", counting)
+        snapshots = list(stream.iter_partial())
+    assert len(snapshots[-1].items) == n
+    assert snapshots[-2].items[0] is snapshots[-1].items[0]  # closed items are shared
+    return len(calls)
+
+
+def test_snapshot_work_grows_linearly():
+    small, large = snapshot_conversions(100), snapshot_conversions(400)
+    assert large < 4.5 * small  # rebuilding whole snapshots would be ~16x
@@ -0,0 +1,94 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from typedai import TypedAI
+from typedai.client import AsyncTypedAI
+from typedai.messages import System, User
+from typedai.pool import ClientPool, PoolLimits
+
+from tests.fakes import chat_completion
+
+MESSAGES = [System("You are a helpful assistant"), User("Hi")]
+BODY = chat_completion("hello").model_dump_json().encode()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self._respond(BODY)
+
+    def do_HEAD(self):
+        time.sleep(0.05)  # keeps concurrent warm-up requests in flight together
+        self._respond(b"")
+
+    def _respond(self, body: bytes):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(
+        target=httpd.serve_forever, kwargs=dict(poll_interval=0.05), daemon=True
+    )
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/v1"
+    httpd.shutdown()
+
+
+@pytest.fixture
+def pool(monkeypatch, server):
+    pool = ClientPool(PoolLimits(max_connections=4))
+    monkeypatch.setattr("typedai.client.client_pool", pool)
+    monkeypatch.setenv("OPENAI_BASE_URL", server)
+    return pool
+
+
+def test_instances_share_keep_alive_connections(pool):
+    for _ in range(3):
+        typed_ai = TypedAI(default_model="gpt-4o")
+        typed_ai.completions.create(MESSAGES)
+    assert typed_ai.client is pool.client()
+    assert pool.stats() == dict(
+        requests=3, clients=1, connections=1, active=0, idle=1, max_connections=4
+    )
+
+
+def test_clients_are_cached_per_arguments(pool):
+    assert pool.client(api_key="a") is pool.client(api_key="a")
+    assert pool.client(api_key="a") is not pool.client(api_key="b")
+    assert pool.client(api_key="a")._client is pool.client(api_key="b")._client
+    pool.configure(PoolLimits(max_connections=8))
+    assert pool.stats()["clients"] == 0
+
+
+def test_warm_up(pool):
+    assert pool.warm_up(pool.client(), connections=2) == 2
+    stats = pool.stats()
+    assert stats["connections"] == 2 and stats["idle"] == 2
+
+
+@pytest.mark.asyncio
+async def test_async_clients_are_shared_per_loop(pool):
+    typed_ai = AsyncTypedAI(default_model="gpt-4o")
+    assert typed_ai.client is AsyncTypedAI().client
+    assert await pool.awarm_up(typed_ai.client) == 1
+    await typed_ai.completions.create(MESSAGES)
+    assert pool.stats()["requests"] == 2
+    assert pool.stats()["connections"] == 1
+
+
+def test_async_clients_outside_a_loop_are_not_shared(pool):
+    assert AsyncTypedAI().client is not AsyncTypedAI().client
+    assert pool.stats()["clients"] == 0
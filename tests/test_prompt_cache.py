@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+import pytest
+from openai import BaseModel
+from openai.types import CompletionUsage
+from typedai import TypedAI
+from typedai.completions import TypedCompletions
+from typedai.config import Config
+from typedai.messages import System, User
+
+from tests.fakes import FakeCompletions, FakeStream, chat_chunks, chat_completion
+
+
+class Answer(BaseModel):
+    value: int
+    reason: str
+
+
+def alpha(x: int) -> int:
+    return x
+
+
+def beta(y: str) -> str:
+    return y
+
+
+@pytest.fixture
+def canonical(monkeypatch):
+    monkeypatch.setattr(Config, "canonical_layout", True)
+
+
+def with_usage(completion, prompt_tokens, cached_tokens):
+    completion.usage = CompletionUsage(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=5,
+        total_tokens=prompt_tokens + 5,
+        prompt_tokens_details=dict(cached_tokens=cached_tokens),
+    )
+    return completion
+
+
+def test_canonical_layout_is_independent_of_tool_order(canonical):
+    completions = FakeCompletions(chat_completion("a"), chat_completion("b"))
+    typed = TypedCompletions(completions, "gpt-4o")
+    messages = [System("You are a helpful assistant"), User("question")]
+    typed.create(messages, fn_tools=[alpha, beta], response_type=Answer)
+    typed.create(messages, fn_tools=[beta, alpha], response_type=Answer)
+    first, second = completions.requests
+    assert first["tools"] == second["tools"]
+    assert [t["function"]["name"] for t in first["tools"]] == ["alpha", "beta"]
+
+
+def test_canonical_layout_puts_schema_first(canonical):
+    completions = FakeCompletions(chat_completion("a"), chat_completion("b"))
+    typed = TypedCompletions(completions, "gpt-4o")
+    for system in ("Today is Monday", "Today is Tuesday"):
+        typed.create([System(system), User("question")], response_type=Answer)
+    first, second = (r["messages"][0]["content"] for r in completions.requests)
+    prefix = first.split("Today")[0]
+    assert prefix.startswith("Respond in JSON") and second.startswith(prefix)
+    schema = prefix.split("SCHEMA:\n")[1].strip()
+    assert schema.index('"properties"') < schema.index('"required"')
+    assert schema.index('"reason"') < schema.index('"value"')
+
+
+def test_usage_is_aggregated_on_typed_ai():
+    completions = FakeCompletions(
+        with_usage(chat_completion("a"), 1000, 0),
+        with_usage(chat_completion("b"), 1000, 768),
+        FakeStream(chat_chunks(dict(content="c"))),
+    )
+    typed_ai = TypedAI(SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    messages = [System("You are a helpful assistant"), User("question")]
+    typed_ai.completions.create(messages, model="gpt-4o")
+    typed_ai.completions.create(messages, model="gpt-4o")
+    typed_ai.completions.stream(messages, model="gpt-4o").completion()
+    assert typed_ai.usage.stats() == dict(
+        requests=2,
+        prompt_tokens=2000,
+        cached_tokens=768,
+        completion_tokens=10,
+        cache_hit_rate=0.384,
+    )
+
+
+def test_stream_usage_chunk_is_recorded():
+    chunks = chat_chunks(dict(content="c"))
+    chunks[-1] = chunks[-1].model_copy(
+        update=dict(
+            usage=CompletionUsage(
+                prompt_tokens=100,
+                completion_tokens=1,
+                total_tokens=101,
+                prompt_tokens_details=dict(cached_tokens=50),
+            )
+        )
+    )
+    typed_ai = TypedAI(
+        SimpleNamespace(
+            chat=SimpleNamespace(completions=FakeCompletions(FakeStream(chunks)))
+        )
+    )
+    typed_ai.completions.stream(
+        [System("s"), User("u")],
+        model="gpt-4o",
+        stream_options=dict(include_usage=True),
+    ).completion()
+    assert typed_ai.usage.cache_hit_rate == 0.5
@@ -0,0 +1,82 @@
+from typing import List
+
+import httpx
+import pytest
+from openai import AsyncOpenAI, BaseModel, OpenAI
+from typedai import TypedAI
+from typedai.client import AsyncTypedAI
+from typedai.config import Config
+from typedai.messages import System, User
+
+from tests.fakes import chat_completion
+
+MESSAGES = [System("You are a helpful assistant"), User("What is 2 + 2?")]
+
+
+class Answer(BaseModel):
+    value: int
+
+
+def respond(body: dict):
+    def handle(request):
+        return httpx.Response(200, json=body)
+
+    return httpx.MockTransport(handle)
+
+
+def client(body: dict) -> OpenAI:
+    return OpenAI(
+        api_key="test",
+        base_url="http://raw.test/v1",
+        http_client=httpx.Client(transport=respond(body)),
+    )
+
+
+def test_raw_responses_match_sdk_parsing():
+    body = chat_completion('{"value": 4}').model_dump(mode="json")
+    raw = TypedAI(client(body), "gpt-4o", raw_responses=True)
+    sdk = TypedAI(client(body), "gpt-4o")
+    completion = raw.completions.create(MESSAGES, response_type=Answer)
+    expected = sdk.completions.create(MESSAGES, response_type=Answer)
+    assert completion.model_dump() == expected.model_dump()
+    assert completion.parse_content() == Answer(value=4)
+    assert raw.usage.prompt_tokens == 10
+
+
+def test_unexpected_values_fall_back_to_sdk_parsing():
+    body = chat_completion("4").model_dump(mode="json")
+    body["choices"][0]["finish_reason"] = "something_new"
+    completion = TypedAI(client(body), "gpt-4o", raw_responses=True).completions.create(
+        MESSAGES
+    )
+    assert completion.choices[0].finish_reason == "something_new"
+
+
+def test_pluggable_json_backend(monkeypatch):
+    calls = []
+
+    def loads(s):
+        calls.append(s)
+        return {"response": [1, 2]}
+
+    monkeypatch.setattr(Config, "json_loads", loads)
+    body = chat_completion('{"response": [1, 2]}').model_dump(mode="json")
+    completion = TypedAI(client(body), "gpt-4o").completions.create(
+        MESSAGES, response_type=List[int]
+    )
+    assert completion.parse_content() == [1, 2]
+    assert calls == ['{"response": [1, 2]}']
+
+
+@pytest.mark.asyncio
+async def test_async_raw_responses():
+    body = chat_completion('{"value": 4}').model_dump(mode="json")
+    async_client = AsyncOpenAI(
+        api_key="test",
+        base_url="http://raw.test/v1",
+        http_client=httpx.AsyncClient(transport=respond(body)),
+    )
+    completion = await AsyncTypedAI(
+        async_client, "gpt-4o", raw_responses=True
+    ).completions.create(MESSAGES, response_type=Answer)
+    assert completion.parse_content() == Answer(value=4)
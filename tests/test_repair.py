@@ -0,0 +1,112 @@
+from typing import List
+
+import pytest
+from openai import BaseModel
+from typedai.completions import TypedCompletions
+from typedai.config import compile_response_type
+from typedai.messages import System, User
+from typedai.repair import repair_content, repair_json
+
+from tests.fakes import FakeCompletions, chat_completion
+
+
+class Answer(BaseModel):
+    value: int
+    notes: List[str] = []
+
+
+MESSAGES = [System("You are a helpful assistant"), User("What is 2 + 2?")]
+
+
+def parse(response_type):
+    return compile_response_type(response_type).deserializer
+
+
+@pytest.mark.parametrize(
+    "content, fixes",
+    [
+        ('```json\n{"value": 4}\n```', ["code_fence"]),
+        ('Sure! {"value": 4} Hope that helps', ["leading_text", "trailing_text"]),
+        ('{"value": 4, "notes": ["a", "b",],}', ["trailing_comma", "trailing_comma"]),
+        ('{"value": 4, "notes": ["a"]', ["missing_closers"]),
+        ('{"notes": ["a"], "value": 4, "x": null', ["missing_closers"]),
+        ('{"response": {"value": 4}}', ["unwrapped_response"]),
+    ],
+)
+def test_repairs_model_content(content, fixes):
+    repaired = repair_content(content, parse(Answer))
+    assert repaired.value.value == 4
+    assert repaired.fixes == fixes
+    assert parse(Answer)(repaired.content) == repaired.value
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        '{"value": 4, "notes": ["a", "b',
+        '{"value": 4, "notes": ["a"], "no',
+        '{"value": 4, "notes": [',
+        '{"value": 4, "notes": ["a"],',
+        '{"notes": ["a"], "value": 4',  # the number may be cut short
+        '{"value": 4, "notes"',
+    ],
+)
+def test_truncation_is_only_repaired_when_asked(content):
+    assert repair_content(content, parse(Answer)) is None
+    repaired = repair_content(content, parse(Answer), truncated=True)
+    assert repaired.value.value == 4
+    assert repaired.fixes == ["truncated"]
+
+
+def test_wraps_and_renames_response_key():
+    assert repair_content("[1, 2]", parse(List[int])).fixes == ["wrapped_response"]
+    renamed = repair_content('{"resopose": [1, 2]}', parse(List[int]))
+    assert renamed.value == [1, 2]
+
+
+def test_unrepairable_content():
+    assert repair_content("I don't know", parse(Answer)) is None
+    assert repair_content('{"value": "four"}', parse(Answer)) is None
+    assert repair_json("no json here") == (None, [])
+
+
+def test_strings_are_left_alone():
+    text, fixes = repair_json('{"a": "x,}] \\" ,]", "b": [1,]}')
+    assert text == '{"a": "x,}] \\" ,]", "b": [1]}'
+    assert fixes == ["trailing_comma"]
+
+
+def test_repair_saves_a_cycle():
+    completions = FakeCompletions(chat_completion('```json\n{"value": 4,}\n```'))
+    typed = TypedCompletions(completions, "gpt-4-turbo")
+    completion = typed.create_to_completion(MESSAGES, response_type=Answer)
+    assert completion.parse_content() == Answer(value=4)
+    assert len(completions.requests) == 1
+    assert sum(c.repaired for c in completion.cycles) == 1
+    assert completion.cycles[0].repairs == ("code_fence", "trailing_comma")
+
+
+def test_truncated_content_spends_a_cycle_unless_opted_in():
+    truncated = '{"value": 4, "notes": ["a", "b'
+    completions = FakeCompletions(
+        chat_completion(truncated), chat_completion('{"value": 4}')
+    )
+    typed = TypedCompletions(completions, "gpt-4-turbo")
+    typed.create_to_completion(MESSAGES, response_type=Answer)
+    assert len(completions.requests) == 2
+
+    completions = FakeCompletions(chat_completion(truncated))
+    completion = TypedCompletions(completions, "gpt-4-turbo").create_to_completion(
+        MESSAGES, response_type=Answer, repair_truncated=True
+    )
+    assert completion.parse_content() == Answer(value=4, notes=["a", "b"])
+    assert completion.cycles[0].repairs == ("truncated",)
+
+
+def test_repair_can_be_disabled():
+    completions = FakeCompletions(
+        chat_completion('```json\n{"value": 4}\n```'), chat_completion('{"value": 4}')
+    )
+    typed = TypedCompletions(completions, "gpt-4-turbo")
+    typed.create_to_completion(MESSAGES, response_type=Answer, repair=False)
+    assert len(completions.requests) == 2
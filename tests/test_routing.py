@@ -0,0 +1,160 @@
+import gc
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+from typedai import TypedAI
+from typedai.client import AsyncTypedAI
+from typedai.messages import System, User
+from typedai.routing import EWMA, AsyncRoutedClient, Backend, RoutedClient
+
+from tests.fakes import (
+    AsyncFakeCompletions,
+    FakeCompletions,
+    FakeStream,
+    chat_chunks,
+    chat_completion,
+)
+
+MESSAGES = [System("You are a helpful assistant"), User("Hi")]
+
+
+def status_error(status: int, retry_after: str = None) -> openai.APIStatusError:
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    headers = {"retry-after": retry_after} if retry_after else {}
+    response = httpx.Response(status, request=request, headers=headers)
+    return openai.APIStatusError("failed", response=response, body=None)
+
+
+class Completions(FakeCompletions):
+    def create(self, **kwargs):
+        response = super().create(**kwargs)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class AsyncCompletions(AsyncFakeCompletions):
+    async def create(self, **kwargs):
+        response = FakeCompletions.create(self, **kwargs)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def backend(name: str, *responses, completions=Completions, **kwargs) -> Backend:
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions(*responses)))
+    return Backend(client, name, **kwargs)
+
+
+def requests(b: Backend) -> list:
+    return b.client.chat.completions.requests
+
+
+def test_fails_over_and_cools_down():
+    east = backend("east", status_error(429, "30"))
+    west = backend("west", *(chat_completion(str(i)) for i in range(3)))
+    typed_ai = TypedAI(RoutedClient([east, west]), "gpt-4o")
+    contents = [
+        typed_ai.completions.create(MESSAGES).choices[0].message.content
+        for _ in range(3)
+    ]
+    assert contents == ["0", "1", "2"]
+    # east is skipped while cooling down for its retry-after
+    assert len(requests(east)) == 1 and len(requests(west)) == 3
+    stats = typed_ai.client.stats()
+    assert stats["east"]["failures"] == 1 and not stats["east"]["healthy"]
+    assert stats["west"]["requests"] == 3 and stats["west"]["outstanding"] == 0
+
+
+def test_client_errors_are_not_failed_over():
+    east = backend("east", status_error(400))
+    west = backend("west", chat_completion("ok"))
+    with pytest.raises(openai.APIStatusError):
+        TypedAI(RoutedClient([east, west]), "gpt-4o").completions.create(MESSAGES)
+    assert requests(west) == []
+
+
+def test_raises_when_every_backend_fails():
+    client = RoutedClient(
+        [backend("a", status_error(500)), backend("b", status_error(502))]
+    )
+    with pytest.raises(openai.APIStatusError) as e:
+        TypedAI(client, "gpt-4o").completions.create(MESSAGES)
+    assert e.value.status_code == 502
+
+
+def test_least_outstanding_counts_open_streams():
+    a = backend("a", FakeStream(chat_chunks(dict(content="a"))), chat_completion("a"))
+    b = backend("b", chat_completion("b"))
+    typed_ai = TypedAI(RoutedClient([a, b]), "gpt-4o")
+    stream = typed_ai.completions.stream(MESSAGES)
+    assert typed_ai.client.stats()["a"]["outstanding"] == 1
+    assert typed_ai.completions.create(MESSAGES).choices[0].message.content == "b"
+    stream.completion()
+    assert typed_ai.client.stats()["a"]["outstanding"] == 0
+
+
+def test_dropped_streams_release_their_backend():
+    a = backend("a", FakeStream(chat_chunks(dict(content="a"), dict(content="b"))))
+    typed_ai = TypedAI(RoutedClient([a]), "gpt-4o")
+    stream = typed_ai.completions.stream(MESSAGES)
+    next(stream)
+    assert typed_ai.client.stats()["a"]["outstanding"] == 1
+    del stream
+    gc.collect()
+    assert typed_ai.client.stats()["a"]["outstanding"] == 0
+
+
+def test_streams_failing_mid_read_cool_down_their_backend():
+    def drop(chunk):
+        raise httpx.RemoteProtocolError("peer closed connection")
+
+    a = backend("a", FakeStream(chat_chunks(dict(content="a")), on_next=drop))
+    b = backend("b", chat_completion("b"))
+    typed_ai = TypedAI(RoutedClient([a, b]), "gpt-4o")
+    stream = typed_ai.completions.stream(MESSAGES)
+    with pytest.raises(httpx.RemoteProtocolError):
+        stream.completion()
+    stats = typed_ai.client.stats()["a"]
+    assert stats["failures"] == 1 and not stats["healthy"]
+    assert stats["outstanding"] == 0
+    assert typed_ai.completions.create(MESSAGES).choices[0].message.content == "b"
+
+
+def test_ewma_prefers_the_faster_backend():
+    slow = backend("slow", *(chat_completion("slow") for _ in range(3)))
+    fast = backend("fast", *(chat_completion("fast") for _ in range(3)))
+    client = RoutedClient([slow, fast], strategy=EWMA)
+    slow.latency, fast.latency = 2.0, 0.5
+    typed_ai = TypedAI(client, "gpt-4o")
+    for _ in range(3):
+        typed_ai.completions.create(MESSAGES)
+    assert len(requests(fast)) == 3 and requests(slow) == []
+
+
+def test_model_map_and_shared_endpoints():
+    azure = backend("azure", chat_completion("ok"), model_map={"gpt-4o": "prod-4o"})
+    azure.client.files = "files endpoint"
+    client = RoutedClient([azure])
+    TypedAI(client, "gpt-4o").completions.create(MESSAGES)
+    assert requests(azure)[0]["model"] == "prod-4o"
+    assert client.files == "files endpoint"
+
+
+def test_backends_disable_sdk_retries():
+    client = openai.OpenAI(api_key="key", max_retries=5)
+    b = Backend(client)
+    assert b.client.max_retries == 0
+    assert b.client.api_key == "key" and b.name == str(client.base_url)
+
+
+@pytest.mark.asyncio
+async def test_async_fails_over():
+    east = backend("east", status_error(500), completions=AsyncCompletions)
+    west = backend("west", chat_completion("ok"), completions=AsyncCompletions)
+    typed_ai = AsyncTypedAI(AsyncRoutedClient([east, west]), "gpt-4o")
+    completion = await typed_ai.completions.create(MESSAGES)
+    assert completion.choices[0].message.content == "ok"
+    assert typed_ai.client.stats()["east"]["failures"] == 1
@@ -0,0 +1,63 @@
+from functools import partial
+
+from typedai.models import TypedStream
+from typedai.util import optional_parser, transform_tools
+
+from tests.fakes import FakeStream, chat_chunks
+
+
+def add(a: int, b: int) -> int:
+    return a + b
+
+
+def typed_stream(chunks, keep_chunks=True, tools=()):
+    return TypedStream(
+        FakeStream(chunks),
+        partial(optional_parser, parser=lambda x: x),
+        transform_tools(tools),
+        keep_chunks,
+    )
+
+
+def test_bounded_memory_mode_keeps_no_chunks():
+    stream = typed_stream(
+        chat_chunks(*[dict(content=c) for c in "hello world"]), keep_chunks=False
+    )
+    completion = stream.completion()
+    assert stream._seen is None
+    assert completion.choices[0].message.content == "hello world"
+    assert completion.choices[0].finish_reason == "stop"
+
+
+def test_completion_can_be_read_repeatedly_mid_stream():
+    stream = typed_stream(
+        chat_chunks(*[dict(content=c) for c in "abcdef"]), keep_chunks=False
+    )
+    seen = ""
+    for chunk in stream:
+        seen += chunk.choices[0].delta.content or ""
+        partial_completion = stream.completion(allow_partial_iteration=True)
+        assert partial_completion.choices[0].message.content == (seen or None)
+    assert stream.completion().choices[0].message.content == "abcdef"
+
+
+def test_accumulates_tool_calls_and_choices_by_index():
+    stream = typed_stream(
+        chat_chunks(
+            dict(
+                tool_calls=[
+                    dict(index=0, id="call_0", function=dict(name="add", arguments=""))
+                ]
+            ),
+            dict(content="second choice", index=1),
+            dict(tool_calls=[dict(index=0, function=dict(arguments='{"a": 2, '))]),
+            dict(tool_calls=[dict(index=0, function=dict(arguments='"b": 2}'))]),
+        ),
+        tools=[add],
+    )
+    completion = stream.completion()
+    assert completion.choices[1].message.content == "second choice"
+    tool_call = completion.choices[0].message.tool_calls[0]
+    assert tool_call.id == "call_0"
+    assert tool_call.function.arguments == '{"a": 2, "b": 2}'
+    assert completion.build_tool_completions()[0]["content"] == "4"
@@ -0,0 +1,88 @@
+from typing import Dict, List, Optional
+
+from openai import BaseModel
+from pydantic import Field, TypeAdapter
+from typedai.completions import TypedCompletions
+from typedai.messages import System, User
+from typedai.strict import strict_schema
+
+from tests.fakes import FakeCompletions, chat_completion
+
+
+class Step(BaseModel):
+    """One step of the plan."""
+
+    action: str = Field(description="what to do")
+
+
+class Plan(BaseModel):
+    steps: List[Step]
+    first: Step = Field(description="the first step")
+    note: Optional[str] = None
+
+
+class Counts(BaseModel):
+    counts: Dict[str, int]
+
+
+class Defaults(BaseModel):
+    limit: int = 10
+
+
+def lookup(key: str, limit: int) -> str:
+    return key
+
+
+MESSAGES = [System("You are a planner"), User("Plan my day")]
+
+
+def test_strict_schema_conversion():
+    schema = strict_schema(TypeAdapter(Plan).json_schema())
+    assert schema["additionalProperties"] is False
+    assert schema["required"] == ["steps", "first", "note"]
+    assert schema["properties"]["first"] == {"$ref": "#/$defs/Step"}
+    assert "default" not in schema["properties"]["note"]
+    step = schema["$defs"]["Step"]
+    assert step["additionalProperties"] is False and step["required"] == ["action"]
+
+
+def test_incompatible_schemas():
+    assert strict_schema(TypeAdapter(Counts).json_schema()) is None
+    assert strict_schema(TypeAdapter(Defaults).json_schema()) is None
+
+
+def test_strict_mode_uses_json_schema_response_format():
+    completions = FakeCompletions(
+        chat_completion('{"steps": [], "first": {"action": "wake"}, "note": null}')
+    )
+    typed = TypedCompletions(completions, "gpt-4o", strict=True)
+    completion = typed.create(MESSAGES, response_type=Plan, fn_tools=lookup)
+    assert completion.parse_content() == Plan(steps=[], first=Step(action="wake"))
+    request = completions.requests[0]
+    response_format = request["response_format"]
+    assert response_format["type"] == "json_schema"
+    assert response_format["json_schema"]["name"] == "Plan"
+    assert response_format["json_schema"]["strict"] is True
+    assert request["messages"][0]["content"] == "You are a planner"
+    function = request["tools"][0]["function"]
+    assert function["strict"] is True
+    assert function["parameters"]["additionalProperties"] is False
+
+
+def test_strict_mode_wraps_non_object_types():
+    completions = FakeCompletions(chat_completion('{"response": [1, 2]}'))
+    typed = TypedCompletions(completions, "gpt-4o", strict=True)
+    assert typed.create(MESSAGES, response_type=List[int]).parse_content() == [1, 2]
+    schema = completions.requests[0]["response_format"]["json_schema"]["schema"]
+    assert schema["required"] == ["response"]
+
+
+def test_incompatible_types_fall_back_to_prompt():
+    completions = FakeCompletions(chat_completion('{"counts": {"a": 1}}'))
+    typed = TypedCompletions(completions, "gpt-4o", strict=True)
+    assert typed.create(MESSAGES, response_type=Counts).parse_content() == Counts(
+        counts={"a": 1}
+    )
+    request = completions.requests[0]
+    assert request["response_format"] == {"type": "json_object"}
+    assert "JSON SCHEMA" in request["messages"][0]["content"]
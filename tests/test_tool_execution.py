@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from typedai.errors import ToolArgumentParsingError
+from typedai.models import (
+    ALWAYS_RAISE,
+    CONCURRENT,
+    HANDLE_ANY_ERROR,
+    TypedChatCompletion,
+)
+from typedai.util import transform_tools
+
+
+def tool_call_completion(*tool_calls, tools=()) -> TypedChatCompletion:
+    completion = TypedChatCompletion.model_validate(
+        dict(
+            id="chatcmpl-test",
+            object="chat.completion",
+            created=0,
+            model="gpt-4-turbo",
+            choices=[
+                dict(
+                    index=0,
+                    finish_reason="tool_calls",
+                    message=dict(
+                        role="assistant",
+                        content=None,
+                        tool_calls=[
+                            dict(
+                                id=f"call_{i}",
+                                type="function",
+                                function=dict(name=name, arguments=arguments),
+                            )
+                            for i, (name, arguments) in enumerate(tool_calls)
+                        ],
+                    ),
+                )
+            ],
+        )
+    )
+    completion._functions = transform_tools(tools)
+    return completion
+
+
+def slow_echo(value: int) -> int:
+    time.sleep(0.2)
+    return value
+
+
+async def async_slow_echo(value: int) -> int:
+    await asyncio.sleep(0.2)
+    return value
+
+
+def fails(value: int) -> int:
+    raise ValueError("Bad At Math")
+
+
+def test_concurrent_execution_preserves_order():
+    barrier = threading.Barrier(3, timeout=2)
+
+    def wait_for_all(value: int) -> int:
+        barrier.wait()  # only passes if all three calls are in flight together
+        return value
+
+    completion = tool_call_completion(
+        *[("wait_for_all", f'{{"value": {i}}}') for i in range(3)],
+        tools=[wait_for_all],
+    )
+    messages = completion.build_tool_completions(tool_execution=CONCURRENT)
+    assert [m["content"] for m in messages] == ["0", "1", "2"]
+    assert [m["tool_call_id"] for m in messages] == ["call_0", "call_1", "call_2"]
+
+
+def test_concurrent_execution_handles_errors_per_call():
+    completion = tool_call_completion(
+        ("slow_echo", '{"value": 1}'),
+        ("fails", '{"value": 2}'),
+        ("slow_echo", "bad json"),
+        tools=[slow_echo, fails],
+    )
+    messages = completion.build_tool_completions(
+        tool_error_handling=HANDLE_ANY_ERROR, tool_execution=CONCURRENT
+    )
+    assert messages[0]["content"] == "1"
+    assert (
+        messages[1]["content"] == "Error during tool execution\nValueError: Bad At Math"
+    )
+    assert "Error parsing arguments" in messages[2]["content"]
+
+
+def test_concurrent_execution_raises_with_always_raise():
+    completion = tool_call_completion(
+        ("slow_echo", '{"value": 1}'),
+        ("slow_echo", "bad json"),
+        tools=[slow_echo],
+    )
+    with pytest.raises(ToolArgumentParsingError):
+        completion.build_tool_completions(
+            tool_error_handling=ALWAYS_RAISE, tool_execution=CONCURRENT
+        )
+
+
+@pytest.mark.asyncio
+async def test_async_concurrent_execution_overlaps_sync_and_async_tools():
+    completion = tool_call_completion(
+        *[("slow_echo", f'{{"value": {i}}}') for i in range(3)],
+        *[("async_slow_echo", f'{{"value": {i}}}') for i in range(3, 6)],
+        tools=[slow_echo, async_slow_echo],
+    )
+    start = time.perf_counter()
+    messages = await completion.abuild_tool_completions(tool_execution=CONCURRENT)
+    assert time.perf_counter() - start < 0.6
+    assert [m["content"] for m in messages] == [str(i) for i in range(6)]
@@ -0,0 +1,69 @@
+import gc
+
+from typedai import ToolSet
+from typedai.completions import TypedCompletions
+from typedai.messages import System, User
+from typedai.util import ToolRegistry, transform_tools
+
+from tests.fakes import FakeCompletions, chat_completion
+
+
+def add(a: int, b: int) -> int:
+    """Adds two numbers"""
+    return a + b
+
+
+class Calculator:
+    def multiply(self, a: int, b: int) -> int:
+        return a * b
+
+
+def test_registry_compiles_once():
+    registry = ToolRegistry()
+    first = registry.compile(add)
+    second = registry.compile(add)
+    assert first == second
+    assert (registry.hits, registry.misses) == (1, 1)
+    assert first[2]["description"] == "Adds two numbers"
+
+
+def test_registry_does_not_keep_closures_alive():
+    registry = ToolRegistry()
+
+    def make_tool():
+        def lookup(key: str) -> str:
+            return key
+
+        return lookup
+
+    tool = make_tool()
+    registry.compile(tool)
+    assert len(registry) == 1
+    del tool
+    gc.collect()
+    assert len(registry) == 0
+
+
+def test_registry_shares_bound_methods_without_holding_instances():
+    registry = ToolRegistry()
+    calculator = Calculator()
+    fn, model, _ = registry.compile(calculator.multiply)
+    registry.compile(Calculator().multiply)
+    assert registry.hits == 1
+    assert fn(**dict(model(a=2, b=3))) == 6
+    del calculator, fn
+    gc.collect()
+    assert len(registry) == 1  # keyed on Calculator.multiply, not the instance
+
+
+def test_tool_set_can_be_passed_as_fn_tools():
+    tools = ToolSet([add, Calculator().multiply])
+    assert transform_tools(tools) is tools.functions
+
+    completions = FakeCompletions(chat_completion("6"))
+    TypedCompletions(completions, "gpt-4-turbo").create(
+        [System("You are a helpful assistant"), User("What is 2 * 3?")],
+        fn_tools=tools,
+    )
+    sent = completions.requests[0]["tools"]
+    assert [t["function"]["name"] for t in sent] == ["add", "multiply"]
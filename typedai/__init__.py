@@ -1,5 +1,7 @@
-from .client import TypedAI as TypedAI
+from .client import TypedAI as TypedAI, AsyncTypedAI as AsyncTypedAI
 from .models import (
     TypedChatCompletion as TypedChatCompletion,
     TypedStream as TypedStream,
+    AsyncTypedStream as AsyncTypedStream,
 )
+from .util import ToolSet as ToolSet
@@ -0,0 +1,176 @@
+import json
+import tempfile
+import time
+from typing import Callable, Dict, Iterable, Iterator, NamedTuple, Optional, Type
+
+from openai import OpenAI
+from openai.types import Batch
+from openai.types.chat import ChatCompletion
+
+from typedai.errors import BatchRequestError
+from typedai.models import TypedChatCompletion
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+# input files are buffered in memory up to this size before spilling to disk
+_SPOOL_SIZE = 8 * 1024 * 1024
+
+
+class BatchRequest(NamedTuple):
+    """One typed request of a batch, built with `TypedCompletions.batch_request`."""
+
+    custom_id: str
+    body: dict
+    response_type: Type
+    parser: Callable[[str], object]
+    functions: dict
+
+    def to_jsonl(self) -> str:
+        return json.dumps(
+            dict(
+                custom_id=self.custom_id,
+                method="POST",
+                url=BATCH_ENDPOINT,
+                body=self.body,
+            ),
+            default=str,
+        )
+
+
+class BatchResult(NamedTuple):
+    """One line of a batch output (or error) file, `completion` is None when the request failed."""
+
+    custom_id: str
+    completion: Optional[TypedChatCompletion]
+    error: Optional[BatchRequestError]
+
+
+class TypedBatch:
+    """A submitted batch along with what is needed to type its results."""
+
+    client: OpenAI
+    batch: Batch
+
+    def __init__(self, client: OpenAI, batch: Batch, requests: Dict[str, BatchRequest]):
+        self.client = client
+        self.batch = batch
+        self._requests = requests
+
+    @property
+    def id(self) -> str:
+        return self.batch.id
+
+    @property
+    def done(self) -> bool:
+        return self.batch.status in TERMINAL_STATUSES
+
+    def refresh(self) -> Batch:
+        self.batch = self.client.batches.retrieve(self.id)
+        return self.batch
+
+    def wait(
+        self, poll_interval: float = 30.0, timeout: Optional[float] = None
+    ) -> Batch:
+        """Polls until the batch reaches a terminal status, raising TimeoutError after `timeout` seconds."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.refresh().status not in TERMINAL_STATUSES:
+            if deadline is not None and time.monotonic() + poll_interval > deadline:
+                raise TimeoutError(
+                    f"Batch {self.id} still {self.batch.status} after {timeout}s"
+                )
+            time.sleep(poll_interval)
+        return self.batch
+
+    def cancel(self) -> Batch:
+        self.batch = self.client.batches.cancel(self.id)
+        return self.batch
+
+    def results(self) -> Iterator[BatchResult]:
+        """
+        Streams the output file and then the error file, yielding one typed result per line.
+
+        Lines are parsed as they are downloaded so memory stays flat for large batches. Results come in the order
+        openai wrote them, use `custom_id` to match them up with the requests.
+        """
+        for file_id in (self.batch.output_file_id, self.batch.error_file_id):
+            if not file_id:
+                continue
+            with self.client.files.with_streaming_response.content(file_id) as response:
+                for line in response.iter_lines():
+                    if line.strip():
+                        yield self._result(json.loads(line))
+
+    def _result(self, line: dict) -> BatchResult:
+        custom_id = line.get("custom_id")
+        response = line.get("response") or {}
+        error = line.get("error")
+        if error or response.get("status_code") != 200:
+            body = response.get("body") or {}
+            error = error or body.get("error") or {}
+            return BatchResult(
+                custom_id,
+                None,
+                BatchRequestError(
+                    custom_id,
+                    error.get("code"),
+                    error.get("message"),
+                    response.get("status_code"),
+                ),
+            )
+        request = self._requests.get(custom_id)
+        if request is None:
+            raise KeyError(f"Unknown custom_id {custom_id!r} in batch {self.id}")
+        completion = ChatCompletion.model_validate(response["body"])
+        return BatchResult(
+            custom_id,
+            TypedChatCompletion[Optional[request.response_type]].from_completion(
+                completion, request.parser, request.functions
+            ),
+            None,
+        )
+
+
+class TypedBatches:
+    """Submits typed requests through the openai Batch API, see `TypedAI.batches`."""
+
+    client: OpenAI
+
+    def __init__(self, client: OpenAI):
+        self.client = client
+
+    def create(
+        self,
+        requests: Iterable[BatchRequest],
+        completion_window: str = "24h",
+        metadata: Optional[Dict[str, str]] = None,
+    ) -> TypedBatch:
+        """Writes the requests to a JSONL file, uploads it and starts the batch."""
+        registered: Dict[str, BatchRequest] = {}
+        with tempfile.SpooledTemporaryFile(max_size=_SPOOL_SIZE) as f:
+            for request in requests:
+                if request.custom_id in registered:
+                    raise ValueError(f"Duplicate custom_id {request.custom_id!r}")
+                f.write(request.to_jsonl().encode())
+                f.write(b"\n")
+                registered[request.custom_id] = request._replace(body=None)
+            if not registered:
+                raise ValueError("A batch needs at least one request")
+            f.seek(0)
+            file = self.client.files.create(file=("batch.jsonl", f), purpose="batch")
+        kwargs = dict(metadata=metadata) if metadata is not None else {}
+        batch = self.client.batches.create(
+            input_file_id=file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=completion_window,
+            **kwargs,
+        )
+        return TypedBatch(self.client, batch, registered)
+
+    def retrieve(self, batch_id: str, requests: Iterable[BatchRequest]) -> TypedBatch:
+        """Reattaches to a previously submitted batch, `requests` are rebuilt the same way they were submitted."""
+        return TypedBatch(
+            self.client,
+            self.client.batches.retrieve(batch_id),
+            {r.custom_id: r._replace(body=None) for r in requests},
+        )
@@ -0,0 +1,283 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from typedai.models import _BaseTypedStream
+
+# request options that do not change the response
+_IGNORED_ARGS = {"stream", "stream_options", "timeout", "extra_headers"}
+
+
+def request_key(chat_args: dict) -> str:
+    """Canonical hash of the final chat args sent to openai."""
+    canonical = {k: v for k, v in chat_args.items() if k not in _IGNORED_ARGS}
+    dumped = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(dumped.encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    Stores serialized ChatCompletions keyed by `request_key`.
+
+    Subclasses implement `_get` and `_set`. Entries older than `ttl` seconds are treated as missing.
+    """
+
+    ttl: Optional[float]
+    hits: int
+    misses: int
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[ChatCompletion]:
+        value = self._get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return ChatCompletion.model_validate_json(value)
+
+    def set(self, key: str, completion: ChatCompletion):
+        self._set(key, completion.model_dump_json())
+
+    def stats(self) -> Dict[str, int]:
+        return dict(hits=self.hits, misses=self.misses)
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def _get(self, key: str) -> Optional[str]:
+        raise NotImplementedError()
+
+    def _set(self, key: str, value: str):
+        raise NotImplementedError()
+
+
+class MemoryResponseCache(ResponseCache):
+    """In memory LRU response cache."""
+
+    maxsize: int
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        super().__init__(ttl)
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            created, value = entry
+            if self._expired(created):
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def _set(self, key: str, value: str):
+        with self._lock:
+            self._data[key] = (time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+class SQLiteResponseCache(ResponseCache):
+    """Persistent response cache in a SQLite file, evicting the least recently used entries past `max_entries`."""
+
+    path: str
+    max_entries: Optional[int]
+
+    def __init__(
+        self,
+        path: str,
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = 100_000,
+    ):
+        super().__init__(ttl)
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)"
+            )
+            # kept in step with inserts and deletes so eviction only runs once the table is over the limit
+            (self._count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM responses"
+            ).fetchone()
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if self._expired(created):
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._count -= 1
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key)
+            )
+            return value
+
+    def _set(self, key: str, value: str):
+        now = time.time()
+        with self._lock, self._conn:
+            exists = self._conn.execute(
+                "SELECT 1 FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            if exists is None:
+                self._count += 1
+            if self.max_entries is not None and self._count > self.max_entries:
+                # walks the accessed index from the oldest end, only touching the rows being evicted
+                evicted = self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY accessed LIMIT ?)",
+                    (self._count - self.max_entries,),
+                ).rowcount
+                self._count -= evicted
+
+    def close(self):
+        self._conn.close()
+
+
+def completion_to_chunks(completion: ChatCompletion) -> List[ChatCompletionChunk]:
+    """Replays a completion as a chunk stream: one chunk per choice, then a chunk with the finish reasons."""
+    base = dict(
+        id=completion.id,
+        object="chat.completion.chunk",
+        created=completion.created,
+        model=completion.model,
+        system_fingerprint=completion.system_fingerprint,
+    )
+    chunks = []
+    for choice in completion.choices:
+        delta = dict(role="assistant", content=choice.message.content)
+        if choice.message.tool_calls:
+            delta["tool_calls"] = [
+                dict(index=i, **tc.model_dump())
+                for i, tc in enumerate(choice.message.tool_calls)
+            ]
+        chunks.append(dict(base, choices=[dict(index=choice.index, delta=delta)]))
+    final = [
+        dict(index=choice.index, delta={}, finish_reason=choice.finish_reason)
+        for choice in completion.choices
+    ]
+    usage = completion.usage.model_dump() if completion.usage else None
+    chunks.append(dict(base, choices=final, usage=usage))
+    return [ChatCompletionChunk.model_validate(c) for c in chunks]
+
+
+class ReplayStream:
+    """Stands in for openai's Stream when a streamed request is served from the cache."""
+
+    def __init__(self, chunks: List[ChatCompletionChunk]):
+        self._chunks = iter(chunks)
+
+    def __next__(self) -> ChatCompletionChunk:
+        return next(self._chunks)
+
+    def __iter__(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
+
+    def close(self):
+        pass
+
+
+class AsyncReplayStream(ReplayStream):
+    async def __anext__(self) -> ChatCompletionChunk:
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    def __aiter__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args, **kwargs):
+        pass
+
+
+class RecordingStream:
+    """Passes an openai Stream through, handing the assembled completion to `on_complete` once fully consumed."""
+
+    def __init__(self, stream, on_complete: Callable[[ChatCompletion], None]):
+        self.stream = stream
+        self._on_complete = on_complete
+        self._acc = _BaseTypedStream(None, {}, keep_chunks=False)
+
+    def __next__(self) -> ChatCompletionChunk:
+        try:
+            return self._acc._record(self.stream.__next__())
+        except StopIteration:
+            self._complete()
+            raise
+
+    def __iter__(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.stream.__exit__(*args, **kwargs)
+
+    def close(self):
+        self.stream.close()
+
+    def _complete(self):
+        if self._acc._last is not None:
+            self._on_complete(self._acc._build_completion())
+
+
+class AsyncRecordingStream(RecordingStream):
+    async def __anext__(self) -> ChatCompletionChunk:
+        try:
+            return self._acc._record(await self.stream.__anext__())
+        except StopAsyncIteration:
+            self._complete()
+            raise
+
+    def __aiter__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args, **kwargs):
+        await self.stream.__aexit__(*args, **kwargs)
+
+    async def close(self):
+        await self.stream.close()
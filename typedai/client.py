@@ -1,33 +1,110 @@
 from typing import Optional
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
-from .completions import TypedCompletions
+from .batch import TypedBatches
+from .cache import ResponseCache
+from .completions import AsyncTypedCompletions, TypedCompletions
+from .hedging import HedgingPolicy
+from .pool import client_pool
+from .usage import UsageStats
 
 
 class TypedAI:
     client: OpenAI
     default_model: Optional[str]
+    cache: Optional[ResponseCache]
+    hedging: Optional[HedgingPolicy]
+    strict: bool
+    raw_responses: bool
+    usage: UsageStats
 
-    def __init__(self, client: OpenAI = None, default_model: Optional[str] = None):
+    def __init__(
+        self,
+        client: OpenAI = None,
+        default_model: Optional[str] = None,
+        cache: Optional[ResponseCache] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        strict: bool = False,
+        raw_responses: bool = False,
+    ):
+        """
+        :param cache: Opt in response cache (MemoryResponseCache, SQLiteResponseCache), exact repeats of a request are
+            served from it instead of calling openai.
+        :param hedging: Opt in HedgingPolicy, slow requests are duplicated and failed ones retried with backoff.
+        :param strict: Use strict structured outputs (a `json_schema` response_format and strict tool parameters)
+            instead of describing the schema in the system prompt. Response types without a strict equivalent (dicts,
+            non None defaults) fall back to the prompt.
+        :param raw_responses: Validate non streamed response bodies straight from the raw bytes in a single pass,
+            rather than through the sdk's json decoding and model construction.
+
+        Token usage of every request, including provider prompt cache hits, is aggregated in `usage`. Without a
+        client the process wide `client_pool` is used, so instances share keep-alive connections.
+        """
         if client is None:
-            client = OpenAI()
+            client = client_pool.client()
         self.client = client
         self.default_model = default_model
+        self.cache = cache
+        self.hedging = hedging
+        self.strict = strict
+        self.raw_responses = raw_responses
+        self.usage = UsageStats()
 
     @property
     def completions(self, default_model: Optional[str] = None) -> TypedCompletions:
         return TypedCompletions(
-            self.client.chat.completions, default_model or self.default_model
+            self.client.chat.completions,
+            default_model or self.default_model,
+            self.cache,
+            self.hedging,
+            self.strict,
+            self.usage,
+            self.raw_responses,
         )
 
+    @property
+    def batches(self) -> TypedBatches:
+        return TypedBatches(self.client)
+
 
-# class AsyncTypedAI:
-#     _client: AsyncOpenAI
-#
-#     def __init__(self, *args, **kwargs):
-#         self._client = AsyncOpenAI(*args, **kwargs)
-#
-#     @property
-#     def completions(self) -> AsyncTypedCompletions:
-#         return AsyncTypedCompletions(self._client.completions)
+class AsyncTypedAI:
+    client: AsyncOpenAI
+    default_model: Optional[str]
+    cache: Optional[ResponseCache]
+    hedging: Optional[HedgingPolicy]
+    strict: bool
+    raw_responses: bool
+    usage: UsageStats
+
+    def __init__(
+        self,
+        client: AsyncOpenAI = None,
+        default_model: Optional[str] = None,
+        cache: Optional[ResponseCache] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        strict: bool = False,
+        raw_responses: bool = False,
+    ):
+        """See TypedAI."""
+        if client is None:
+            client = client_pool.async_client()
+        self.client = client
+        self.default_model = default_model
+        self.cache = cache
+        self.hedging = hedging
+        self.strict = strict
+        self.raw_responses = raw_responses
+        self.usage = UsageStats()
+
+    @property
+    def completions(self) -> AsyncTypedCompletions:
+        return AsyncTypedCompletions(
+            self.client.chat.completions,
+            self.default_model,
+            self.cache,
+            self.hedging,
+            self.strict,
+            self.usage,
+            self.raw_responses,
+        )
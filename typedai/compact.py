@@ -0,0 +1,169 @@
+import json
+from typing import Dict, NamedTuple, Optional, Set, Type
+from weakref import WeakKeyDictionary
+
+from pydantic import BaseModel
+
+from typedai.memory import estimate_text_tokens
+
+_REF_PREFIX = "#/$defs/"
+# keywords whose value maps names to schemas (rather than being a schema itself)
+_SCHEMA_MAPS = ("properties", "$defs", "definitions", "patternProperties")
+_SCHEMA_LISTS = ("anyOf", "allOf", "oneOf", "prefixItems")
+_SCHEMA_VALUES = ("items", "additionalProperties", "not", "contains")
+
+
+class CompactionReport(NamedTuple):
+    original_tokens: int
+    compacted_tokens: int
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.original_tokens - self.compacted_tokens
+
+
+class SchemaCompactor(NamedTuple):
+    """
+    Shrinks json schemas before they are sent to the model, set `Config.schema_compactor` to enable.
+
+    Titles (redundant with property and model names) and `additionalProperties: true` are removed, `$defs` used once
+    are inlined (definitions used more than once or recursively stay shared), and the schema is serialized without
+    whitespace. With `max_description_length` longer descriptions are cut at a word boundary.
+    """
+
+    strip_titles: bool = True
+    inline_refs: bool = True
+    max_description_length: Optional[int] = None
+    minify: bool = True
+
+    def compact(self, schema: dict) -> dict:
+        defs = schema.get("$defs", {})
+        inline: Set[str] = set()
+        if self.inline_refs and defs:
+            counts = _ref_counts(schema)
+            recursive = _recursive_defs(defs)
+            inline = {n for n in defs if counts.get(n, 0) <= 1 and n not in recursive}
+        compacted = self._schema(schema, defs, inline)
+        if "$defs" in compacted:
+            kept = {k: v for k, v in compacted["$defs"].items() if k not in inline}
+            if kept:
+                compacted["$defs"] = kept
+            else:
+                del compacted["$defs"]
+        return compacted
+
+    def compact_function(self, function_definition: dict) -> dict:
+        compacted = dict(
+            function_definition,
+            parameters=self.compact(function_definition["parameters"]),
+        )
+        description = compacted.get("description")
+        if description and self.max_description_length is not None:
+            compacted["description"] = _trim(description, self.max_description_length)
+        return compacted
+
+    def dumps(self, schema: dict, **json_dump_args) -> str:
+        if self.minify:
+            json_dump_args = dict(json_dump_args, separators=(",", ":"), indent=None)
+        return json.dumps(schema, **json_dump_args)
+
+    def report(self, schema: dict, **json_dump_args) -> CompactionReport:
+        """Estimated prompt tokens of the schema as sent without and with compaction."""
+        return CompactionReport(
+            estimate_text_tokens(json.dumps(schema, **json_dump_args)),
+            estimate_text_tokens(self.dumps(self.compact(schema), **json_dump_args)),
+        )
+
+    def report_function(
+        self, function_definition: dict, **json_dump_args
+    ) -> CompactionReport:
+        compacted = self.compact_function(function_definition)
+        return CompactionReport(
+            estimate_text_tokens(json.dumps(function_definition, **json_dump_args)),
+            estimate_text_tokens(self.dumps(compacted, **json_dump_args)),
+        )
+
+    def _schema(self, node, defs: dict, inline: Set[str]):
+        if not isinstance(node, dict):
+            return node
+        ref = node.get("$ref", "")
+        if ref.startswith(_REF_PREFIX) and ref[len(_REF_PREFIX) :] in inline:
+            siblings = {k: v for k, v in node.items() if k != "$ref"}
+            target = defs[ref[len(_REF_PREFIX) :]]
+            node = {**target, **siblings}  # siblings such as a field description win
+        result = {}
+        for key, value in node.items():
+            if key == "title" and self.strip_titles and isinstance(value, str):
+                continue
+            if key == "additionalProperties" and value is True:
+                continue
+            if key == "description" and self.max_description_length is not None:
+                value = _trim(value, self.max_description_length)
+            elif key in _SCHEMA_MAPS and isinstance(value, dict):
+                value = {k: self._schema(v, defs, inline) for k, v in value.items()}
+            elif key in _SCHEMA_LISTS and isinstance(value, list):
+                value = [self._schema(v, defs, inline) for v in value]
+            elif key in _SCHEMA_VALUES:
+                value = self._schema(value, defs, inline)
+            result[key] = value
+        return result
+
+
+# compacted function definitions, keyed weakly on the tool's parameter model and then on the compactor
+_compacted_functions: WeakKeyDictionary = WeakKeyDictionary()
+
+
+def compacted_function(
+    param_model: Type[BaseModel], function_definition: dict, compactor: SchemaCompactor
+) -> dict:
+    per_compactor = _compacted_functions.setdefault(param_model, {})
+    compacted = per_compactor.get(compactor)
+    if compacted is None:
+        compacted = compactor.compact_function(function_definition)
+        per_compactor[compactor] = compacted
+    return compacted
+
+
+def _trim(description: str, limit: int) -> str:
+    if len(description) <= limit:
+        return description
+    cut = description[:limit].rsplit(" ", 1)[0]
+    return cut.rstrip(" ,.;:") + "..."
+
+
+def _refs(node, found: list):
+    if isinstance(node, dict):
+        ref = node.get("$ref")
+        if isinstance(ref, str) and ref.startswith(_REF_PREFIX):
+            found.append(ref[len(_REF_PREFIX) :])
+        for value in node.values():
+            _refs(value, found)
+    elif isinstance(node, list):
+        for value in node:
+            _refs(value, found)
+    return found
+
+
+def _ref_counts(schema: dict) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for name in _refs(schema, []):
+        counts[name] = counts.get(name, 0) + 1
+    return counts
+
+
+def _recursive_defs(defs: dict) -> Set[str]:
+    """Definitions that (directly or indirectly) reference themselves."""
+    edges = {name: set(_refs(body, [])) for name, body in defs.items()}
+    recursive = set()
+    for start in defs:
+        stack, seen = list(edges[start]), set()
+        while stack:
+            name = stack.pop()
+            if name == start:
+                recursive.add(start)
+                break
+            if name in seen or name not in edges:
+                continue
+            seen.add(name)
+            stack.extend(edges[name])
+    return recursive
@@ -1,10 +1,32 @@
+import asyncio
+from concurrent.futures import (
+    Executor,
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
 from functools import partial
-from typing import Iterable, Union, Callable, TypeVar, Type, Optional
+from time import perf_counter
+from typing import (
+    Iterable,
+    Union,
+    Callable,
+    TypeVar,
+    Type,
+    Optional,
+    List,
+    Iterator,
+    AsyncIterable,
+    AsyncIterator,
+    NamedTuple,
+)
 
-from typedai.config import Config
+from typedai.config import Config, compile_response_type
 
-from openai import Stream
-from openai.resources.chat import Completions
+from openai import AsyncStream, Stream
+from openai.resources.chat import AsyncCompletions, Completions
+from pydantic import ValidationError
 from openai.types import ChatModel
 from openai.types.chat import (
     ChatCompletion,
@@ -13,19 +35,153 @@ from openai.types.chat import (
 )
 from typedai.errors import ContentParsingError, CycleLimitExceeded
 
-from .models import TypedChatCompletion, TypedStream, HANDLE_ANY_ERROR
-from .util import transform_tools, optional_parser, require_parser
+from .batch import BatchRequest
+from .cache import (
+    AsyncRecordingStream,
+    AsyncReplayStream,
+    RecordingStream,
+    ReplayStream,
+    ResponseCache,
+    completion_to_chunks,
+    request_key,
+)
+from .hedging import HedgingPolicy
+from .instrumentation import emit, hooks
+from .memory import CycleStats, MemoryPolicy
+from .repair import repair_content
+from .strict import schema_name, strict_function
+from .usage import AsyncUsageStream, UsageStats, UsageStream
+from .models import (
+    TypedChatCompletion,
+    TypedStream,
+    AsyncTypedStream,
+    HANDLE_ANY_ERROR,
+    SEQUENTIAL,
+    ToolExecution,
+)
+from .util import ToolSet, transform_tools, optional_parser, require_parser
 
 T = TypeVar("T")
 
 
-class TypedCompletions:
-    _completions: Completions
+class ManyResult(NamedTuple):
+    """One result of create_many, `index` is the position of the item in the input."""
+
+    index: int
+    completion: Optional[TypedChatCompletion]
+    error: Optional[BaseException]
+
+
+class _BaseTypedCompletions:
     default_model: Optional[str]
+    cache: Optional[ResponseCache]
+    hedging: Optional[HedgingPolicy]
+    strict: bool
+    usage: Optional[UsageStats]
+    raw_responses: bool
+
+    def _prepare(
+        self,
+        messages: Iterable[ChatCompletionMessageParam],
+        model: Optional[Union[str, ChatModel]],
+        fn_tools: Union[Iterable[Callable], Callable],
+        response_type: Type[T],
+        stream: bool,
+        kwargs: dict,
+    ):
+        """Builds the chat args sent to openai along with the functions and deserializer used to type the result."""
+        model = model or self.default_model
+        fn_tools: Iterable[Callable] = _clean_maybe_iterable(fn_tools)
+        functions = transform_tools(fn_tools, Config.schema_compactor)
+        chat_args = dict(stream=stream, model=model, **kwargs)
+        compiled = (
+            compile_response_type(response_type)
+            if self.strict and response_type is not str
+            else None
+        )
+        if compiled is not None and compiled.strict_schema is not None:
+            messages, deserializer = list(messages), compiled.deserializer
+            chat_args["response_format"] = dict(
+                type="json_schema",
+                json_schema=dict(
+                    name=schema_name(response_type),
+                    schema=compiled.strict_schema,
+                    strict=True,
+                ),
+            )
+        else:
+            messages, deserializer = Config.transform_messages_fn(
+                messages, response_type
+            )
+            if response_type is not str:
+                chat_args["response_format"] = {"type": "json_object"}
+        chat_args["messages"] = messages
+        if fn_tools:
+            extra_tools = [
+                dict(
+                    type="function",
+                    function=strict_function(params, fd) if self.strict else fd,
+                )
+                for _, params, fd in _tool_order(functions)
+            ]
+            chat_args.setdefault("tools", []).extend(extra_tools)
+        return chat_args, functions, deserializer
+
+    def batch_request(
+        self,
+        custom_id: str,
+        messages: Iterable[ChatCompletionMessageParam],
+        model: Optional[Union[str, ChatModel]] = None,
+        fn_tools: Union[Iterable[Callable], Callable] = None,
+        response_type: Type[T] = str,
+        **kwargs,
+    ) -> BatchRequest:
+        """Prepares a request for `TypedAI.batches.create`, applying the same prompt and schema transform as `create`."""
+        chat_args, functions, deserializer = self._prepare(
+            messages, model, fn_tools, response_type, False, kwargs
+        )
+        del chat_args["stream"]
+        return BatchRequest(
+            custom_id,
+            chat_args,
+            response_type,
+            partial(optional_parser, parser=deserializer),
+            functions,
+        )
+
+    @staticmethod
+    def _typed(
+        completion: ChatCompletion,
+        response_type: Type[T],
+        parser: Callable,
+        deserializer: Callable,
+        functions: dict,
+    ) -> TypedChatCompletion[Optional[T]]:
+        return TypedChatCompletion[Optional[response_type]].from_completion(
+            completion, partial(parser, parser=deserializer), functions
+        )
+
+
+class TypedCompletions(_BaseTypedCompletions):
+    _completions: Completions
 
-    def __init__(self, completions: Completions, default_model: Optional[str] = None):
+    def __init__(
+        self,
+        completions: Completions,
+        default_model: Optional[str] = None,
+        cache: Optional[ResponseCache] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        strict: bool = False,
+        usage: Optional[UsageStats] = None,
+        raw_responses: bool = False,
+    ):
         self._completions = completions
         self.default_model = default_model
+        self.cache = cache
+        self.hedging = hedging
+        self.strict = strict
+        self.usage = usage
+        self.raw_responses = raw_responses
 
     def create(
         self,
@@ -35,23 +191,14 @@ class TypedCompletions:
         response_type: Type[T] = str,
         **kwargs,
     ) -> TypedChatCompletion[Optional[T]]:
-        model = model or self.default_model
-        fn_tools: Iterable[Callable] = _clean_maybe_iterable(fn_tools)
-        functions = transform_tools(fn_tools)
         parser = (
             require_parser if kwargs.pop("_require_parser", False) else optional_parser
         )
-        chat_args = dict(stream=False, model=model, **kwargs)
-        messages, deserializer = Config.transform_messages_fn(messages, response_type)
-        completion: ChatCompletion = self._create(
-            chat_args, fn_tools, functions, messages, response_type
+        chat_args, functions, deserializer = self._prepare(
+            messages, model, fn_tools, response_type, False, kwargs
         )
-        typed_chat_completion = TypedChatCompletion[
-            Optional[response_type]
-        ].model_validate(completion.model_dump())
-        typed_chat_completion._parser = partial(parser, parser=deserializer)
-        typed_chat_completion._functions = functions
-        return typed_chat_completion
+        completion: ChatCompletion = self._create(chat_args)
+        return self._typed(completion, response_type, parser, deserializer, functions)
 
     def create_to_completion(
         self,
@@ -60,28 +207,45 @@ class TypedCompletions:
         fn_tools: Union[Iterable[Callable], Callable] = None,
         response_type: Type[T] = str,
         max_cycles: int = 8,
+        tool_execution: ToolExecution = SEQUENTIAL,
+        memory: Optional[MemoryPolicy] = None,
+        repair: bool = True,
+        repair_truncated: bool = False,
+        best_of: int = 1,
         **kwargs,
     ) -> TypedChatCompletion[T]:
-        mem = []
-        additional_messages = messages
-        count = 0
-        while additional_messages and count <= max_cycles:
-            mem.extend(additional_messages)
+        """
+        :param repair: Try cheap local fixes (code fences, surrounding prose, trailing commas, missing closers after a
+            complete value, the response wrapper) on content that fails to parse before sending the error back to the
+            model. The fixes applied are recorded per cycle in `completion.cycles`.
+        :param repair_truncated: Also repair output cut off mid value by closing unterminated strings and dropping
+            incomplete members. The parsed result silently lacks what was cut off.
+        :param best_of: Request this many choices (`n`) per cycle. When the first choice fails to parse the first
+            valid one is moved to the front and returned instead of spending another cycle.
+        """
+        if best_of > 1:
+            kwargs["n"] = best_of
+        loop = _CompletionLoop(messages, max_cycles, memory, repair, repair_truncated)
+        while loop.has_next():
             completion = self.create(
-                mem, model, fn_tools, response_type, _require_parser=True, **kwargs
+                loop.next_messages(),
+                model,
+                fn_tools,
+                response_type,
+                _require_parser=True,
+                **kwargs,
             )
-            count += 1
+            loop.track(completion)
             if completion.has_tool_calls():
-                additional_messages = completion.build_messages(
-                    tool_error_handling=HANDLE_ANY_ERROR
+                loop.add(
+                    completion.build_messages(
+                        tool_error_handling=HANDLE_ANY_ERROR,
+                        tool_execution=tool_execution,
+                    )
                 )
-            else:
-                try:
-                    completion.parse_content()
-                    return completion
-                except ContentParsingError as e:
-                    additional_messages = [e.message()]
-        raise CycleLimitExceeded(f"Cycle limit ({max_cycles}) exceeded")
+            elif loop.is_complete(completion):
+                return completion
+        raise loop.exceeded()
 
     def stream(
         self,
@@ -89,30 +253,481 @@ class TypedCompletions:
         model: Optional[Union[str, ChatModel]] = None,
         fn_tools: Union[Iterable[Callable], Callable] = None,
         response_type: Type[T] = str,
+        keep_chunks: bool = True,
+        eager_tools: bool = False,
+        executor: Optional[Executor] = None,
         **kwargs,
     ) -> TypedStream[Optional[T]]:
-        model = model or self.default_model
-        fn_tools: Iterable[Callable] = _clean_maybe_iterable(fn_tools)
-        functions = transform_tools(fn_tools)
-        chat_args = dict(stream=True, model=model, **kwargs)
-        messages, deserializer = Config.transform_messages_fn(messages, response_type)
-        stream: Stream[ChatCompletionChunk] = self._create(
-            chat_args, fn_tools, functions, messages, response_type
+        chat_args, functions, deserializer = self._prepare(
+            messages, model, fn_tools, response_type, True, kwargs
         )
+        requested_at = perf_counter() if hooks else None
+        stream: Stream[ChatCompletionChunk] = self._create(chat_args)
         return TypedStream(
-            stream, partial(optional_parser, parser=deserializer), functions
+            stream,
+            partial(optional_parser, parser=deserializer),
+            functions,
+            keep_chunks,
+            response_type,
+            eager_tools,
+            executor,
+            requested_at,
         )
 
-    def _create(self, chat_args, fn_tools, functions, messages, response_type):
-        if response_type is not str:
-            chat_args["response_format"] = {"type": "json_object"}
-        chat_args["messages"] = messages
-        if fn_tools:
-            extra_tools = [
-                dict(type="function", function=fd) for _, _, fd in functions.values()
-            ]
-            chat_args.setdefault("tools", []).extend(extra_tools)
-        return self._completions.create(**chat_args)
+    def create_many(
+        self,
+        messages: Iterable[Iterable[ChatCompletionMessageParam]],
+        model: Optional[Union[str, ChatModel]] = None,
+        fn_tools: Union[Iterable[Callable], Callable] = None,
+        response_type: Type[T] = str,
+        concurrency: int = 8,
+        preserve_order: bool = False,
+        return_exceptions: bool = True,
+        **kwargs,
+    ) -> Iterator[ManyResult]:
+        """
+        Runs `create` for each message list on a thread pool, yielding results as they finish.
+
+        Tools and the response type are compiled once up front. At most `concurrency` requests are in flight and the
+        input is consumed lazily, so memory stays flat even for a generator of millions of items. With
+        `preserve_order` results are yielded in input order. With `return_exceptions` failures are yielded as
+        results with `error` set rather than raised.
+        """
+        fn_tools = _compile_tools(fn_tools)
+        items = enumerate(messages)
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+
+            def submit() -> bool:
+                item = next(items, None)
+                if item is None:
+                    return False
+                index, item_messages = item
+                future = pool.submit(
+                    self.create, item_messages, model, fn_tools, response_type, **kwargs
+                )
+                pending[future] = index
+                return True
+
+            pending: dict[Future, int] = {}
+            try:
+                while len(pending) < concurrency and submit():
+                    pass
+                while pending:
+                    if preserve_order:
+                        done = [next(iter(pending))]
+                        wait(done)
+                    else:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        index = pending.pop(future)
+                        yield _many_result(index, future, return_exceptions)
+                        submit()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _create(self, chat_args):
+        if self.cache is None:
+            return self._send(chat_args)
+        key = request_key(chat_args)
+        cached = self.cache.get(key)
+        if chat_args.get("stream"):
+            if cached is not None:
+                return ReplayStream(completion_to_chunks(cached))
+            return RecordingStream(self._send(chat_args), partial(self.cache.set, key))
+        if cached is not None:
+            return cached
+        completion = self._send(chat_args)
+        self.cache.set(key, completion)
+        return completion
+
+    def _send(self, chat_args):
+        stream = bool(chat_args.get("stream"))
+        if self.raw_responses and not stream:
+            create = partial(
+                _create_raw, self._completions.with_raw_response.create, chat_args
+            )
+        else:
+            create = partial(self._completions.create, **chat_args)
+        if self.hedging is not None:
+            create = partial(self.hedging.call, create, stream)
+        if hooks:
+            started = perf_counter()
+            response = create()
+            _emit_request(chat_args, started)
+        else:
+            response = create()
+        if self.usage is None:
+            return response
+        if stream:
+            return UsageStream(response, self.usage)
+        self.usage.record(response.usage)
+        return response
+
+
+class AsyncTypedCompletions(_BaseTypedCompletions):
+    _completions: AsyncCompletions
+
+    def __init__(
+        self,
+        completions: AsyncCompletions,
+        default_model: Optional[str] = None,
+        cache: Optional[ResponseCache] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        strict: bool = False,
+        usage: Optional[UsageStats] = None,
+        raw_responses: bool = False,
+    ):
+        self._completions = completions
+        self.default_model = default_model
+        self.cache = cache
+        self.hedging = hedging
+        self.strict = strict
+        self.usage = usage
+        self.raw_responses = raw_responses
+
+    async def create(
+        self,
+        messages: Iterable[ChatCompletionMessageParam],
+        model: Optional[Union[str, ChatModel]] = None,
+        fn_tools: Union[Iterable[Callable], Callable] = None,
+        response_type: Type[T] = str,
+        **kwargs,
+    ) -> TypedChatCompletion[Optional[T]]:
+        parser = (
+            require_parser if kwargs.pop("_require_parser", False) else optional_parser
+        )
+        chat_args, functions, deserializer = self._prepare(
+            messages, model, fn_tools, response_type, False, kwargs
+        )
+        completion: ChatCompletion = await self._create(chat_args)
+        return self._typed(completion, response_type, parser, deserializer, functions)
+
+    async def create_to_completion(
+        self,
+        messages: Iterable[ChatCompletionMessageParam],
+        model: Optional[Union[str, ChatModel]] = None,
+        fn_tools: Union[Iterable[Callable], Callable] = None,
+        response_type: Type[T] = str,
+        max_cycles: int = 8,
+        tool_execution: ToolExecution = SEQUENTIAL,
+        memory: Optional[MemoryPolicy] = None,
+        repair: bool = True,
+        repair_truncated: bool = False,
+        best_of: int = 1,
+        **kwargs,
+    ) -> TypedChatCompletion[T]:
+        """
+        :param repair: Try cheap local fixes (code fences, surrounding prose, trailing commas, missing closers after a
+            complete value, the response wrapper) on content that fails to parse before sending the error back to the
+            model. The fixes applied are recorded per cycle in `completion.cycles`.
+        :param repair_truncated: Also repair output cut off mid value by closing unterminated strings and dropping
+            incomplete members. The parsed result silently lacks what was cut off.
+        :param best_of: Request this many choices (`n`) per cycle. When the first choice fails to parse the first
+            valid one is moved to the front and returned instead of spending another cycle.
+        """
+        if best_of > 1:
+            kwargs["n"] = best_of
+        loop = _CompletionLoop(messages, max_cycles, memory, repair, repair_truncated)
+        while loop.has_next():
+            completion = await self.create(
+                loop.next_messages(),
+                model,
+                fn_tools,
+                response_type,
+                _require_parser=True,
+                **kwargs,
+            )
+            loop.track(completion)
+            if completion.has_tool_calls():
+                loop.add(
+                    await completion.abuild_messages(
+                        tool_error_handling=HANDLE_ANY_ERROR,
+                        tool_execution=tool_execution,
+                    )
+                )
+            elif loop.is_complete(completion):
+                return completion
+        raise loop.exceeded()
+
+    async def stream(
+        self,
+        messages: Iterable[ChatCompletionMessageParam],
+        model: Optional[Union[str, ChatModel]] = None,
+        fn_tools: Union[Iterable[Callable], Callable] = None,
+        response_type: Type[T] = str,
+        keep_chunks: bool = True,
+        eager_tools: bool = False,
+        executor: Optional[Executor] = None,
+        **kwargs,
+    ) -> AsyncTypedStream[Optional[T]]:
+        chat_args, functions, deserializer = self._prepare(
+            messages, model, fn_tools, response_type, True, kwargs
+        )
+        requested_at = perf_counter() if hooks else None
+        stream: AsyncStream[ChatCompletionChunk] = await self._create(chat_args)
+        return AsyncTypedStream(
+            stream,
+            partial(optional_parser, parser=deserializer),
+            functions,
+            keep_chunks,
+            response_type,
+            eager_tools,
+            executor,
+            requested_at,
+        )
+
+    async def create_many(
+        self,
+        messages: Union[
+            Iterable[Iterable[ChatCompletionMessageParam]],
+            AsyncIterable[Iterable[ChatCompletionMessageParam]],
+        ],
+        model: Optional[Union[str, ChatModel]] = None,
+        fn_tools: Union[Iterable[Callable], Callable] = None,
+        response_type: Type[T] = str,
+        concurrency: int = 32,
+        preserve_order: bool = False,
+        return_exceptions: bool = True,
+        **kwargs,
+    ) -> AsyncIterator[ManyResult]:
+        """Async version of TypedCompletions.create_many, accepting sync or async iterables of message lists."""
+        fn_tools = _compile_tools(fn_tools)
+        items = _aenumerate(messages)
+        pending: dict[asyncio.Task, int] = {}
+
+        async def submit() -> bool:
+            try:
+                index, item_messages = await items.__anext__()
+            except StopAsyncIteration:
+                return False
+            task = asyncio.ensure_future(
+                self.create(item_messages, model, fn_tools, response_type, **kwargs)
+            )
+            pending[task] = index
+            return True
+
+        try:
+            while len(pending) < concurrency and await submit():
+                pass
+            while pending:
+                if preserve_order:
+                    done = [next(iter(pending))]
+                    await asyncio.wait(done)
+                else:
+                    done, _ = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                for task in done:
+                    index = pending.pop(task)
+                    yield _many_result(index, task, return_exceptions)
+                    await submit()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _create(self, chat_args):
+        if self.cache is None:
+            return await self._send(chat_args)
+        key = request_key(chat_args)
+        cached = self.cache.get(key)
+        if chat_args.get("stream"):
+            if cached is not None:
+                return AsyncReplayStream(completion_to_chunks(cached))
+            return AsyncRecordingStream(
+                await self._send(chat_args),
+                partial(self.cache.set, key),
+            )
+        if cached is not None:
+            return cached
+        completion = await self._send(chat_args)
+        self.cache.set(key, completion)
+        return completion
+
+    async def _send(self, chat_args):
+        stream = bool(chat_args.get("stream"))
+        if self.raw_responses and not stream:
+            create = partial(
+                _acreate_raw, self._completions.with_raw_response.create, chat_args
+            )
+        else:
+            create = partial(self._completions.create, **chat_args)
+        if self.hedging is not None:
+            create = partial(self.hedging.acall, create, stream)
+        if hooks:
+            started = perf_counter()
+            response = await create()
+            _emit_request(chat_args, started)
+        else:
+            response = await create()
+        if self.usage is None:
+            return response
+        if stream:
+            return AsyncUsageStream(response, self.usage)
+        self.usage.record(response.usage)
+        return response
+
+
+class _CompletionLoop:
+    """Conversation state for create_to_completion, shared by the sync and async clients."""
+
+    mem: List[ChatCompletionMessageParam]
+    additional_messages: List[ChatCompletionMessageParam]
+    count: int
+    max_cycles: int
+    memory: MemoryPolicy
+    cycles: List[CycleStats]
+
+    def __init__(
+        self,
+        messages: Iterable[ChatCompletionMessageParam],
+        max_cycles: int,
+        memory: Optional[MemoryPolicy] = None,
+        repair: bool = True,
+        repair_truncated: bool = False,
+    ):
+        self.mem = []
+        self.additional_messages = list(messages)
+        self.count = 0
+        self.max_cycles = max_cycles
+        self.memory = memory or MemoryPolicy()
+        self.cycles = []
+        self.repair = repair
+        self.repair_truncated = repair_truncated
+        self.conversation = {}  # memoized results of conversation scoped tools
+        self._selected = []
+
+    def has_next(self) -> bool:
+        return bool(self.additional_messages) and self.count <= self.max_cycles
+
+    def next_messages(self) -> List[ChatCompletionMessageParam]:
+        self.mem.extend(self.additional_messages)
+        self.additional_messages = []
+        self.count += 1
+        self._selected = self.memory.select(self.mem)
+        return self._selected
+
+    def track(self, completion: TypedChatCompletion):
+        self.cycles.append(
+            CycleStats(
+                messages=len(self._selected),
+                estimated_prompt_tokens=sum(
+                    self.memory.estimator(m) for m in self._selected
+                ),
+                prompt_tokens=completion.usage.prompt_tokens
+                if completion.usage
+                else None,
+            )
+        )
+        completion._cycles = self.cycles
+        completion._conversation = self.conversation
+
+    def add(self, messages: List[ChatCompletionMessageParam]):
+        self.additional_messages = messages
+
+    def is_complete(self, completion: TypedChatCompletion) -> bool:
+        try:
+            completion.parse_content()
+        except ContentParsingError as e:
+            if not (
+                self._other_choice(completion)
+                or (self.repair and self._repair(completion))
+            ):
+                self.additional_messages = [e.message()]
+                return False
+        if hooks:
+            emit("cycles", self.count, True)
+        return True
+
+    @staticmethod
+    def _other_choice(completion: TypedChatCompletion) -> bool:
+        """Promotes the first valid choice after the first one, when several were requested."""
+        index = completion.first_valid_choice(start=1)
+        if index is None:
+            return False
+        completion.promote_choice(index)
+        return True
+
+    def _repair(self, completion: TypedChatCompletion) -> bool:
+        """Replaces the content with a locally repaired version that parses, if one can be found."""
+        message = completion.choices[0].message
+        repaired = repair_content(
+            message.content, completion._parser, self.repair_truncated
+        )
+        if repaired is None:
+            return False
+        message.content = repaired.content
+        self.cycles[-1] = self.cycles[-1]._replace(
+            repaired=True, repairs=tuple(repaired.fixes)
+        )
+        if hooks:
+            emit("content_repaired", repaired.fixes)
+        return True
+
+    def exceeded(self) -> CycleLimitExceeded:
+        if hooks:
+            emit("cycles", self.count, False)
+        return CycleLimitExceeded(f"Cycle limit ({self.max_cycles}) exceeded")
+
+
+def _create_raw(create: Callable, chat_args: dict) -> ChatCompletion:
+    return _validate_raw(create(**chat_args))
+
+
+async def _acreate_raw(create: Callable, chat_args: dict) -> ChatCompletion:
+    return _validate_raw(await create(**chat_args))
+
+
+def _validate_raw(raw) -> ChatCompletion:
+    """
+    Validates a raw response body from bytes in one pass with the completion's pre-built validator.
+
+    Bodies that don't match the declared model (such as a new finish_reason) fall back to the sdk's lenient parsing.
+    """
+    try:
+        return ChatCompletion.model_validate_json(raw.content)
+    except ValidationError:
+        return raw.parse()
+
+
+def _tool_order(functions: dict) -> Iterable:
+    if Config.canonical_layout:
+        return (functions[name] for name in sorted(functions))
+    return functions.values()
+
+
+def _emit_request(chat_args: dict, started: float):
+    emit(
+        "request",
+        chat_args.get("model"),
+        bool(chat_args.get("stream")),
+        perf_counter() - started,
+    )
+
+
+def _many_result(index: int, future, return_exceptions: bool) -> ManyResult:
+    error = future.exception()
+    if error is not None and not return_exceptions:
+        raise error
+    return ManyResult(index, None if error else future.result(), error)
+
+
+async def _aenumerate(items):
+    index = 0
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield index, item
+            index += 1
+    else:
+        for item in items:
+            yield index, item
+            index += 1
+
+
+def _compile_tools(fn_tools) -> ToolSet:
+    if isinstance(fn_tools, ToolSet):
+        return fn_tools
+    return ToolSet(_clean_maybe_iterable(fn_tools))
 
 
 def _clean_maybe_iterable(value):
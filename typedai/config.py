@@ -1,61 +1,186 @@
-import copy
 import json
 from textwrap import dedent
-from typing import List, TypeVar, Tuple, Callable, Type, get_origin
+from time import perf_counter
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    TypeVar,
+    Tuple,
+    Callable,
+    Type,
+    get_origin,
+    NamedTuple,
+    Optional,
+    Any,
+)
 
 from openai import BaseModel
 from pydantic import TypeAdapter
 
+from typedai.compact import CompactionReport, SchemaCompactor
+from typedai.instrumentation import emit, hooks
+from typedai.strict import strict_schema
+from typedai.util import LRUCache, tool_registry
+
 T = TypeVar("T")
 
 
 def _load_resp(s):
-    return json.loads(s)["response"]
+    return Config.json_loads(s)["response"]
 
 
-def default_message_transform_fn(
-    messages: List[dict], output_format: Type[T]
-) -> Tuple[List[dict], Callable[[str], T]]:
-    if output_format is str:
-        return messages, lambda x: x
-    elif (
+class CompiledResponseType(NamedTuple):
+    adapter: Optional[TypeAdapter]
+    deserializer: Callable[[str], Any]
+    json_schema: dict
+    serialized_schema: str
+    # None when the schema has no strict structured output equivalent
+    strict_schema: Optional[dict]
+
+
+def compile_response_type(output_format: Type[T]) -> CompiledResponseType:
+    """Builds (or fetches from Config.response_type_cache) the adapter, deserializer and schema for a response type."""
+    key = (
+        output_format,
+        repr(Config.default_json_dump_args),
+        Config.schema_compactor,
+        Config.canonical_layout,
+    )
+    return Config.response_type_cache.get_or_create(
+        key, lambda: _compile_response_type(output_format)
+    )
+
+
+def is_wrapped_response_type(output_format: Type[T]) -> bool:
+    """Whether the response type is wrapped in a `{"response": ...}` object (everything other than dicts and models)."""
+    return not (
         get_origin(output_format) is dict
         or output_format is dict
         or (isinstance(output_format, type) and issubclass(output_format, BaseModel))
-    ):
-        adapter = TypeAdapter(output_format)
-        json_schema = adapter.json_schema()
+    )
+
+
+def _compile_response_type(output_format: Type[T]) -> CompiledResponseType:
+    started = perf_counter() if hooks else None
+    adapter = TypeAdapter(output_format)
+    json_schema = _response_schema(output_format, adapter)
+    if not is_wrapped_response_type(output_format):
         deserializer = adapter.validate_json
     else:
-        json_schema = dict(
-            type="object",
-            properties=dict(resopose=TypeAdapter(output_format).json_schema()),
-            required=["response"],
-        )
         deserializer = _load_resp
+    dump_args = Config.default_json_dump_args
+    if Config.canonical_layout:
+        dump_args = dict(dump_args, sort_keys=True)
+    compactor = Config.schema_compactor
+    if compactor is not None:
+        json_schema = compactor.compact(json_schema)
+        serialized = compactor.dumps(json_schema, **dump_args)
+    else:
+        serialized = json.dumps(json_schema, **dump_args)
+    compiled = CompiledResponseType(
+        adapter,
+        deserializer,
+        json_schema,
+        serialized,
+        strict_schema(json_schema),
+    )
+    if started is not None:
+        emit("schema_compiled", output_format, perf_counter() - started)
+    return compiled
+
+
+def _response_schema(output_format: Type[T], adapter: TypeAdapter) -> dict:
+    schema = adapter.json_schema()
+    if not is_wrapped_response_type(output_format):
+        return schema
+    # definitions stay at the root so `#/$defs/...` references still resolve
+    defs = schema.pop("$defs", None)
+    wrapped = dict(
+        type="object", properties=dict(response=schema), required=["response"]
+    )
+    if defs:
+        wrapped["$defs"] = defs
+    return wrapped
+
+
+def schema_compaction_report(
+    response_types: Iterable[Type] = (),
+    tools: Iterable[Callable] = (),
+    compactor: Optional[SchemaCompactor] = None,
+) -> Dict[str, CompactionReport]:
+    """
+    Estimated prompt tokens saved by compacting each response type's and tool's schema.
+
+    Uses `Config.schema_compactor` (or the default SchemaCompactor if none is set) unless a compactor is given.
+    """
+    compactor = compactor or Config.schema_compactor or SchemaCompactor()
+    dump_args = Config.default_json_dump_args
+    report = {}
+    for output_format in response_types:
+        schema = _response_schema(output_format, TypeAdapter(output_format))
+        name = getattr(output_format, "__name__", str(output_format))
+        report[name] = compactor.report(schema, **dump_args)
+    for fn in tools:
+        _, _, fd = tool_registry.compile(fn)
+        report[fd["name"]] = compactor.report_function(fd, **dump_args)
+    return report
+
+
+def default_message_transform_fn(
+    messages: List[dict], output_format: Type[T]
+) -> Tuple[List[dict], Callable[[str], T]]:
+    if output_format is str:
+        return messages, lambda x: x
+    compiled = compile_response_type(output_format)
     if not messages:
         raise ValueError("Messages must not be empty")
     messages = [m for m in messages]
-    messages[0] = copy.deepcopy(messages[0])
     system_message = messages[0]
     if system_message.get("role") != "system" or not system_message.get("content"):
         raise ValueError("First message must be a system message")
-    new_content = Config.default_template.format(
-        content=system_message["content"],
-        schema=json.dumps(json_schema, **Config.default_json_dump_args),
+    content = system_message["content"]
+    template = (
+        Config.canonical_template
+        if Config.canonical_layout
+        else Config.default_template
+    )
+    new_content = Config.system_prompt_cache.get_or_create(
+        (content, compiled.serialized_schema, template),
+        lambda: template.format(content=content, schema=compiled.serialized_schema),
     )
-    system_message["content"] = new_content
-    return messages, deserializer
+    messages[0] = {**system_message, "content": new_content}
+    return messages, compiled.deserializer
 
 
 class Config:
     default_template = dedent(
         """\
     {content}
-    
+
     Respond in JSON obeying the following JSON SCHEMA:
     {schema}"""
     )
 
+    # schema first so the static part of the system prompt forms a stable prefix
+    canonical_template = dedent(
+        """\
+    Respond in JSON obeying the following JSON SCHEMA:
+    {schema}
+
+    {content}"""
+    )
+
     default_json_dump_args = {}
+    # json decoder for wrapped response types, swap in a faster one such as `orjson.loads`
+    json_loads: Callable[[Any], Any] = json.loads
     transform_messages_fn = default_message_transform_fn
+    # prompt cache friendly requests: tools sorted by name, schemas serialized with sorted keys and placed before the
+    # system prompt content
+    canonical_layout: bool = False
+    # set to a SchemaCompactor to shrink response type and tool schemas sent to the model
+    schema_compactor: Optional[SchemaCompactor] = None
+
+    # compiled response types and rendered system prompts, check `.stats()` for hit rates
+    response_type_cache = LRUCache(maxsize=256)
+    system_prompt_cache = LRUCache(maxsize=1024)
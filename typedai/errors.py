@@ -29,3 +29,31 @@ class ToolArgumentParsingError(Exception):
 
 class CycleLimitExceeded(Exception):
     pass
+
+
+class BatchRequestError(Exception):
+    custom_id: Optional[str]
+    code: Optional[str]
+    status_code: Optional[int]
+
+    def __init__(
+        self,
+        custom_id: Optional[str],
+        code: Optional[str],
+        message: Optional[str],
+        status_code: Optional[int] = None,
+    ):
+        self.custom_id = custom_id
+        self.code = code
+        self.status_code = status_code
+        super().__init__(f"Batch request {custom_id} failed ({code}): {message}")
+
+
+class ToolTimeoutError(Exception):
+    tool: str
+    timeout: float
+
+    def __init__(self, tool: str, timeout: float):
+        self.tool = tool
+        self.timeout = timeout
+        super().__init__(f"Tool {tool} did not finish within {timeout} seconds")
@@ -0,0 +1,181 @@
+import asyncio
+import inspect
+import threading
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    TimeoutError as FutureTimeoutError,
+    wait,
+)
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+from typedai.errors import ToolTimeoutError
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+# how often a call queued for the process pool is checked for having started
+_QUEUE_POLL = 0.01
+# timed sync calls running (or hung) on their own threads at once, past this new calls fail fast with ToolTimeoutError
+MAX_TIMED_THREADS = 256
+_timed_threads = threading.BoundedSemaphore(MAX_TIMED_THREADS)
+
+
+class ToolPolicy:
+    """
+    How a tool marked with `execution_policy` is run, along with its timings.
+
+    With `timeout` a call that has not finished in time raises ToolTimeoutError, which create_to_completion (and
+    `HANDLE_ANY_ERROR`) turns into a tool error message for the model. The timeout counts from when the tool starts,
+    time spent queued for the process pool is not included. Sync tools with a timeout run on a thread of their own so
+    the caller can stop waiting, the thread itself can't be interrupted and finishes in the background. Hung calls keep
+    their thread, so at most MAX_TIMED_THREADS timed calls run at once and further ones time out right away. With
+    `process` the tool runs in a shared process pool, keeping CPU bound work off the GIL; the tool, its arguments
+    and its result must be picklable (module level functions and models).
+    """
+
+    timeout: Optional[float]
+    process: bool
+    calls: int
+    failures: int
+    timeouts: int
+    total_seconds: float
+    max_seconds: float
+
+    def __init__(self, timeout: Optional[float] = None, process: bool = False):
+        self.timeout = timeout
+        self.process = process
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def run(self, fn: Callable, kwargs: dict) -> Any:
+        """Runs a sync tool according to the policy."""
+        if self.process:
+            future = process_pool().submit(fn, **kwargs)
+        elif self.timeout is not None:
+            future = _start_thread(fn, kwargs, self.timeout)
+        else:
+            return fn(**kwargs)
+        while not (future.running() or future.done()):
+            wait([future], _QUEUE_POLL)
+        try:
+            return future.result(self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise ToolTimeoutError(_name(fn), self.timeout) from None
+
+    async def arun(
+        self,
+        fn: Callable,
+        kwargs: dict,
+        offload: bool,
+        executor: Optional[Executor] = None,
+    ) -> Any:
+        """
+        Runs a tool from async code. Sync tools are run on `executor` when `offload` is set, on a thread of their own
+        when a timeout applies.
+        """
+        if inspect.iscoroutinefunction(fn):
+            return await self.wait(fn(**kwargs), fn)
+        if self.process:
+            future = process_pool().submit(fn, **kwargs)
+        elif self.timeout is not None:
+            future = _start_thread(fn, kwargs, self.timeout)
+        elif offload:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, partial(fn, **kwargs))
+        else:
+            return fn(**kwargs)
+        while not (future.running() or future.done()):
+            await asyncio.sleep(_QUEUE_POLL)
+        return await self.wait(asyncio.wrap_future(future), fn)
+
+    async def wait(self, awaitable: Awaitable, fn: Callable) -> Any:
+        if self.timeout is None:
+            return await awaitable
+        try:
+            return await asyncio.wait_for(awaitable, self.timeout)
+        except asyncio.TimeoutError:
+            raise ToolTimeoutError(_name(fn), self.timeout) from None
+
+    def record(self, seconds: float, error: Optional[BaseException]):
+        with self._lock:
+            self.calls += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            if error is not None:
+                self.failures += 1
+                if isinstance(error, ToolTimeoutError):
+                    self.timeouts += 1
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        return dict(
+            calls=self.calls,
+            failures=self.failures,
+            timeouts=self.timeouts,
+            mean_seconds=self.total_seconds / self.calls if self.calls else 0.0,
+            max_seconds=self.max_seconds,
+        )
+
+
+def execution_policy(
+    fn: Optional[Callable] = None,
+    *,
+    timeout: Optional[float] = None,
+    process: bool = False,
+):
+    """
+    Sets how a tool is executed, use as `@execution_policy(timeout=10, process=True)` or
+    `execution_policy(fn, timeout=10)` to register an existing function. The function itself is returned, with its
+    ToolPolicy (and timings) available from `tool_policy(fn)`.
+    """
+
+    def mark(f: Callable) -> Callable:
+        if process and inspect.iscoroutinefunction(f):
+            raise ValueError(f"Coroutine tool {_name(f)} can't run in a process pool")
+        getattr(f, "__func__", f)._typedai_policy = ToolPolicy(timeout, process)
+        return f
+
+    return mark if fn is None else mark(fn)
+
+
+def tool_policy(fn: Callable) -> Optional[ToolPolicy]:
+    return getattr(fn, "_typedai_policy", None)
+
+
+def process_pool() -> ProcessPoolExecutor:
+    """The process pool shared by policies, created on first use."""
+    global _process_pool
+    with _pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor()
+        return _process_pool
+
+
+def _start_thread(fn: Callable, kwargs: dict, timeout: float) -> Future:
+    """Runs `fn` on a new daemon thread, so a hung call only ever holds its own thread."""
+    threads = _timed_threads
+    if not threads.acquire(blocking=False):
+        raise ToolTimeoutError(_name(fn), timeout)
+    future = Future()
+    future.set_running_or_notify_cancel()
+
+    def run():
+        try:
+            future.set_result(fn(**kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            threads.release()
+
+    threading.Thread(target=run, name="typedai-tool-timeout", daemon=True).start()
+    return future
+
+
+def _name(fn: Callable) -> str:
+    return getattr(fn, "__name__", repr(fn))
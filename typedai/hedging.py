@@ -0,0 +1,326 @@
+import asyncio
+import inspect
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import openai
+
+RETRY_STATUSES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+class HedgingPolicy:
+    """
+    Opt in tail latency control for TypedAI / AsyncTypedAI.
+
+    If a request has not answered (streams: produced their first chunk) within the `percentile` of recently observed
+    latencies, a duplicate request is fired. Whichever succeeds first is used and the other is cancelled (async) or
+    discarded and closed (sync). Streamed and non-streamed requests are tracked separately since time to first chunk
+    and time to full response differ. Until `min_samples` latencies have been observed streams use `initial_delay` and
+    non-streamed requests `initial_response_delay`, which by default (None) means they are not hedged at all until then.
+
+    Failures with a retryable status (429 / 5xx) or connection errors are retried up to `max_retries` times with full
+    jitter exponential backoff, honoring `retry-after` when the server sends one. This is on top of the openai client's
+    own retries, consider constructing the client with `max_retries=0` when using it.
+    """
+
+    percentile: float
+    initial_delay: float
+    initial_response_delay: Optional[float]
+    min_delay: float
+    max_delay: float
+    min_samples: int
+    max_retries: int
+    backoff_base: float
+    backoff_max: float
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        initial_delay: float = 2.0,
+        initial_response_delay: Optional[float] = None,
+        min_delay: float = 0.05,
+        max_delay: float = 30.0,
+        window: int = 200,
+        min_samples: int = 20,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+    ):
+        if not 0 < percentile <= 1:
+            raise ValueError("percentile must be in (0, 1]")
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.initial_response_delay = initial_response_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._latencies: Dict[bool, deque] = {
+            False: deque(maxlen=window),
+            True: deque(maxlen=window),
+        }
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self.retries = 0
+
+    def delay(self, stream: bool = False) -> Optional[float]:
+        """Seconds to wait for a response before hedging, None to not hedge."""
+        with self._lock:
+            latencies = sorted(self._latencies[stream])
+        if len(latencies) < self.min_samples:
+            return self.initial_delay if stream else self.initial_response_delay
+        value = latencies[
+            min(len(latencies) - 1, int(self.percentile * len(latencies)))
+        ]
+        return min(self.max_delay, max(self.min_delay, value))
+
+    def observe(self, seconds: float, stream: bool = False):
+        with self._lock:
+            self._latencies[stream].append(seconds)
+
+    def backoff(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        ceiling = min(self.backoff_max, self.backoff_base * 2**attempt)
+        delay = random.uniform(0, ceiling)
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    @staticmethod
+    def should_retry(error: BaseException) -> bool:
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code in RETRY_STATUSES or error.status_code >= 500
+        return isinstance(error, openai.APIConnectionError)
+
+    def stats(self) -> Dict[str, int]:
+        return dict(
+            requests=self.requests,
+            hedges_fired=self.hedges_fired,
+            hedges_won=self.hedges_won,
+            retries=self.retries,
+        )
+
+    def call(self, create: Callable, stream: bool = False):
+        """Runs `create` (an openai create call) with hedging and retries."""
+        attempt = 0
+        while True:
+            try:
+                return self._hedged(create, stream)
+            except Exception as e:
+                if attempt >= self.max_retries or not self.should_retry(e):
+                    raise
+                self._count("retries")
+                time.sleep(self.backoff(attempt, e))
+                attempt += 1
+
+    async def acall(self, create: Callable[[], Awaitable], stream: bool = False):
+        """Async version of `call`, the losing request is cancelled."""
+        attempt = 0
+        while True:
+            try:
+                return await self._ahedged(create, stream)
+            except Exception as e:
+                if attempt >= self.max_retries or not self.should_retry(e):
+                    raise
+                self._count("retries")
+                await asyncio.sleep(self.backoff(attempt, e))
+                attempt += 1
+
+    def _hedged(self, create: Callable, stream: bool):
+        self._count("requests")
+        delay = self.delay(stream)
+        if delay is None:
+            return self._attempt(create, stream)
+        # each attempt gets its own thread rather than a shared pool, so the deadline never includes time spent queued
+        # and the caller stays free to return whichever attempt answers first
+        primary = _start(self._attempt, create, stream)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        hedge = _start(self._attempt, create, stream)
+        self._count("hedges_fired")
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending | (done - {future}):
+                        _discard_future(loser)
+                    if future is hedge:
+                        self._count("hedges_won")
+                    return future.result()
+                error = error or future.exception()
+        raise error
+
+    async def _ahedged(self, create: Callable[[], Awaitable], stream: bool):
+        self._count("requests")
+        delay = self.delay(stream)
+        if delay is None:
+            return await self._aattempt(create, stream)
+        primary = asyncio.ensure_future(self._aattempt(create, stream))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+            hedge = asyncio.ensure_future(self._aattempt(create, stream))
+            self._count("hedges_fired")
+            pending.add(hedge)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        for other in done - {task}:
+                            if other.exception() is None:
+                                await _aclose(other.result())
+                        if task is hedge:
+                            self._count("hedges_won")
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _attempt(self, create: Callable, stream: bool):
+        started = time.monotonic()
+        response = create()
+        if stream:
+            response = PrefetchedStream(response)
+        self.observe(time.monotonic() - started, stream)
+        return response
+
+    async def _aattempt(self, create: Callable[[], Awaitable], stream: bool):
+        started = time.monotonic()
+        response = await create()
+        if stream:
+            try:
+                response = await AsyncPrefetchedStream.prefetch(response)
+            except BaseException:  # includes being cancelled as the losing hedge
+                await response.close()
+                raise
+        self.observe(time.monotonic() - started, stream)
+        return response
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+class PrefetchedStream:
+    """An openai Stream whose first chunk has already been read, so it is known to be producing."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._first: Tuple = ()
+        try:
+            self._first = (stream.__next__(),)
+        except StopIteration:
+            pass
+
+    def __next__(self):
+        if self._first:
+            (chunk,), self._first = self._first, ()
+            return chunk
+        return self.stream.__next__()
+
+    def __iter__(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.stream.__exit__(*args, **kwargs)
+
+    def close(self):
+        self.stream.close()
+
+
+class AsyncPrefetchedStream(PrefetchedStream):
+    def __init__(self, stream, first: Tuple):
+        self.stream = stream
+        self._first = first
+
+    @classmethod
+    async def prefetch(cls, stream) -> "AsyncPrefetchedStream":
+        try:
+            return cls(stream, (await stream.__anext__(),))
+        except StopAsyncIteration:
+            return cls(stream, ())
+
+    async def __anext__(self):
+        if self._first:
+            (chunk,), self._first = self._first, ()
+            return chunk
+        return await self.stream.__anext__()
+
+    def __aiter__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args, **kwargs):
+        await self.stream.__aexit__(*args, **kwargs)
+
+    async def close(self):
+        await self.stream.close()
+
+
+def _retry_after(error: Optional[BaseException]) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _start(fn: Callable, *args) -> Future:
+    """Runs `fn` on a new daemon thread, starting right away."""
+    future = Future()
+    future.set_running_or_notify_cancel()
+
+    def run():
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="typedai-hedge", daemon=True).start()
+    return future
+
+
+def _discard_future(future: Future):
+    """Drops the losing request of a hedge, closing its stream once it arrives."""
+    if not future.cancel():
+        future.add_done_callback(_close_result)
+
+
+def _close_result(future: Future):
+    if future.exception() is None:
+        close = getattr(future.result(), "close", None)
+        if close is not None:
+            close()
+
+
+async def _aclose(response):
+    close = getattr(response, "close", None)
+    if close is not None:
+        result = close()
+        if inspect.isawaitable(result):
+            await result
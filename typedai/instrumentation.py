@@ -0,0 +1,139 @@
+"""
+Pluggable instrumentation hooks.
+
+Register a `Hook` subclass with `add_hook` to receive timings from typedai. Call sites only read the clock when a hook
+is registered, so instrumentation costs a single list check per event otherwise. Hooks are called synchronously on the
+thread (or event loop) doing the work, keep them cheap. Exceptions raised by a hook propagate to the caller.
+"""
+
+from typing import Any, List, Optional
+
+
+class Hook:
+    """Receives instrumentation events, override the ones you care about. Durations are in seconds."""
+
+    def schema_compiled(self, response_type: Any, seconds: float):
+        """A response type's adapter and schema were compiled (cache misses only)."""
+
+    def tool_compiled(self, name: str, seconds: float):
+        """A tool's parameter model and function definition were compiled (cache misses only)."""
+
+    def request(self, model: Optional[str], stream: bool, seconds: float):
+        """An openai request returned, for streams this is when the response headers arrived."""
+
+    def first_chunk(self, model: Optional[str], seconds: float):
+        """Time from sending a streamed request to its first chunk."""
+
+    def chunk_gap(self, seconds: float):
+        """Time between two consecutive chunks of a stream."""
+
+    def parsed(self, seconds: float, error: Optional[BaseException]):
+        """`parse_content` ran, `error` is set when parsing failed."""
+
+    def tool_call(self, name: str, seconds: float, error: Optional[BaseException]):
+        """A tool finished executing, `error` is set when it raised."""
+
+    def content_repaired(self, fixes: List[str]):
+        """create_to_completion repaired unparseable content locally, saving a cycle."""
+
+    def cycles(self, count: int, completed: bool):
+        """A create_to_completion loop ended after `count` requests, `completed` is False if the cycle limit was hit."""
+
+
+# registered hooks, read directly by call sites so the check stays cheap
+hooks: List[Hook] = []
+
+
+def add_hook(hook: Hook) -> Hook:
+    hooks.append(hook)
+    return hook
+
+
+def remove_hook(hook: Hook):
+    hooks.remove(hook)
+
+
+def emit(event: str, *args):
+    for hook in hooks:
+        getattr(hook, event)(*args)
+
+
+def _error_attrs(error: Optional[BaseException]) -> dict:
+    return {"error.type": type(error).__name__} if error is not None else {}
+
+
+class OpenTelemetryHook(Hook):
+    """
+    Records events as OpenTelemetry histograms on the `typedai` meter.
+
+    Requires `opentelemetry-api` (`pip install eidolon-typedai[otel]`), uses the global meter provider unless one is
+    given.
+    """
+
+    def __init__(self, meter_provider=None):
+        try:
+            from opentelemetry import metrics
+        except ImportError as e:
+            raise ImportError(
+                "OpenTelemetryHook requires opentelemetry-api, install eidolon-typedai[otel]"
+            ) from e
+        meter = metrics.get_meter("typedai", meter_provider=meter_provider)
+
+        def seconds(name: str, description: str):
+            return meter.create_histogram(name, unit="s", description=description)
+
+        self._schema = seconds(
+            "typedai.schema.compile.duration", "Response type compile time"
+        )
+        self._tool_compile = seconds(
+            "typedai.tool.compile.duration", "Tool compile time"
+        )
+        self._request = seconds("typedai.request.duration", "OpenAI request latency")
+        self._first_chunk = seconds(
+            "typedai.stream.first_chunk.duration", "Time to first chunk"
+        )
+        self._chunk_gap = seconds(
+            "typedai.stream.chunk_gap.duration", "Time between chunks"
+        )
+        self._parse = seconds("typedai.parse.duration", "parse_content time")
+        self._tool = seconds("typedai.tool.duration", "Tool execution time")
+        self._repairs = meter.create_counter(
+            "typedai.completion.repairs",
+            unit="{cycle}",
+            description="Cycles saved by repairing content locally",
+        )
+        self._cycles = meter.create_histogram(
+            "typedai.completion.cycles",
+            unit="{cycle}",
+            description="Requests made by create_to_completion",
+        )
+
+    def schema_compiled(self, response_type: Any, seconds: float):
+        self._schema.record(
+            seconds,
+            {"response_type": getattr(response_type, "__name__", str(response_type))},
+        )
+
+    def tool_compiled(self, name: str, seconds: float):
+        self._tool_compile.record(seconds, {"tool": name})
+
+    def request(self, model: Optional[str], stream: bool, seconds: float):
+        self._request.record(seconds, {"model": model or "", "stream": stream})
+
+    def first_chunk(self, model: Optional[str], seconds: float):
+        self._first_chunk.record(seconds, {"model": model or ""})
+
+    def chunk_gap(self, seconds: float):
+        self._chunk_gap.record(seconds)
+
+    def parsed(self, seconds: float, error: Optional[BaseException]):
+        self._parse.record(seconds, _error_attrs(error))
+
+    def tool_call(self, name: str, seconds: float, error: Optional[BaseException]):
+        self._tool.record(seconds, {"tool": name, **_error_attrs(error)})
+
+    def content_repaired(self, fixes: List[str]):
+        self._repairs.add(1, {"fixes": ",".join(fixes)})
+
+    def cycles(self, count: int, completed: bool):
+        self._cycles.record(count, {"completed": completed})
@@ -0,0 +1,154 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Literal, Optional, Tuple, Union
+
+from pydantic_core import to_json
+
+SHARED = "shared"
+CONVERSATION = "conversation"
+MemoScope = Literal[SHARED, CONVERSATION]
+
+MISSING = object()
+
+
+class ToolMemo:
+    """
+    Memoization settings and results of a tool marked with `cacheable`.
+
+    Results are keyed on the tool's validated arguments. With the `shared` scope results are reused across cycles,
+    requests and concurrent conversations. With the `conversation` scope they are only reused within one
+    create_to_completion call. Entries expire `ttl` seconds after they were stored and the least recently used ones are
+    evicted beyond `maxsize` (per conversation for the conversation scope). Failed calls are not cached. Cacheable
+    methods keep separate results per instance, instances that can't be weakly referenced are not memoized.
+    """
+
+    maxsize: int
+    ttl: Optional[float]
+    scope: MemoScope
+    hits: int
+    misses: int
+
+    def __init__(
+        self, maxsize: int = 256, ttl: Optional[float] = None, scope: MemoScope = SHARED
+    ):
+        if scope not in (SHARED, CONVERSATION):
+            raise ValueError(f"Unknown memo scope {scope}")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.scope = scope
+        self.hits = 0
+        self.misses = 0
+        self._shared: OrderedDict = OrderedDict()
+        self._instances: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def store(
+        self, conversation: Optional[dict], instance: Any = None
+    ) -> Optional[OrderedDict]:
+        """
+        The results store to use, None when conversation scoped results are requested outside a conversation.
+
+        `instance` is the object a cacheable method is bound to, each instance gets its own store.
+        """
+        with self._lock:
+            if self.scope == CONVERSATION:
+                if conversation is None:
+                    return None
+                # the bound method is referenced by the conversation's tools, so the instance id is stable while it runs
+                key = self if instance is None else (self, id(instance))
+                return conversation.setdefault(key, OrderedDict())
+            if instance is None:
+                return self._shared
+            try:
+                return self._instances.setdefault(instance, OrderedDict())
+            except TypeError:  # not weakly referenceable or not hashable
+                return None
+
+    def get(self, store: OrderedDict, key: Hashable) -> Any:
+        """The stored result, or MISSING."""
+        with self._lock:
+            entry = store.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires is None or expires > time.monotonic():
+                    store.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del store[key]
+            self.misses += 1
+            return MISSING
+
+    def set(self, store: OrderedDict, key: Hashable, value: Any):
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            store[key] = (expires, value)
+            store.move_to_end(key)
+            while len(store) > self.maxsize:
+                store.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._shared.clear()
+            self._instances.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            hit_rate=self.hit_rate,
+            size=len(self._shared) + sum(map(len, list(self._instances.values()))),
+            maxsize=self.maxsize,
+        )
+
+
+def cacheable(
+    fn: Optional[Callable] = None,
+    *,
+    maxsize: int = 256,
+    ttl: Optional[float] = None,
+    scope: MemoScope = SHARED,
+):
+    """
+    Marks a pure / idempotent tool so repeated calls with the same arguments reuse the earlier result.
+
+    Use as `@cacheable`, `@cacheable(ttl=60, scope=CONVERSATION)` or `cacheable(fn)` to register an existing function.
+    The function itself is returned, with its ToolMemo available from `tool_memo(fn)`.
+    """
+
+    def mark(f: Callable) -> Callable:
+        getattr(f, "__func__", f)._typedai_memo = ToolMemo(maxsize, ttl, scope)
+        return f
+
+    return mark if fn is None else mark(fn)
+
+
+def tool_memo(fn: Callable) -> Optional[ToolMemo]:
+    return getattr(fn, "_typedai_memo", None)
+
+
+def memo_lookup(
+    fn: Callable, kwargs: dict, conversation: Optional[dict]
+) -> Tuple[Optional[ToolMemo], Optional[OrderedDict], Optional[bytes], Any]:
+    """Looks a call up in the tool's memo, returning (memo, store, key, result or MISSING)."""
+    memo = tool_memo(fn)
+    store = (
+        None
+        if memo is None
+        else memo.store(conversation, getattr(fn, "__self__", None))
+    )
+    if store is None:
+        return None, None, None, MISSING
+    try:
+        key = to_json(kwargs)
+    except ValueError:  # arguments without a json form are not memoized
+        return None, None, None, MISSING
+    return memo, store, key, memo.get(store, key)
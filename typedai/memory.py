@@ -0,0 +1,120 @@
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from openai.types.chat import ChatCompletionMessageParam
+
+TokenEstimator = Callable[[ChatCompletionMessageParam], int]
+
+_MESSAGE_OVERHEAD = 4  # role, separators, etc.
+_CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(message: ChatCompletionMessageParam) -> int:
+    """Cheap local token estimate (~4 characters per token), good enough for budgeting without a tokenizer."""
+    chars = len(_text(message.get("content")))
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call.get("function") or {}
+        chars += len(function.get("name") or "") + len(function.get("arguments") or "")
+    return _MESSAGE_OVERHEAD + -(-chars // _CHARS_PER_TOKEN)
+
+
+def estimate_text_tokens(text: str) -> int:
+    """The same estimate for a bare piece of text, such as a schema."""
+    return -(-len(text) // _CHARS_PER_TOKEN)
+
+
+def _text(content) -> str:
+    if content is None:
+        return ""
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+
+
+class CycleStats(NamedTuple):
+    messages: int
+    estimated_prompt_tokens: int
+    prompt_tokens: Optional[int]  # as reported by the api usage, when available
+    # the response was fixed locally rather than spending another cycle
+    repaired: bool = False
+    # names of the local fixes applied, see typedai.repair
+    repairs: Tuple[str, ...] = ()
+
+
+class MemoryPolicy:
+    """Chooses which messages of a create_to_completion conversation are sent on each cycle."""
+
+    estimator: TokenEstimator = staticmethod(estimate_tokens)
+
+    def select(
+        self, messages: List[ChatCompletionMessageParam]
+    ) -> List[ChatCompletionMessageParam]:
+        return messages
+
+
+class TokenBudgetMemory(MemoryPolicy):
+    """
+    Keeps the prompt under a token budget.
+
+    The system prompt and the newest turns are kept, older turns are dropped, and tool results over
+    `max_tool_result_tokens` are truncated. An assistant message with tool calls is kept or dropped together with its
+    tool results so no `tool_call_id` is orphaned. The newest turn is always sent, even if it alone exceeds the budget.
+    """
+
+    max_tokens: int
+    max_tool_result_tokens: Optional[int]
+
+    def __init__(
+        self,
+        max_tokens: int,
+        max_tool_result_tokens: Optional[int] = None,
+        estimator: TokenEstimator = estimate_tokens,
+    ):
+        self.max_tokens = max_tokens
+        self.max_tool_result_tokens = max_tool_result_tokens
+        self.estimator = estimator
+
+    def select(
+        self, messages: List[ChatCompletionMessageParam]
+    ) -> List[ChatCompletionMessageParam]:
+        messages = [self._truncate(m) for m in messages]
+        head = messages[:1] if messages and messages[0].get("role") == "system" else []
+        budget = self.max_tokens - sum(self.estimator(m) for m in head)
+        kept = []
+        for turn in reversed(_turns(messages[len(head) :])):
+            cost = sum(self.estimator(m) for m in turn)
+            if kept and cost > budget:
+                break
+            budget -= cost
+            kept.append(turn)
+        return head + [m for turn in reversed(kept) for m in turn]
+
+    def _truncate(
+        self, message: ChatCompletionMessageParam
+    ) -> ChatCompletionMessageParam:
+        if self.max_tool_result_tokens is None or message.get("role") != "tool":
+            return message
+        content = _text(message.get("content"))
+        limit = self.max_tool_result_tokens * _CHARS_PER_TOKEN
+        if len(content) <= limit:
+            return message
+        elided = -(-(len(content) - limit) // _CHARS_PER_TOKEN)
+        return {
+            **message,
+            "content": f"{content[:limit]}\n...[truncated ~{elided} tokens]",
+        }
+
+
+def _turns(
+    messages: List[ChatCompletionMessageParam],
+) -> List[List[ChatCompletionMessageParam]]:
+    """Groups messages so that assistant tool calls and their results stay together."""
+    turns = []
+    pending_ids = set()
+    for message in messages:
+        if message.get("role") == "tool" and message.get("tool_call_id") in pending_ids:
+            turns[-1].append(message)
+            pending_ids.discard(message["tool_call_id"])
+            continue
+        turns.append([message])
+        pending_ids = {tc["id"] for tc in message.get("tool_calls") or []}
+    return turns
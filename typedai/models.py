@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from collections import defaultdict
+import asyncio
+import inspect
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from functools import partial
+from time import perf_counter
 from typing import (
     List,
     Callable,
@@ -8,13 +12,18 @@ from typing import (
     TypeVar,
     Literal,
     Iterable,
+    AsyncIterable,
+    AsyncIterator,
+    Iterator,
     Type,
     Tuple,
     Any,
     Optional,
+    Union,
 )
 
-from openai import Stream, BaseModel
+from openai import AsyncStream, Stream, BaseModel
+from pydantic_core import PydanticUndefined
 from openai.types import FunctionDefinition
 from openai.types.chat import (
     ChatCompletion,
@@ -25,8 +34,17 @@ from openai.types.chat import (
     ChatCompletionChunk,
 )
 from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_chunk import (
+    Choice as ChunkChoice,
+    ChoiceDeltaToolCall,
+)
 from openai.types.chat.chat_completion_message_tool_call import Function
 from typedai.errors import ToolArgumentParsingError, ContentParsingError
+from typedai.execution import ToolPolicy, tool_policy
+from typedai.instrumentation import emit, hooks
+from typedai.memo import MISSING, memo_lookup
+from typedai.memory import CycleStats
+from typedai.partial import PartialJSONParser, PartialSnapshots
 
 T = TypeVar("T")
 
@@ -35,26 +53,100 @@ HANDLE_PARSE_ERROR = "parsing"
 HANDLE_ANY_ERROR = "any"
 ToolErrorHandling = Literal[ALWAYS_RAISE, HANDLE_PARSE_ERROR, HANDLE_ANY_ERROR]
 
+SEQUENTIAL = "sequential"
+CONCURRENT = "concurrent"
+ToolExecution = Literal[SEQUENTIAL, CONCURRENT]
+
 
 class TypedChatCompletion(ChatCompletion, Generic[T]):
     _parser: Callable[[Optional[str]], T]
     _functions: dict[str, Tuple[Callable, Type[BaseModel], Any]]
+    # results of tool calls already started while streaming, keyed by tool call id
+    _tool_results: Optional[dict[str, Union[Future, asyncio.Future]]] = None
+    _cycles: Optional[List[CycleStats]] = None
+    # per-conversation memoized tool results, set by create_to_completion
+    _conversation: Optional[dict] = None
+
+    @property
+    def cycles(self) -> Optional[List[CycleStats]]:
+        """Per-cycle prompt sizes when this completion was produced by create_to_completion."""
+        return self._cycles
+
+    @classmethod
+    def from_completion(
+        cls, completion: ChatCompletion, parser: Callable, functions: dict
+    ) -> TypedChatCompletion[T]:
+        """
+        Wraps an already validated ChatCompletion without dumping or re-validating it.
+
+        The typed completion shares the completion's choices (and other sub models) rather than copying them.
+        """
+        typed = cls.__new__(cls)
+        object.__setattr__(typed, "__dict__", dict(completion.__dict__))
+        object.__setattr__(
+            typed, "__pydantic_extra__", _copy_or_none(completion.__pydantic_extra__)
+        )
+        object.__setattr__(
+            typed, "__pydantic_fields_set__", set(completion.__pydantic_fields_set__)
+        )
+        object.__setattr__(typed, "__pydantic_private__", _private_defaults(cls))
+        typed._parser = parser
+        typed._functions = functions
+        return typed
 
     def parse_content(self, choice: int = 0) -> T:
         choice_ = self.choices[choice]
+        started = perf_counter() if hooks else None
         try:
-            return self._parser(choice_.message.content)
+            parsed = self._parser(choice_.message.content)
         except Exception as e:
+            if started is not None:
+                emit("parsed", perf_counter() - started, e)
             raise ContentParsingError(choice_.message.content, e) from e
+        if started is not None:
+            emit("parsed", perf_counter() - started, None)
+        return parsed
+
+    def first_valid_choice(self, start: int = 0) -> Optional[int]:
+        """Index of the first choice (from `start`) whose content parses, for completions requested with `n > 1`."""
+        for index in range(start, len(self.choices)):
+            try:
+                self.parse_content(index)
+            except ContentParsingError:
+                continue
+            return index
+        return None
+
+    def promote_choice(self, choice: int):
+        """Moves a choice to the front, so the defaults (`parse_content()`, `build_messages()`...) use it."""
+        self.choices.insert(0, self.choices.pop(choice))
 
     def build_messages(
         self,
         choice: int = 0,
         tool_error_handling: ToolErrorHandling = HANDLE_PARSE_ERROR,
+        tool_execution: ToolExecution = SEQUENTIAL,
+        executor: Optional[Executor] = None,
     ) -> List[ChatCompletionMessageParam]:
         return [
             self.choices[choice].message.model_dump(),
-            *self.build_tool_completions(choice, tool_error_handling),
+            *self.build_tool_completions(
+                choice, tool_error_handling, tool_execution, executor
+            ),
+        ]
+
+    async def abuild_messages(
+        self,
+        choice: int = 0,
+        tool_error_handling: ToolErrorHandling = HANDLE_PARSE_ERROR,
+        tool_execution: ToolExecution = SEQUENTIAL,
+        executor: Optional[Executor] = None,
+    ) -> List[ChatCompletionMessageParam]:
+        return [
+            self.choices[choice].message.model_dump(),
+            *await self.abuild_tool_completions(
+                choice, tool_error_handling, tool_execution, executor
+            ),
         ]
 
     def has_tool_calls(self, choice: int = 0) -> bool:
@@ -64,154 +156,709 @@ class TypedChatCompletion(ChatCompletion, Generic[T]):
         self,
         choice: int = 0,
         tool_error_handling: ToolErrorHandling = HANDLE_PARSE_ERROR,
+        tool_execution: ToolExecution = SEQUENTIAL,
+        executor: Optional[Executor] = None,
     ) -> List[ChatCompletionToolMessageParam]:
-        acc = []
-        for tc in self.choices[choice].message.tool_calls or []:
-            try:
-                result = self.execute_tool_call(tc)
-                acc.append(
-                    ChatCompletionToolMessageParam(
-                        content=str(result), role="tool", tool_call_id=tc.id
-                    )
-                )
-            except ToolArgumentParsingError as e:
-                if tool_error_handling in {HANDLE_ANY_ERROR, HANDLE_PARSE_ERROR}:
-                    content = (
-                        f"Error parsing arguments\n{type(e.error).__name__}: {e.error}"
-                    )
-                    acc.append(
-                        ChatCompletionToolMessageParam(
-                            content=content, role="tool", tool_call_id=tc.id
-                        )
-                    )
-                else:
-                    raise e
-            except Exception as e:
-                if tool_error_handling == HANDLE_ANY_ERROR:
-                    content = f"Error during tool execution\n{type(e).__name__}: {e}"
-                    acc.append(
-                        ChatCompletionToolMessageParam(
-                            content=content, role="tool", tool_call_id=tc.id
+        """
+        Executes the tool calls of a choice and builds the tool messages to send back to the llm.
+
+        With tool_execution=CONCURRENT the calls run on `executor` (or a temporary thread pool) and the messages are
+        returned in the original tool call order.
+        """
+        tool_calls = self.choices[choice].message.tool_calls or []
+        run = partial(self._tool_call_message, tool_error_handling=tool_error_handling)
+        if tool_execution == CONCURRENT and len(tool_calls) > 1:
+            if executor is None:
+                with ThreadPoolExecutor(max_workers=len(tool_calls)) as pool:
+                    return list(pool.map(run, tool_calls))
+            return list(executor.map(run, tool_calls))
+        return [run(tc) for tc in tool_calls]
+
+    async def abuild_tool_completions(
+        self,
+        choice: int = 0,
+        tool_error_handling: ToolErrorHandling = HANDLE_PARSE_ERROR,
+        tool_execution: ToolExecution = SEQUENTIAL,
+        executor: Optional[Executor] = None,
+    ) -> List[ChatCompletionToolMessageParam]:
+        """
+        Async version of build_tool_completions.
+
+        With tool_execution=CONCURRENT coroutine tools are gathered and sync tools run on `executor` (or the loop's
+        default executor) so they do not block the event loop.
+        """
+        tool_calls = self.choices[choice].message.tool_calls or []
+        if tool_execution == CONCURRENT and len(tool_calls) > 1:
+            return list(
+                await asyncio.gather(
+                    *(
+                        self._atool_call_message(
+                            tc, tool_error_handling, offload=True, executor=executor
                         )
+                        for tc in tool_calls
                     )
-                else:
-                    raise e
-        return acc
+                )
+            )
+        return [
+            await self._atool_call_message(tc, tool_error_handling, offload=False)
+            for tc in tool_calls
+        ]
 
     def execute_tool_call(self, tool_call: ChatCompletionMessageToolCall) -> Any:
-        fn, parser, _ = self._functions[tool_call.function.name]
+        if self._tool_results and tool_call.id in self._tool_results:
+            return self._tool_results[tool_call.id].result()
+        fn, kwargs = self._prepare_tool_call(tool_call)
+        return _call_tool(fn, kwargs, self._conversation)
+
+    async def aexecute_tool_call(self, tool_call: ChatCompletionMessageToolCall) -> Any:
+        return await self._aexecute_tool_call(tool_call, offload=False)
+
+    async def _aexecute_tool_call(
+        self,
+        tool_call: ChatCompletionMessageToolCall,
+        offload: bool,
+        executor: Optional[Executor] = None,
+    ) -> Any:
+        if self._tool_results and tool_call.id in self._tool_results:
+            started = self._tool_results[tool_call.id]
+            if isinstance(started, Future):
+                started = asyncio.wrap_future(started)
+            return await started
+        fn, kwargs = self._prepare_tool_call(tool_call)
+        return await _acall_tool(fn, kwargs, offload, executor, self._conversation)
+
+    def _tool_call_message(
+        self,
+        tool_call: ChatCompletionMessageToolCall,
+        tool_error_handling: ToolErrorHandling,
+    ) -> ChatCompletionToolMessageParam:
+        try:
+            result = self.execute_tool_call(tool_call)
+        except Exception as e:
+            return _tool_error_message(tool_call, e, tool_error_handling)
+        return _tool_result_message(tool_call, result)
+
+    async def _atool_call_message(
+        self,
+        tool_call: ChatCompletionMessageToolCall,
+        tool_error_handling: ToolErrorHandling,
+        offload: bool,
+        executor: Optional[Executor] = None,
+    ) -> ChatCompletionToolMessageParam:
         try:
-            parsed = parser.model_validate_json(tool_call.function.arguments)
+            result = await self._aexecute_tool_call(tool_call, offload, executor)
         except Exception as e:
-            raise ToolArgumentParsingError(e) from e
-        return fn(**{k: v for k, v in parsed})
+            return _tool_error_message(tool_call, e, tool_error_handling)
+        return _tool_result_message(tool_call, result)
 
+    def _prepare_tool_call(
+        self, tool_call: ChatCompletionMessageToolCall
+    ) -> Tuple[Callable, dict]:
+        return _prepare_tool_call(self._functions, tool_call)
 
-class TypedStream(Iterable[ChatCompletionChunk], Generic[T]):
-    stream: Stream
-    _seen: List[ChatCompletionChunk]
+
+def _private_defaults(cls: Type[BaseModel]) -> dict:
+    defaults = {}
+    for name, private in cls.__private_attributes__.items():
+        default = private.get_default()
+        if default is not PydanticUndefined:
+            defaults[name] = default
+    return defaults
+
+
+def _copy_or_none(d: Optional[dict]) -> Optional[dict]:
+    return None if d is None else dict(d)
+
+
+def _prepare_tool_call(
+    functions: dict, tool_call: ChatCompletionMessageToolCall
+) -> Tuple[Callable, dict]:
+    fn, parser, _ = functions[tool_call.function.name]
+    try:
+        parsed = parser.model_validate_json(tool_call.function.arguments)
+    except Exception as e:
+        raise ToolArgumentParsingError(e) from e
+    return fn, {k: v for k, v in parsed}
+
+
+def _call_tool(fn: Callable, kwargs: dict, conversation: Optional[dict] = None) -> Any:
+    memo, store, key, result = memo_lookup(fn, kwargs, conversation)
+    if result is not MISSING:
+        return result
+    policy = tool_policy(fn)
+    started = perf_counter() if hooks or policy is not None else None
+    try:
+        if policy is None or inspect.iscoroutinefunction(fn):
+            result = fn(**kwargs)
+        else:
+            result = policy.run(fn, kwargs)
+        if inspect.isawaitable(result):
+            if policy is not None:
+                result = policy.wait(result, fn)
+            result = _run_coroutine(result)
+    except BaseException as e:
+        _record_tool_call(fn, policy, started, e)
+        raise
+    _record_tool_call(fn, policy, started, None)
+    if memo is not None:
+        memo.set(store, key, result)
+    return result
+
+
+async def _acall_tool(
+    fn: Callable,
+    kwargs: dict,
+    offload: bool,
+    executor: Optional[Executor] = None,
+    conversation: Optional[dict] = None,
+) -> Any:
+    """Runs a tool from async code, sync tools are run on `executor` when `offload` is set."""
+    memo, store, key, result = memo_lookup(fn, kwargs, conversation)
+    if result is not MISSING:
+        return result
+    policy = tool_policy(fn)
+    started = perf_counter() if hooks or policy is not None else None
+    try:
+        if policy is not None:
+            result = await policy.arun(fn, kwargs, offload, executor)
+        elif offload and not inspect.iscoroutinefunction(fn):
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(executor, partial(fn, **kwargs))
+        else:
+            result = fn(**kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+    except BaseException as e:
+        _record_tool_call(fn, policy, started, e)
+        raise
+    _record_tool_call(fn, policy, started, None)
+    if memo is not None:
+        memo.set(store, key, result)
+    return result
+
+
+def _record_tool_call(
+    fn: Callable,
+    policy: Optional[ToolPolicy],
+    started: Optional[float],
+    error: Optional[BaseException],
+):
+    if started is None:
+        return
+    elapsed = perf_counter() - started
+    if policy is not None:
+        policy.record(elapsed, error)
+    if hooks:
+        emit("tool_call", _tool_name(fn), elapsed, error)
+
+
+def _tool_name(fn: Callable) -> str:
+    return getattr(fn, "__name__", repr(fn))
+
+
+def _tool_result_message(
+    tool_call: ChatCompletionMessageToolCall, result: Any
+) -> ChatCompletionToolMessageParam:
+    return ChatCompletionToolMessageParam(
+        content=str(result), role="tool", tool_call_id=tool_call.id
+    )
+
+
+def _tool_error_message(
+    tool_call: ChatCompletionMessageToolCall,
+    e: Exception,
+    tool_error_handling: ToolErrorHandling,
+) -> ChatCompletionToolMessageParam:
+    if isinstance(e, ToolArgumentParsingError):
+        if tool_error_handling in {HANDLE_ANY_ERROR, HANDLE_PARSE_ERROR}:
+            content = f"Error parsing arguments\n{type(e.error).__name__}: {e.error}"
+            return ChatCompletionToolMessageParam(
+                content=content, role="tool", tool_call_id=tool_call.id
+            )
+    elif tool_error_handling == HANDLE_ANY_ERROR:
+        content = f"Error during tool execution\n{type(e).__name__}: {e}"
+        return ChatCompletionToolMessageParam(
+            content=content, role="tool", tool_call_id=tool_call.id
+        )
+    raise e
+
+
+def _run_coroutine(awaitable):
+    """Run a coroutine tool from synchronous code, even if an event loop is already running."""
+
+    async def _await():
+        return await awaitable
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_await())
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, _await()).result()
+
+
+class _Parts:
+    """String builder that compacts itself on read, so repeated reads mid-stream stay cheap."""
+
+    __slots__ = ("_parts",)
+
+    def __init__(self):
+        self._parts = []
+
+    def append(self, part: str):
+        self._parts.append(part)
+
+    def value(self) -> str:
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+
+class _ToolCallAccumulator:
+    __slots__ = ("id", "type", "name", "arguments", "complete")
+
+    def __init__(self):
+        self.complete = False
+        self.id = None
+        self.type = "function"
+        self.name = _Parts()
+        self.arguments = _Parts()
+
+    def add(self, delta: ChoiceDeltaToolCall):
+        self.id = self.id or delta.id
+        if delta.function:
+            if delta.function.name:
+                self.name.append(delta.function.name)
+            if delta.function.arguments:
+                self.arguments.append(delta.function.arguments)
+
+    def build(self) -> ChatCompletionMessageToolCall:
+        # deltas were validated by the sdk, so build without validating again
+        function = Function.construct(
+            name=self.name.value(), arguments=self.arguments.value()
+        )
+        return ChatCompletionMessageToolCall.construct(
+            id=self.id, type=self.type, function=function
+        )
+
+
+class _ChoiceAccumulator:
+    """Running state of one choice, each delta is folded in as it arrives."""
+
+    __slots__ = (
+        "index",
+        "content",
+        "tool_calls",
+        "finish_reason",
+        "json",
+        "checked",
+        "snapshots",
+    )
+
+    def __init__(self, index: int):
+        self.index = index
+        self.content = _Parts()
+        self.tool_calls: dict[int, _ToolCallAccumulator] = {}
+        self.finish_reason = "stop"
+        self.json: Optional[PartialJSONParser] = None  # created on first partial read
+        self.checked = False  # content was validated by first_valid
+        # created on first partial read
+        self.snapshots: Optional[PartialSnapshots] = None
+
+    def add(self, choice: ChunkChoice) -> List[_ToolCallAccumulator]:
+        """Folds in a chunk's delta, returning the tool calls whose arguments it completed."""
+        completed = []
+        delta = choice.delta
+        if delta.content:
+            self.content.append(delta.content)
+            if self.json is not None:
+                self.json.feed(delta.content)
+        for tc in delta.tool_calls or []:
+            acc = self.tool_calls.get(tc.index)
+            if acc is None:
+                # a new index starting means the previous tool calls are complete
+                completed.extend(t for t in self.tool_calls.values() if not t.complete)
+                acc = self.tool_calls[tc.index] = _ToolCallAccumulator()
+            acc.add(tc)
+        if choice.finish_reason:
+            self.finish_reason = choice.finish_reason
+            completed.extend(t for t in self.tool_calls.values() if not t.complete)
+        for tc in completed:
+            tc.complete = True
+        return completed
+
+    def build(self) -> Choice:
+        tool_calls = [tc.build() for tc in self.tool_calls.values()]
+        message = ChatCompletionMessage.construct(
+            content=self.content.value() or None,
+            role="assistant",
+            tool_calls=tool_calls or None,
+        )
+        return Choice.construct(
+            finish_reason=self.finish_reason,
+            index=self.index,
+            message=message,
+            logprobs=None,
+        )
+
+
+class _BaseTypedStream(Generic[T]):
+    _seen: Optional[List[ChatCompletionChunk]]
+    _last: Optional[ChatCompletionChunk]
+    _choices: dict[int, _ChoiceAccumulator]
     _terminated: bool
     _parser: Callable[[Optional[str]], T]
     _functions: dict[str, Tuple[Callable, Type[BaseModel], FunctionDefinition], Any]
+    _response_type: Optional[Type[T]]
 
-    def __init__(self, stream, parser: Callable[[Optional[str]], T], functions):
-        self.stream = stream
-        self._seen = []
+    def __init__(
+        self,
+        parser: Callable[[Optional[str]], T],
+        functions,
+        keep_chunks: bool = True,
+        response_type: Optional[Type[T]] = None,
+        eager_tools: bool = False,
+        executor: Optional[Executor] = None,
+        requested_at: Optional[float] = None,
+    ):
+        """
+        :param keep_chunks: Keep every raw chunk in `_seen`. When False only the running per-choice state and the last
+            chunk are retained, so memory stays bounded regardless of the length of the generation.
+        :param eager_tools: Start executing the first choice's tool calls as soon as their arguments are complete (the
+            next tool call starts or the choice finishes) rather than when messages are built, so tool latency overlaps
+            with generation. Arguments are validated before the call is handed to `executor`.
+        :param executor: Executor used for eager sync tools (defaults to a thread pool owned by the stream).
+        :param requested_at: `perf_counter()` when the request was sent, used to time the first chunk for hooks.
+        """
+        self._seen = [] if keep_chunks else None
+        self._last = None
+        self._choices = {}
         self._terminated = False
         self._parser = parser
         self._functions = functions
+        self._response_type = response_type
+        self._eager_tools = eager_tools
+        self._executor = executor
+        self._owns_executor = False
+        self._tool_results = {}
+        self._chunk_at = requested_at
+
+    def partial(self, choice: int = 0) -> Optional[T]:
+        """
+        Snapshot of the response parsed from the content seen so far, without advancing the stream.
+
+        JSON responses are parsed incrementally, fields are filled in as their values close. The snapshot is not
+        validated, use `completion().parse_content()` for the final strict parse.
+        """
+        return self._snapshot(choice)[1]
+
+    def _snapshot(self, choice: int) -> Tuple[int, Optional[T]]:
+        acc = self._choices.get(choice)
+        if acc is None:
+            return 0, None
+        if self._response_type in (None, str):
+            content = acc.content.value()
+            return len(content), content or None
+        if acc.json is None:
+            acc.json = PartialJSONParser().feed(acc.content.value())
+        if acc.snapshots is None:
+            acc.snapshots = PartialSnapshots(self._response_type)
+        return acc.json.version, acc.snapshots.snapshot(acc.json)
+
+    def _record(self, chunk) -> ChatCompletionChunk:
+        if not isinstance(chunk, ChatCompletionChunk):
+            raise ValueError(f"Expected ChatCompletionChunk, got {type(chunk)}")
+        if hooks:
+            self._time_chunk(chunk)
+        if self._seen is not None:
+            self._seen.append(chunk)
+        self._last = chunk
+        for choice in chunk.choices:
+            acc = self._choices.get(choice.index)
+            if acc is None:
+                acc = self._choices[choice.index] = _ChoiceAccumulator(choice.index)
+            completed = acc.add(choice)
+            if self._eager_tools and choice.index == 0:
+                for tc in completed:
+                    self._tool_results[tc.id] = self._start_tool_call(tc.build())
+        return chunk
+
+    def _valid_choice(self, chunk: ChatCompletionChunk) -> Optional[int]:
+        """
+        Index of a choice in `chunk` whose content is now complete and passes validation.
+
+        JSON content is validated once, when its top level value closes (tracked incrementally), text content when
+        the choice finishes.
+        """
+        for choice in chunk.choices:
+            acc = self._choices[choice.index]
+            if acc.checked or not self._content_complete(acc, choice.finish_reason):
+                continue
+            acc.checked = True
+            content = acc.content.value()
+            if not content:
+                continue
+            try:
+                self._parser(content)
+            except Exception:
+                continue
+            return choice.index
+        return None
+
+    def _content_complete(
+        self, acc: _ChoiceAccumulator, finish_reason: Optional[str]
+    ) -> bool:
+        if finish_reason:
+            return True
+        if self._response_type in (None, str):
+            return False
+        if acc.json is None:
+            acc.json = PartialJSONParser().feed(acc.content.value())
+        return acc.json.complete
+
+    def _time_chunk(self, chunk: ChatCompletionChunk):
+        now = perf_counter()
+        if self._chunk_at is not None:
+            if self._last is None:
+                emit("first_chunk", chunk.model, now - self._chunk_at)
+            else:
+                emit("chunk_gap", now - self._chunk_at)
+        self._chunk_at = now
+
+    def _start_tool_call(self, tool_call: ChatCompletionMessageToolCall):
+        raise NotImplementedError()
+
+    def _tool_executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(thread_name_prefix="typedai-tools")
+            self._owns_executor = True
+        return self._executor
+
+    def _release_executor(self):
+        if self._owns_executor:
+            self._executor.shutdown(wait=False)
+
+    def _build_completion(self, first: Optional[int] = None) -> TypedChatCompletion[T]:
+        if self._last is None:
+            raise ValueError("No completions have been seen")
+        order = sorted(self._choices)
+        if first is not None:
+            order.remove(first)
+            order.insert(0, first)
+        choices = [self._choices[i].build() for i in order]
+
+        fields = {k: v for k, v in self._last if k != "choices"}
+        fields["choices"] = choices
+        fields["object"] = "chat.completion"
+
+        completion = TypedChatCompletion.from_completion(
+            ChatCompletion.construct(**fields), self._parser, self._functions
+        )
+        if self._tool_results:
+            completion._tool_results = dict(self._tool_results)
+        return completion
+
+
+class TypedStream(_BaseTypedStream[T], Iterable[ChatCompletionChunk]):
+    stream: Stream
+
+    def __init__(
+        self,
+        stream,
+        parser: Callable[[Optional[str]], T],
+        functions,
+        keep_chunks: bool = True,
+        response_type: Optional[Type[T]] = None,
+        eager_tools: bool = False,
+        executor: Optional[Executor] = None,
+        requested_at: Optional[float] = None,
+    ):
+        super().__init__(
+            parser,
+            functions,
+            keep_chunks,
+            response_type,
+            eager_tools,
+            executor,
+            requested_at,
+        )
+        self.stream = stream
 
     def __next__(self) -> ChatCompletionChunk:
         try:
-            next__ = self.stream.__next__()
-            if not isinstance(next__, ChatCompletionChunk):
-                raise ValueError(f"Expected ChatCompletionChunk, got {type(next__)}")
-            self._seen.append(next__)
-            return next__
+            return self._record(self.stream.__next__())
         except StopIteration:
             self._terminated = True
+            self._release_executor()
             raise
 
+    def _start_tool_call(self, tool_call: ChatCompletionMessageToolCall) -> Future:
+        try:
+            fn, kwargs = _prepare_tool_call(self._functions, tool_call)
+        except Exception as e:
+            future = Future()
+            future.set_exception(e)
+            return future
+        return self._tool_executor().submit(_call_tool, fn, kwargs)
+
     def __iter__(self) -> TypedStream:
         return self
 
+    def iter_partial(self, choice: int = 0) -> Iterator[T]:
+        """Consumes the stream, yielding a new partial snapshot each time more of the response is parsed."""
+        last_version = 0
+        for _ in self:
+            version, snapshot = self._snapshot(choice)
+            if version != last_version:
+                last_version = version
+                yield snapshot
+
     def __enter__(self) -> TypedStream:
         return self
 
     def __exit__(self, *args, **kwargs):
+        self._release_executor()
         self.stream.__exit__(*args, **kwargs)
 
+    def close(self):
+        """Stops reading and closes the response, `completion(allow_partial_iteration=True)` still works after."""
+        self._terminated = True
+        self._release_executor()
+        self.stream.close()
+
+    def first_valid(self) -> TypedChatCompletion[T]:
+        """
+        For streams requested with `n > 1`, reads until any choice's content passes validation and closes the stream
+        rather than waiting for the slowest choice.
+
+        The valid choice is moved to the front of the completion's choices (`parse_content()` returns it), choices
+        that were cut off keep the content received so far. If no choice validates the stream is read to the end and
+        the completion is returned in the original order. Call it before reading from the stream.
+        """
+        for chunk in self:
+            index = self._valid_choice(chunk)
+            if index is not None:
+                self.close()
+                return self._build_completion(first=index)
+        return self._build_completion()
+
     def messages(
         self,
         tool_error_handling: ToolErrorHandling = HANDLE_PARSE_ERROR,
         allow_partial_iteration=False,
+        tool_execution: ToolExecution = SEQUENTIAL,
+        executor: Optional[Executor] = None,
     ) -> List[ChatCompletionMessageParam]:
         return self.completion(allow_partial_iteration).build_messages(
-            tool_error_handling
+            tool_error_handling=tool_error_handling,
+            tool_execution=tool_execution,
+            executor=executor,
         )
 
     def completion(self, allow_partial_iteration=False) -> TypedChatCompletion[T]:
         if not allow_partial_iteration and not self._terminated:
             for _ in self:
                 pass
-        if not self._seen:
-            raise ValueError("No completions have been seen")
-        choice_acc = [
-            dict(content_acc=[], tool_calls={}, finish_reasons="stop")
-            for _ in self._seen[0].choices
-        ]
-        for chunk in self._seen:
-            for i in range(len(chunk.choices)):
-                delta = chunk.choices[i].delta
-                acc = choice_acc[i]
-                if delta.content:
-                    acc["content_acc"].append(delta.content)
-                if delta.tool_calls:
-                    for tc in delta.tool_calls:
-                        tc_acc = acc["tool_calls"].setdefault(
-                            tc.index,
-                            dict(id=tc.id, function=defaultdict(list), type="function"),
-                        )
-                        dumped = tc.function.model_dump(
-                            exclude={"index"}, exclude_none=True
-                        )
-                        for k, v in dumped.items():
-                            if isinstance(v, str):
-                                tc_acc["function"][k].append(v)
-                            else:
-                                raise ValueError(
-                                    f"Unexpected type {type(v)} for {k} in {dumped}"
-                                )
-                if chunk.choices[i].finish_reason:
-                    acc["finish_reasons"] = chunk.choices[i].finish_reason
-        choices = []
-        for i in range(len(choice_acc)):
-            acc = choice_acc[i]
-            content = "".join(acc["content_acc"]) or None
-            tool_calls = []
-            for tc in acc["tool_calls"].values():
-                function = Function.model_validate(
-                    {k: "".join(sub_acc) for k, sub_acc in tc["function"].items()}
-                )
-                tool_calls.append(
-                    ChatCompletionMessageToolCall(
-                        id=tc["id"], type=tc["type"], function=function
-                    )
-                )
-            message = ChatCompletionMessage.model_validate(
-                dict(content=content, role="assistant", tool_calls=tool_calls or None)
-            )
-            choices.append(
-                Choice.model_validate(
-                    dict(finish_reason=acc["finish_reasons"], index=i, message=message)
-                )
-            )
+        return self._build_completion()
 
-        dumped_chunk = self._seen[-1].model_dump(exclude={"choices"})
-        dumped_chunk["choices"] = choices
-        dumped_chunk["object"] = "chat.completion"
 
-        completion = TypedChatCompletion(**dumped_chunk)
-        completion._parser = self._parser
-        completion._functions = self._functions
-        return completion
+class AsyncTypedStream(_BaseTypedStream[T], AsyncIterable[ChatCompletionChunk]):
+    stream: AsyncStream
+
+    def __init__(
+        self,
+        stream,
+        parser: Callable[[Optional[str]], T],
+        functions,
+        keep_chunks: bool = True,
+        response_type: Optional[Type[T]] = None,
+        eager_tools: bool = False,
+        executor: Optional[Executor] = None,
+        requested_at: Optional[float] = None,
+    ):
+        super().__init__(
+            parser,
+            functions,
+            keep_chunks,
+            response_type,
+            eager_tools,
+            executor,
+            requested_at,
+        )
+        self.stream = stream
+
+    async def __anext__(self) -> ChatCompletionChunk:
+        try:
+            return self._record(await self.stream.__anext__())
+        except StopAsyncIteration:
+            self._terminated = True
+            raise
+
+    def _start_tool_call(
+        self, tool_call: ChatCompletionMessageToolCall
+    ) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        try:
+            fn, kwargs = _prepare_tool_call(self._functions, tool_call)
+        except Exception as e:
+            future = loop.create_future()
+            future.set_exception(e)
+            return future
+        if inspect.iscoroutinefunction(fn):
+            return asyncio.ensure_future(_acall_tool(fn, kwargs, offload=False))
+        # sync tools run on the loop's default executor unless one was provided
+        return loop.run_in_executor(self._executor, partial(_call_tool, fn, kwargs))
+
+    def __aiter__(self) -> AsyncTypedStream:
+        return self
+
+    async def iter_partial(self, choice: int = 0) -> AsyncIterator[T]:
+        """Consumes the stream, yielding a new partial snapshot each time more of the response is parsed."""
+        last_version = 0
+        async for _ in self:
+            version, snapshot = self._snapshot(choice)
+            if version != last_version:
+                last_version = version
+                yield snapshot
+
+    async def __aenter__(self) -> AsyncTypedStream:
+        return self
+
+    async def __aexit__(self, *args, **kwargs):
+        await self.stream.__aexit__(*args, **kwargs)
+
+    async def close(self):
+        """Stops reading and closes the response, `completion(allow_partial_iteration=True)` still works after."""
+        self._terminated = True
+        result = self.stream.close()
+        if inspect.isawaitable(result):
+            await result
+
+    async def first_valid(self) -> TypedChatCompletion[T]:
+        """Async version of TypedStream.first_valid."""
+        async for chunk in self:
+            index = self._valid_choice(chunk)
+            if index is not None:
+                await self.close()
+                return self._build_completion(first=index)
+        return self._build_completion()
+
+    async def messages(
+        self,
+        tool_error_handling: ToolErrorHandling = HANDLE_PARSE_ERROR,
+        allow_partial_iteration=False,
+        tool_execution: ToolExecution = SEQUENTIAL,
+        executor: Optional[Executor] = None,
+    ) -> List[ChatCompletionMessageParam]:
+        completion = await self.completion(allow_partial_iteration)
+        return await completion.abuild_messages(
+            tool_error_handling=tool_error_handling,
+            tool_execution=tool_execution,
+            executor=executor,
+        )
+
+    async def completion(self, allow_partial_iteration=False) -> TypedChatCompletion[T]:
+        if not allow_partial_iteration and not self._terminated:
+            async for _ in self:
+                pass
+        return self._build_completion()
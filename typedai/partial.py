@@ -0,0 +1,288 @@
+from itertools import islice
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Type,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+)
+
+import openai
+from pydantic import BaseModel
+
+from typedai.config import is_wrapped_response_type
+
+T = TypeVar("T")
+
+_WHITESPACE = " \t\r\n"
+_NUMBER_CHARS = "0123456789+-.eE"
+_LITERALS = {"true": True, "false": False, "null": None}
+_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+class _Frame:
+    __slots__ = ("container", "key", "expecting_key")
+
+    def __init__(self, container):
+        self.container = container
+        self.key = None
+        self.expecting_key = isinstance(container, dict)
+
+
+class PartialJSONParser:
+    """
+    Incremental, tolerant JSON parser.
+
+    Text is fed as it arrives and each character is only scanned once. `value` holds everything parsed so far:
+    containers appear as soon as they open, scalars (strings, numbers, literals) only once they are complete. Anything
+    before the first `{` or `[` (such as a markdown fence) is ignored.
+    """
+
+    value: Any
+    complete: bool
+    version: int
+
+    def __init__(self):
+        self.value = None
+        self.complete = False
+        self.version = 0  # bumped whenever a value is added to the result
+        self._stack: List[_Frame] = []
+        self._started = False
+        self._token: Optional[List[str]] = None
+        self._token_kind: Optional[str] = None
+        self._escape: Optional[str] = None
+
+    def feed(self, text: str) -> "PartialJSONParser":
+        i = 0
+        n = len(text)
+        while i < n and not self.complete:
+            if self._token_kind == "string":
+                i = self._feed_string(text, i)
+                continue
+            c = text[i]
+            if self._token_kind is not None:  # number or literal
+                if c in _NUMBER_CHARS or c.isalpha():
+                    self._token.append(c)
+                    i += 1
+                    continue
+                self._finish_scalar()
+                continue  # reprocess c
+            i += 1
+            if not self._started:
+                if c in "{[":
+                    self._started = True
+                    self._open({} if c == "{" else [])
+                continue
+            if c in _WHITESPACE or c == ",":
+                continue
+            elif c == ":":
+                self._stack[-1].expecting_key = False
+            elif c in "{[":
+                self._open({} if c == "{" else [])
+            elif c in "}]":
+                self._stack.pop()
+                if not self._stack:
+                    self.complete = True
+            elif c == '"':
+                self._token, self._token_kind = [], "string"
+            else:
+                self._token, self._token_kind = [c], "scalar"
+        return self
+
+    def _feed_string(self, text: str, i: int) -> int:
+        n = len(text)
+        while i < n:
+            if self._escape is not None:
+                self._escape += text[i]
+                i += 1
+                if self._escape.startswith("u"):
+                    if len(self._escape) == 5:
+                        try:
+                            self._append_code_point(int(self._escape[1:], 16))
+                        except ValueError:
+                            pass  # tolerate a malformed escape rather than failing the stream
+                        self._escape = None
+                else:
+                    self._token.append(_ESCAPES.get(self._escape, self._escape))
+                    self._escape = None
+                continue
+            end = i
+            while end < n and text[end] not in '"\\':
+                end += 1
+            if end > i:
+                self._token.append(text[i:end])
+            if end == n:
+                return n
+            if text[end] == "\\":
+                self._escape = ""
+                i = end + 1
+            else:
+                self._deliver("".join(self._token))
+                self._token = self._token_kind = None
+                return end + 1
+        return n
+
+    def _append_code_point(self, code: int):
+        token = self._token
+        if (
+            0xDC00 <= code <= 0xDFFF
+            and token
+            and len(token[-1]) == 1
+            and 0xD800 <= ord(token[-1]) <= 0xDBFF
+        ):
+            # low half of a surrogate pair, combine it with the high half from the previous escape
+            token[-1] = chr(
+                0x10000 + ((ord(token[-1]) - 0xD800) << 10) + (code - 0xDC00)
+            )
+        else:
+            token.append(chr(code))
+
+    def _finish_scalar(self):
+        raw = "".join(self._token)
+        self._token = self._token_kind = None
+        if raw in _LITERALS:
+            self._deliver(_LITERALS[raw])
+        else:
+            try:
+                self._deliver(float(raw) if any(c in raw for c in ".eE") else int(raw))
+            except ValueError:
+                pass  # tolerate garbage rather than failing the stream
+
+    def _open(self, container):
+        if self._stack:
+            self._deliver(container)
+        else:
+            self.value = container
+        self._stack.append(_Frame(container))
+
+    def _deliver(self, value):
+        frame = self._stack[-1]
+        if isinstance(frame.container, list):
+            frame.container.append(value)
+        elif frame.expecting_key:
+            frame.key = value
+            return
+        else:
+            frame.container[frame.key] = value
+            frame.expecting_key = True
+        self.version += 1
+
+
+class PartialSnapshots:
+    """
+    Builds `partial_value` snapshots of a parser's value as it grows.
+
+    Containers the parser has closed no longer change, so their snapshots are built once and shared by every later
+    snapshot. Only the containers still open (the parser's stack) are rebuilt, and for those the items that are
+    already final are converted once and only copied into each new snapshot.
+    """
+
+    response_type: Type
+
+    def __init__(self, response_type: Type[T]):
+        self.response_type = response_type
+        # keyed by container id, the parser keeps the containers alive
+        self._closed: Dict[int, Any] = {}  # snapshots of closed containers
+        self._final: Dict[
+            int, Union[list, dict]
+        ] = {}  # converted final items of open containers
+        self._open: Set[int] = set()
+        self._version = -1
+        self._value = None
+
+    def snapshot(self, parser: PartialJSONParser) -> Optional[T]:
+        """Snapshot of the parser's current value, only rebuilt when the parser's version changed."""
+        if parser.version != self._version:
+            self._open = {id(frame.container) for frame in parser._stack}
+            self._version, self._value = parser.version, self.value(parser.value)
+        return self._value
+
+    def value(self, data: Any) -> Optional[T]:
+        if is_wrapped_response_type(self.response_type):
+            data = data.get("response") if isinstance(data, dict) else None
+        if data is None:
+            return None
+        if _model_type(self.response_type) is not None and not isinstance(data, dict):
+            return None
+        return self._convert(self.response_type, data)
+
+    def _convert(self, annotation, value):
+        if not isinstance(value, (dict, list)):
+            return value
+        key = id(value)
+        result = self._closed.get(key)
+        if result is None:
+            result = self._build(annotation, value, key in self._open)
+            if key not in self._open:
+                self._closed[key] = result
+                self._final.pop(key, None)
+        return result
+
+    def _build(self, annotation, value, is_open: bool):
+        if isinstance(value, list):
+            item = get_args(annotation)[0] if get_origin(annotation) is list else None
+            if not is_open:
+                return [self._convert(item, v) for v in value]
+            # every item but the last is final, the last one may be a container that is still open
+            final = self._final.setdefault(id(value), [])
+            final.extend(self._convert(item, v) for v in value[len(final) : -1])
+            return final + [self._convert(item, v) for v in value[len(final) :]]
+        model = _model_type(annotation)
+        if model is None:
+            item = get_args(annotation)[1] if get_origin(annotation) is dict else None
+            if not is_open:
+                return {k: self._convert(item, v) for k, v in value.items()}
+            final = self._final.setdefault(id(value), {})
+            keys = list(islice(value, len(final), None))
+            final.update((k, self._convert(item, value[k])) for k in keys[:-1])
+            result = dict(final)
+            result.update((k, self._convert(item, value[k])) for k in keys[-1:])
+            return result
+        values = {}
+        missing = []
+        for name, field in model.model_fields.items():
+            key = field.alias or name
+            if key in value:
+                values[name] = self._convert(field.annotation, value[key])
+            elif field.is_required():
+                missing.append(name)
+        fields_set = set(values)
+        if issubclass(model, openai.BaseModel):
+            values.update(dict.fromkeys(missing))  # as openai's construct leaves them
+        # pydantic's model_construct, openai's override would walk every (already converted) value again
+        return _model_construct(model, fields_set, **values)
+
+
+def partial_value(response_type: Type[T], data: Any) -> Optional[T]:
+    """
+    Best effort conversion of partially parsed JSON into the response type.
+
+    The `{"response": ...}` wrapper used for non object types is removed, pydantic models are built with
+    `model_construct` (no validation, missing fields fall back to their defaults) and containers are copied. Strict
+    validation still happens when the completed content is parsed. Use PartialSnapshots for repeated snapshots of a
+    growing value.
+    """
+    return PartialSnapshots(response_type).value(data)
+
+
+_model_construct = BaseModel.__dict__["model_construct"].__func__
+
+
+def _model_type(annotation) -> Optional[Type[BaseModel]]:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    return None
@@ -0,0 +1,171 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, NamedTuple, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+import httpx
+from openai import (
+    AsyncOpenAI,
+    DefaultAsyncHttpxClient,
+    DefaultHttpxClient,
+    OpenAI,
+)
+
+
+class PoolLimits(NamedTuple):
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 60.0
+    # multiplex requests over a connection, requires the `h2` package (`eidolon-typedai[http2]`)
+    http2: bool = False
+
+
+class ClientPool:
+    """
+    Process wide OpenAI / AsyncOpenAI clients that share one keep-alive connection pool.
+
+    TypedAI and AsyncTypedAI use `client_pool` when no client is passed, so building one per request reuses warm
+    connections instead of paying a new TLS handshake. Clients are cached per constructor arguments (api key, base url,
+    ...). Async clients are shared per event loop, since connections can't move between loops. Outside a running loop
+    there is no loop to share with, so each call builds a fresh async client.
+
+    Limits apply to clients created after `configure`, existing clients keep their pool.
+    """
+
+    limits: PoolLimits
+    requests: int
+
+    def __init__(self, limits: PoolLimits = PoolLimits()):
+        self.limits = limits
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._http: Optional[httpx.Client] = None
+        self._clients: Dict[Tuple, OpenAI] = {}
+        self._loops: WeakKeyDictionary = WeakKeyDictionary()
+
+    def configure(self, limits: PoolLimits):
+        """Sets the limits for new clients, dropping (but not closing) the cached ones."""
+        with self._lock:
+            self.limits = limits
+            self._http = None
+            self._clients = {}
+            self._loops = WeakKeyDictionary()
+
+    def client(self, **kwargs) -> OpenAI:
+        """A shared OpenAI client, `kwargs` are passed to `OpenAI()` the first time."""
+        key = tuple(sorted(kwargs.items()))
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                if self._http is None:
+                    self._http = DefaultHttpxClient(
+                        limits=self._httpx_limits(),
+                        http2=self.limits.http2,
+                        event_hooks=dict(request=[self._count]),
+                    )
+                client = self._clients[key] = OpenAI(http_client=self._http, **kwargs)
+            return client
+
+    def async_client(self, **kwargs) -> AsyncOpenAI:
+        """A shared AsyncOpenAI client for the running event loop, a new one when called outside a loop."""
+        key = tuple(sorted(kwargs.items()))
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # the client's connections would end up bound to whichever loop uses it first, so don't share it
+            return AsyncOpenAI(http_client=self._async_http(), **kwargs)
+        with self._lock:
+            clients = self._loops.get(loop)
+            if clients is None:
+                clients = self._loops[loop] = _AsyncClients(self._async_http(), {})
+            client = clients.clients.get(key)
+            if client is None:
+                client = clients.clients[key] = AsyncOpenAI(
+                    http_client=clients.http, **kwargs
+                )
+            return client
+
+    def warm_up(self, client: OpenAI, connections: int = 1) -> int:
+        """
+        Opens `connections` keep-alive connections to the client's base url ahead of the first request.
+
+        Returns how many were established, failures are ignored since warming up is best effort.
+        """
+
+        def head() -> bool:
+            try:
+                client._client.head(client.base_url)
+                return True
+            except httpx.HTTPError:
+                return False
+
+        with ThreadPoolExecutor(max_workers=connections) as pool:
+            return sum(pool.map(lambda _: head(), range(connections)))
+
+    async def awarm_up(self, client: AsyncOpenAI, connections: int = 1) -> int:
+        """Async version of warm_up."""
+
+        async def head() -> bool:
+            try:
+                await client._client.head(client.base_url)
+                return True
+            except httpx.HTTPError:
+                return False
+
+        return sum(await asyncio.gather(*(head() for _ in range(connections))))
+
+    def stats(self) -> Dict[str, int]:
+        """Requests sent and connections held across the shared pools."""
+        with self._lock:
+            pools = [c.http for c in self._loops.values()]
+            if self._http is not None:
+                pools.append(self._http)
+            clients = len(self._clients) + sum(
+                len(c.clients) for c in self._loops.values()
+            )
+        connections = [c for http in pools for c in _connections(http)]
+        idle = sum(1 for c in connections if c.is_idle())
+        return dict(
+            requests=self.requests,
+            clients=clients,
+            connections=len(connections),
+            active=len(connections) - idle,
+            idle=idle,
+            max_connections=self.limits.max_connections,
+        )
+
+    def _async_http(self) -> httpx.AsyncClient:
+        return DefaultAsyncHttpxClient(
+            limits=self._httpx_limits(),
+            http2=self.limits.http2,
+            event_hooks=dict(request=[self._acount]),
+        )
+
+    def _httpx_limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.limits.max_connections,
+            max_keepalive_connections=self.limits.max_keepalive_connections,
+            keepalive_expiry=self.limits.keepalive_expiry,
+        )
+
+    def _count(self, request: httpx.Request):
+        with self._lock:
+            self.requests += 1
+
+    async def _acount(self, request: httpx.Request):
+        self._count(request)
+
+
+class _AsyncClients(NamedTuple):
+    http: httpx.AsyncClient
+    clients: Dict[Tuple, AsyncOpenAI]
+
+
+def _connections(http) -> list:
+    """Connections of an httpx client's pool, empty when the transport isn't httpx's default."""
+    pool = getattr(getattr(http, "_transport", None), "_pool", None)
+    return list(getattr(pool, "connections", ()))
+
+
+client_pool = ClientPool()
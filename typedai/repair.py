@@ -0,0 +1,169 @@
+import json
+import re
+from typing import Any, Callable, Iterator, List, NamedTuple, Optional, Tuple
+
+_FENCE = re.compile(r"```[\w-]*[ \t]*\n?(.*?)(?:```|\Z)", re.S)
+_WHITESPACE = " \t\r\n"
+# keys the `{"response": ...}` wrapper has been seen under, including an old misspelling from our own schema
+_WRAPPER_KEYS = ("response", "resopose")
+_LITERALS = ("true", "false", "null")
+
+
+class Repair(NamedTuple):
+    content: str  # repaired json content, accepted by the parser
+    value: Any  # the parsed value
+    fixes: List[str]  # names of the fixes applied
+
+
+def repair_content(
+    content: Optional[str], parser: Callable[[str], Any], truncated: bool = False
+) -> Optional[Repair]:
+    """
+    Tries cheap deterministic fixes on content that failed to parse, re-validating each candidate with `parser`.
+
+    Handles markdown code fences and surrounding prose, trailing commas, missing closing braces after a complete value
+    and a missing, extra or misspelled `{"response": ...}` wrapper. Returns None if nothing worked.
+
+    :param truncated: Also repair output cut off mid value, closing unterminated strings and dropping incomplete
+        members. The result then silently lacks whatever was cut off, so this is opt in.
+    """
+    if content is None:
+        return None
+    text, fixes = repair_json(content, truncated)
+    if text is None:
+        return None
+    try:
+        value = json.loads(text)
+    except ValueError:
+        return None
+    for candidate, extra in _candidates(value):
+        try:
+            parsed = parser(candidate)
+        except Exception:
+            continue
+        return Repair(candidate, parsed, fixes + extra)
+    return None
+
+
+def repair_json(text: str, truncated: bool = False) -> Tuple[Optional[str], List[str]]:
+    """
+    Syntactic repairs, returns the repaired json text (None if there is no json to repair) and the fixes applied.
+
+    Output that ends early only gets its missing closers added when it ends after a complete value, unless `truncated`
+    is set (see repair_content).
+    """
+    fixes = []
+    fence = _FENCE.search(text)
+    if fence:
+        text = fence.group(1)
+        fixes.append("code_fence")
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return None, fixes
+    start = min(starts)
+    if text[:start].strip():
+        fixes.append("leading_text")
+
+    out: List[str] = []
+    stack: List[str] = []  # expected closers
+    # per open container, position in `out` of its last comma
+    commas: List[Optional[int]] = []
+    # per open container, whether its next string is an object key
+    expect_key: List[bool] = []
+    # kind of the last token outside strings: open, key, colon, comma, value or scalar
+    last = None
+    in_string = escape = False
+    i, n = start, len(text)
+    while i < n:
+        c = text[i]
+        i += 1
+        if in_string:
+            out.append(c)
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+            continue
+        if c not in _WHITESPACE:
+            last = "scalar"
+        if c == ",":
+            j = i
+            while j < n and text[j] in _WHITESPACE:
+                j += 1
+            if j < n and text[j] in "}]":
+                fixes.append("trailing_comma")
+                continue
+            commas[-1] = len(out)
+            expect_key[-1] = stack[-1] == "}"
+            last = "comma"
+        elif c == ":":
+            expect_key[-1] = False
+            last = "colon"
+        elif c in "}]":
+            # a mismatched closer is replaced by the expected one
+            out.append(stack.pop())
+            commas.pop()
+            expect_key.pop()
+            last = "value"
+            if not stack:
+                if text[i:].strip():
+                    fixes.append("trailing_text")
+                return "".join(out), fixes
+            continue
+        elif c in "{[":
+            stack.append("}" if c == "{" else "]")
+            commas.append(None)
+            expect_key.append(c == "{")
+            last = "open"
+        elif c == '"':
+            in_string = True
+            last = "key" if expect_key[-1] else "value"
+        out.append(c)
+
+    if not truncated:
+        # a value the output ended on might be cut short, except for closed strings, containers and literals
+        tail = "".join(out).rstrip(_WHITESPACE)
+        complete = not in_string and (
+            last == "value" or (last == "scalar" and tail.endswith(_LITERALS))
+        )
+        if not complete:
+            return None, fixes
+        fixes.append("missing_closers")
+        return _close(out, stack), fixes
+    fixes.append("truncated")
+    if in_string:
+        if escape:
+            out.pop()
+        out.append('"')
+    closed = _close(out, stack)
+    try:
+        json.loads(closed)
+        return closed, fixes
+    except ValueError:
+        pass
+    # drop the incomplete last member of the innermost container that has a complete one
+    for depth in reversed(range(len(stack))):
+        if commas[depth] is not None:
+            return _close(out[: commas[depth]], stack[: depth + 1]), fixes
+    return closed, fixes
+
+
+def _close(out: List[str], stack: List[str]) -> str:
+    text = "".join(out).rstrip(_WHITESPACE).rstrip(",")
+    if text.endswith(":"):
+        text += "null"
+    return text + "".join(reversed(stack))
+
+
+def _candidates(value: Any) -> Iterator[Tuple[str, List[str]]]:
+    yield json.dumps(value), []
+    if isinstance(value, dict) and len(value) == 1:
+        ((key, inner),) = value.items()
+        if key in _WRAPPER_KEYS:
+            yield json.dumps(inner), ["unwrapped_response"]
+            if key != "response":
+                yield json.dumps(dict(response=inner)), ["renamed_response"]
+    if not (isinstance(value, dict) and "response" in value):
+        yield json.dumps(dict(response=value)), ["wrapped_response"]
@@ -0,0 +1,351 @@
+import threading
+import time
+import weakref
+from types import SimpleNamespace
+from typing import Any, Dict, List, Literal, Optional, Set, Union
+
+import httpx
+
+from .hedging import HedgingPolicy, _retry_after
+
+LEAST_OUTSTANDING = "least_outstanding"
+EWMA = "ewma"
+RoutingStrategy = Literal[LEAST_OUTSTANDING, EWMA]
+
+
+class Backend:
+    """
+    One endpoint of a RoutedClient, an OpenAI / AzureOpenAI client along with its live stats.
+
+    The client is used with `max_retries=0`: failing over to another backend replaces the sdk's retries on the same
+    key, which would only keep hitting the rate limit before the router gets to react.
+
+    :param model_map: Model names to send in place of the requested ones, such as Azure deployment names.
+    """
+
+    client: Any
+    name: str
+    model_map: Dict[str, str]
+    requests: int
+    failures: int
+    outstanding: int
+    # exponentially weighted moving average of the time until create() returns (streams: to the response headers), in
+    # seconds
+    latency: Optional[float]
+    consecutive_failures: int
+    cooldown_until: float
+
+    def __init__(
+        self,
+        client,
+        name: Optional[str] = None,
+        model_map: Optional[Dict[str, str]] = None,
+    ):
+        with_options = getattr(client, "with_options", None)
+        self.client = client if with_options is None else with_options(max_retries=0)
+        self.name = name or str(getattr(client, "base_url", None) or client)
+        self.model_map = model_map or {}
+        self.requests = 0
+        self.failures = 0
+        self.outstanding = 0
+        self.latency = None
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    def healthy(self, now: float) -> bool:
+        return self.cooldown_until <= now
+
+    def create(self, kwargs: dict, raw: bool):
+        completions = self.client.chat.completions
+        if raw:
+            completions = completions.with_raw_response
+        model = kwargs.get("model")
+        if model in self.model_map:
+            kwargs = dict(kwargs, model=self.model_map[model])
+        return completions.create(**kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(
+            requests=self.requests,
+            failures=self.failures,
+            outstanding=self.outstanding,
+            latency=self.latency,
+            healthy=self.healthy(time.monotonic()),
+        )
+
+
+class Router:
+    """
+    Picks the backend for each request and tracks backend health, shared by RoutedClient and AsyncRoutedClient.
+
+    With `least_outstanding` the backend with the fewest requests in flight is used, with `ewma` the one with the
+    lowest latency average scaled by its requests in flight (backends without a latency yet are tried first). A
+    request failing with 429 / 5xx or a connection error is retried on another backend and the failing one is cooled
+    down for `cooldown` seconds, doubling with each consecutive failure up to `max_cooldown` (or for as long as its
+    `retry-after` asks). When every backend is cooling down the one that recovers first is used.
+    """
+
+    backends: List[Backend]
+    strategy: RoutingStrategy
+    decay: float
+    cooldown: float
+    max_cooldown: float
+
+    def __init__(
+        self,
+        backends: List[Backend],
+        strategy: RoutingStrategy = LEAST_OUTSTANDING,
+        decay: float = 0.3,
+        cooldown: float = 5.0,
+        max_cooldown: float = 60.0,
+    ):
+        if not backends:
+            raise ValueError("At least one backend is required")
+        if strategy not in (LEAST_OUTSTANDING, EWMA):
+            raise ValueError(f"Unknown routing strategy {strategy}")
+        names = set()
+        for index, backend in enumerate(backends):
+            # several keys on one base url get distinct names in stats
+            if backend.name in names:
+                backend.name = f"{backend.name}#{index}"
+            names.add(backend.name)
+        self.backends = backends
+        self.strategy = strategy
+        self.decay = decay
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._lock = threading.Lock()
+
+    def select(self, exclude: Set[Backend]) -> Backend:
+        """Picks a backend (not in `exclude`) and counts the request as outstanding on it."""
+        now = time.monotonic()
+        with self._lock:
+            candidates = [b for b in self.backends if b not in exclude]
+            healthy = [b for b in candidates if b.healthy(now)]
+            if healthy:
+                backend = min(healthy, key=self._score)
+            else:
+                backend = min(candidates, key=lambda b: b.cooldown_until)
+            backend.requests += 1
+            backend.outstanding += 1
+            return backend
+
+    def succeeded(self, backend: Backend, seconds: float):
+        with self._lock:
+            backend.consecutive_failures = 0
+            if backend.latency is None:
+                backend.latency = seconds
+            else:
+                backend.latency += self.decay * (seconds - backend.latency)
+
+    def failed(self, backend: Backend, error: BaseException) -> bool:
+        """Records a failure, returning whether the request should move to another backend."""
+        # the sdk wraps transport errors of create calls, a stream dropping mid-read raises them as they are
+        retry = HedgingPolicy.should_retry(error) or isinstance(
+            error, httpx.TransportError
+        )
+        with self._lock:
+            backend.failures += 1
+            if retry:
+                backend.consecutive_failures += 1
+                delay = min(
+                    self.max_cooldown,
+                    self.cooldown * 2 ** (backend.consecutive_failures - 1),
+                )
+                retry_after = _retry_after(error)
+                if retry_after is not None:
+                    delay = max(delay, min(retry_after, self.max_cooldown))
+                backend.cooldown_until = time.monotonic() + delay
+        return retry
+
+    def release(self, backend: Backend):
+        with self._lock:
+            backend.outstanding -= 1
+
+    def call(self, kwargs: dict, raw: bool = False):
+        error, tried = None, set()
+        while len(tried) < len(self.backends):
+            backend = self.select(tried)
+            tried.add(backend)
+            started = time.monotonic()
+            try:
+                response = backend.create(kwargs, raw)
+            except Exception as e:
+                self.release(backend)
+                if not self.failed(backend, e):
+                    raise
+                error = e
+                continue
+            self.succeeded(backend, time.monotonic() - started)
+            if kwargs.get("stream"):
+                return RoutedStream(response, self, backend)
+            self.release(backend)
+            return response
+        raise error
+
+    async def acall(self, kwargs: dict, raw: bool = False):
+        error, tried = None, set()
+        while len(tried) < len(self.backends):
+            backend = self.select(tried)
+            tried.add(backend)
+            started = time.monotonic()
+            try:
+                response = await backend.create(kwargs, raw)
+            except Exception as e:
+                self.release(backend)
+                if not self.failed(backend, e):
+                    raise
+                error = e
+                continue
+            self.succeeded(backend, time.monotonic() - started)
+            if kwargs.get("stream"):
+                return AsyncRoutedStream(response, self, backend)
+            self.release(backend)
+            return response
+        raise error
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {b.name: b.stats() for b in self.backends}
+
+    def _score(self, backend: Backend):
+        if self.strategy == EWMA:
+            return (backend.latency or 0.0) * (backend.outstanding + 1)
+        return backend.outstanding, backend.latency or 0.0
+
+
+class RoutedCompletions:
+    """Stands in for `client.chat.completions`, routing each create call through the router."""
+
+    def __init__(self, router: Router, raw: bool = False):
+        self._router = router
+        self._raw = raw
+
+    @property
+    def with_raw_response(self) -> "RoutedCompletions":
+        return type(self)(self._router, raw=True)
+
+    def create(self, **kwargs):
+        return self._router.call(kwargs, self._raw)
+
+
+class AsyncRoutedCompletions(RoutedCompletions):
+    async def create(self, **kwargs):
+        return await self._router.acall(kwargs, self._raw)
+
+
+class RoutedClient:
+    """
+    Spreads chat completions over several OpenAI / AzureOpenAI clients (api keys, regions, deployments).
+
+    Use it in place of an OpenAI client, `TypedAI(RoutedClient([...]))`, see Router for how backends are picked. Other
+    endpoints (files, batches, ...) are served by the first backend.
+    """
+
+    router: Router
+
+    def __init__(
+        self,
+        backends: List[Union[Backend, Any]],
+        strategy: RoutingStrategy = LEAST_OUTSTANDING,
+        cooldown: float = 5.0,
+        max_cooldown: float = 60.0,
+    ):
+        self.router = Router(
+            [b if isinstance(b, Backend) else Backend(b) for b in backends],
+            strategy,
+            cooldown=cooldown,
+            max_cooldown=max_cooldown,
+        )
+        self.chat = SimpleNamespace(completions=self._completions(self.router))
+
+    @staticmethod
+    def _completions(router: Router) -> RoutedCompletions:
+        return RoutedCompletions(router)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per backend requests, failures, requests in flight, latency average and health."""
+        return self.router.stats()
+
+    def __getattr__(self, name: str):
+        if name.startswith("_") or name == "router":
+            raise AttributeError(name)
+        return getattr(self.router.backends[0].client, name)
+
+
+class AsyncRoutedClient(RoutedClient):
+    """RoutedClient for AsyncOpenAI / AsyncAzureOpenAI clients, use with AsyncTypedAI."""
+
+    @staticmethod
+    def _completions(router: Router) -> RoutedCompletions:
+        return AsyncRoutedCompletions(router)
+
+
+class RoutedStream:
+    """
+    Passes a stream through, releasing its backend once the stream is consumed, closed or garbage collected.
+
+    An error raised while reading is recorded as a failure of the backend, so one dropping streams is cooled down.
+    """
+
+    def __init__(self, stream, router: Router, backend: Backend):
+        self.stream = stream
+        self._router = router
+        self._backend = backend
+        # runs at most once, whichever of exhaustion, close or garbage collection comes first
+        self._release = weakref.finalize(self, router.release, backend)
+
+    def __next__(self):
+        try:
+            return self.stream.__next__()
+        except StopIteration:
+            self._release()
+            raise
+        except BaseException as e:
+            self._failed(e)
+            raise
+
+    def __iter__(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self._release()
+        self.stream.__exit__(*args, **kwargs)
+
+    def close(self):
+        self._release()
+        self.stream.close()
+
+    def _failed(self, error: BaseException):
+        if self._release.alive and isinstance(error, Exception):
+            self._router.failed(self._backend, error)
+        self._release()
+
+
+class AsyncRoutedStream(RoutedStream):
+    async def __anext__(self):
+        try:
+            return await self.stream.__anext__()
+        except StopAsyncIteration:
+            self._release()
+            raise
+        except BaseException as e:
+            self._failed(e)
+            raise
+
+    def __aiter__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args, **kwargs):
+        self._release()
+        await self.stream.__aexit__(*args, **kwargs)
+
+    async def close(self):
+        self._release()
+        await self.stream.close()
@@ -0,0 +1,97 @@
+import copy
+import re
+from typing import Optional, Type
+from weakref import WeakKeyDictionary
+
+from pydantic import BaseModel
+
+# keywords that can sit next to `$ref` in pydantic schemas but are not allowed there in strict mode
+_REF_SIBLINGS = ("description", "title", "default", "examples")
+_NAME = re.compile(r"[^a-zA-Z0-9_-]")
+
+
+class _Incompatible(Exception):
+    pass
+
+
+def strict_schema(schema: dict) -> Optional[dict]:
+    """
+    Converts a pydantic json schema to one accepted by openai's strict structured outputs, or None if it can't be.
+
+    Objects get `additionalProperties: false` and every property required. A property that was optional is only
+    allowed if it defaults to None and is nullable, so an explicit null round trips to the same value. Free form
+    objects (dicts) and non None defaults have no strict equivalent and make the schema incompatible.
+    """
+    try:
+        return _strict(copy.deepcopy(schema))
+    except _Incompatible:
+        return None
+
+
+def _strict(node):
+    if isinstance(node, list):
+        return [_strict(n) for n in node]
+    if not isinstance(node, dict):
+        return node
+    if "$ref" in node:
+        for key in _REF_SIBLINGS:
+            node.pop(key, None)
+        if len(node) > 1:
+            raise _Incompatible()
+        return node
+    if node.get("default", ...) is None:
+        del node["default"]
+    elif "default" in node:
+        raise _Incompatible()
+    if node.get("type") == "object" or "properties" in node:
+        properties = node.get("properties")
+        if not properties or isinstance(node.get("additionalProperties"), dict):
+            raise _Incompatible()
+        required = set(node.get("required", ()))
+        for name, prop in properties.items():
+            if name not in required and not _defaults_to_none(prop):
+                raise _Incompatible()
+        node["additionalProperties"] = False
+        node["required"] = list(properties)
+    if len(node.get("allOf", ())) == 1:
+        (only,) = node.pop("allOf")
+        node.update(only)
+    for key in ("properties", "$defs", "definitions"):
+        if key in node:
+            node[key] = {k: _strict(v) for k, v in node[key].items()}
+    for key in ("items", "anyOf", "allOf", "prefixItems"):
+        if key in node:
+            node[key] = _strict(node[key])
+    return node
+
+
+def _defaults_to_none(prop: dict) -> bool:
+    if prop.get("default", ...) is not None:
+        return False
+    return prop.get("type") == "null" or any(
+        option.get("type") == "null" for option in prop.get("anyOf", ())
+    )
+
+
+def schema_name(response_type) -> str:
+    """A response_format name (letters, digits, `_` and `-`, at most 64 characters) for the response type."""
+    name = _NAME.sub("_", getattr(response_type, "__name__", None) or "response")
+    return name[:64] or "response"
+
+
+# (source, strict) function definitions, keyed weakly on the tool's parameter model
+_strict_functions: WeakKeyDictionary = WeakKeyDictionary()
+
+
+def strict_function(param_model: Type[BaseModel], function_definition: dict) -> dict:
+    """The function definition with strict parameters, or unchanged if its parameters can't be made strict."""
+    cached = _strict_functions.get(param_model)
+    if cached is not None and cached[0] is function_definition:
+        return cached[1]
+    parameters = strict_schema(function_definition["parameters"])
+    if parameters is None:
+        strict = function_definition
+    else:
+        strict = dict(function_definition, parameters=parameters, strict=True)
+    _strict_functions[param_model] = (function_definition, strict)
+    return strict
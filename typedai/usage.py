@@ -0,0 +1,96 @@
+import threading
+from typing import Dict, Optional, Union
+
+from openai.types import CompletionUsage
+
+
+class UsageStats:
+    """
+    Token usage aggregated over the requests of a TypedAI / AsyncTypedAI, including provider prompt cache hits.
+
+    Streams only report usage when requested with `stream_options={"include_usage": True}`. Responses served from a
+    local ResponseCache are not counted.
+    """
+
+    requests: int
+    prompt_tokens: int
+    cached_tokens: int
+    completion_tokens: int
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+
+    def record(self, usage: Optional[CompletionUsage]):
+        if usage is None:
+            return
+        details = usage.prompt_tokens_details
+        cached = (details.cached_tokens or 0) if details is not None else 0
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += usage.prompt_tokens
+            self.cached_tokens += cached
+            self.completion_tokens += usage.completion_tokens
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Share of prompt tokens served from the provider's prompt cache."""
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        return dict(
+            requests=self.requests,
+            prompt_tokens=self.prompt_tokens,
+            cached_tokens=self.cached_tokens,
+            completion_tokens=self.completion_tokens,
+            cache_hit_rate=self.cache_hit_rate,
+        )
+
+
+class UsageStream:
+    """Passes an openai Stream through, recording the usage chunk when one arrives."""
+
+    def __init__(self, stream, usage: UsageStats):
+        self.stream = stream
+        self._usage = usage
+
+    def __next__(self):
+        chunk = self.stream.__next__()
+        if chunk.usage is not None:
+            self._usage.record(chunk.usage)
+        return chunk
+
+    def __iter__(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.stream.__exit__(*args, **kwargs)
+
+    def close(self):
+        self.stream.close()
+
+
+class AsyncUsageStream(UsageStream):
+    async def __anext__(self):
+        chunk = await self.stream.__anext__()
+        if chunk.usage is not None:
+            self._usage.record(chunk.usage)
+        return chunk
+
+    def __aiter__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args, **kwargs):
+        await self.stream.__aexit__(*args, **kwargs)
+
+    async def close(self):
+        await self.stream.close()
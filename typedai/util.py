@@ -1,5 +1,9 @@
+import threading
+from collections import OrderedDict
+from time import perf_counter
 from typing import (
     Callable,
+    Iterator,
     get_type_hints,
     Tuple,
     Dict,
@@ -7,11 +11,17 @@ from typing import (
     Type,
     Optional,
     TypeVar,
+    Hashable,
+    Any,
 )
+from weakref import WeakKeyDictionary
 
 from openai.types import FunctionDefinition
 from pydantic import create_model, BaseModel
 
+from typedai.compact import SchemaCompactor, compacted_function
+from typedai.instrumentation import emit, hooks
+
 
 def snake_to_capital_case(snake_str):
     components = snake_str.split("_")
@@ -26,25 +36,106 @@ def callable_params_as_base_model(func: Callable) -> Type[BaseModel]:
     return create_model(snake_to_capital_case(func.__name__ + "Model"), **params)
 
 
-def transform_tools(
-    tools: Iterable[Callable],
-) -> Dict[str, Tuple[Callable, Type[BaseModel], dict]]:
-    functions: Dict[str, Tuple[Callable, Type[BaseModel], dict]] = {}
-    for fn in tools:
+CompiledTool = Tuple[Callable, Type[BaseModel], dict]
+
+
+class ToolRegistry:
+    """
+    Caches the parameter model and function definition compiled for each tool.
+
+    Entries are keyed weakly on the callable (bound methods on their underlying function) so closures and instances
+    are not kept alive by the cache.
+    """
+
+    hits: int
+    misses: int
+
+    def __init__(self):
+        self._compiled: WeakKeyDictionary = WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, fn: Callable) -> CompiledTool:
         if not callable(fn):
             raise ValueError(f"Expected a callable function, got {fn}")
-        param_model = callable_params_as_base_model(fn)
-        # noinspection PyArgumentList
-        functions[fn.__name__] = (
-            fn,
-            param_model,
-            FunctionDefinition(
-                name=fn.__name__,
-                description=fn.__doc__,
-                parameters=param_model.model_json_schema(),
-            ).model_dump(),
-        )
-    return functions
+        key = getattr(fn, "__func__", fn)
+        try:
+            compiled = self._compiled.get(key)
+        except TypeError:  # not weak referenceable
+            self.misses += 1
+            return (fn, *_compile_tool(fn))
+        if compiled is None:
+            self.misses += 1
+            compiled = _compile_tool(fn)
+            with self._lock:
+                self._compiled[key] = compiled
+        else:
+            self.hits += 1
+        return fn, *compiled
+
+    def clear(self):
+        with self._lock:
+            self._compiled.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._compiled)
+
+
+tool_registry = ToolRegistry()
+
+
+def _compile_tool(fn: Callable) -> Tuple[Type[BaseModel], dict]:
+    started = perf_counter() if hooks else None
+    param_model = callable_params_as_base_model(fn)
+    # noinspection PyArgumentList
+    fd = FunctionDefinition(
+        name=fn.__name__,
+        description=fn.__doc__,
+        parameters=param_model.model_json_schema(),
+    ).model_dump()
+    if started is not None:
+        emit("tool_compiled", fn.__name__, perf_counter() - started)
+    return param_model, fd
+
+
+class ToolSet:
+    """
+    A pre-compiled set of tools.
+
+    Pass it as `fn_tools` to skip tool compilation entirely on each call.
+    """
+
+    functions: Dict[str, CompiledTool]
+
+    def __init__(self, tools: Iterable[Callable], registry: ToolRegistry = None):
+        registry = registry or tool_registry
+        self.functions = {}
+        for fn in tools:
+            self.functions[fn.__name__] = registry.compile(fn)
+
+    def __iter__(self) -> Iterator[Callable]:
+        return (fn for fn, _, _ in self.functions.values())
+
+    def __len__(self):
+        return len(self.functions)
+
+
+def transform_tools(
+    tools: Iterable[Callable],
+    compactor: Optional[SchemaCompactor] = None,
+) -> Dict[str, CompiledTool]:
+    functions = (
+        tools.functions if isinstance(tools, ToolSet) else ToolSet(tools).functions
+    )
+    if compactor is None:
+        return functions
+    return {
+        name: (fn, model, compacted_function(model, fd, compactor))
+        for name, (fn, model, fd) in functions.items()
+    }
 
 
 T = TypeVar("T")
@@ -58,3 +149,56 @@ def require_parser(v: Optional[str], parser: Callable[[str], T]) -> T:
     if v is None:
         raise ValueError("Expected a value, got None")
     return parser(v)
+
+
+class LRUCache:
+    """A small thread safe LRU cache with hit / miss counters."""
+
+    maxsize: int
+    hits: int
+    misses: int
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        try:
+            with self._lock:
+                value = self._data[key]
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+        except KeyError:
+            pass
+        except TypeError:  # unhashable keys are never cached
+            self.misses += 1
+            return factory()
+        value = factory()
+        with self._lock:
+            self.misses += 1
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            size=len(self._data),
+            maxsize=self.maxsize,
+        )
+
+    def __len__(self):
+        return len(self._data)